@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+解析性能对比工具（开发用）
+从录制的网络归档（POKE_NETWORK_MODE=record 运行抓取脚本得到）中读取详情页面，
+检查不同实现的输出是否完全一致，并测量耗时；fetch在本地模拟服务器上对比页面获取方式
+
+用法（在仓库根目录下运行）:
+    python benchmarks/benchmark.py parser [--entity pokemon] [--limit 50] [--repeat 3]
+    python benchmarks/benchmark.py partial [--entity pokemon] [--limit 50] [--repeat 3]
+    python benchmarks/benchmark.py prune [--entity pokemon] [--limit 50] [--repeat 3]
+    python benchmarks/benchmark.py schema [--entity pokemon] [--limit 50] [--repeat 3]
+    python benchmarks/benchmark.py learnset [--limit 50] [--repeat 3]
+    python benchmarks/benchmark.py learner [--entity move] [--limit 20] [--repeat 3]
+    python benchmarks/benchmark.py fetch [--entity pokemon] [--limit 100] [--latency 0.05]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import requests
+
+# 被测的抓取模块都在scripts目录下（平铺导入）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import ability
+import move
+import pokemon
+import reference_extractors
+from ability import parse_ability_page
+from config import DATA_PATH, DETAIL_FIELDS, PAGE_FETCH_CONFIG, PAGE_TITLES, SINGLE_FLIGHT_CONFIG, WIKITEXT_CONFIG
+from extractor_profiler import pad
+from html_pruner import get_prune_stats, make_pruned_soup, prune_stats, set_pruning
+from http_cache import http_cache
+from learnset_extractor import extract_learnsets
+from move import parse_move_page
+from network_archive import network_archive
+from page_source import FETCH_MODES, fetch_pages, get_page_url
+from parser_utils import PARSER_BACKENDS, SectionIndex, is_backend_available, set_parser_backend, set_partial_parse
+from pokemon import parse_pokemon_page
+from rate_limiter import rate_limiter
+from utils import load_from_file
+from wiki_api import iter_batches
+from wiki_stub import WikiStub
+
+ENTITIES = ('pokemon', 'move', 'ability')
+
+# 实体类型 -> (条目, 页面HTML) -> 解析结果
+EXTRACTORS = {
+    'pokemon': lambda item, html: parse_pokemon_page(html, item['name'], item['index'], item['name_en'], item['name_jp']),
+    'move': lambda item, html: parse_move_page(html, dict(item)),
+    'ability': lambda item, html: parse_ability_page(html, dict(item))
+}
+
+# 实体类型 -> [(字段, 原始实现, 声明式实现)]，函数签名为 (soup, 条目) -> 提取结果
+SCHEMA_EXTRACTORS = {
+    'pokemon': [
+        ('names', lambda soup, item: reference_extractors.get_names(soup, item['name']),
+         lambda soup, item: pokemon.get_names(soup, item['name'])),
+        ('forms', lambda soup, item: reference_extractors.get_form_infos(soup, pokemon.get_form_names(soup), item['name'], item['index']),
+         lambda soup, item: pokemon.get_form_infos(soup, pokemon.get_form_names(soup), item['name'], item['index']))
+    ],
+    'move': [
+        ('info', lambda soup, item: reference_extractors.get_move_info(soup), lambda soup, item: move.get_info(soup))
+    ],
+    'ability': [
+        ('info', lambda soup, item: reference_extractors.get_ability_info(soup), lambda soup, item: ability.get_info(soup))
+    ]
+}
+
+def load_archived_page(title):
+    """
+    从网络归档中读取页面HTML（完整页面或解析API的结果）
+
+    Args:
+        title: 页面标题
+
+    Returns:
+        str: 页面HTML，归档中没有时返回None
+    """
+    for mode in ('page', 'parse'):
+        url = requests.Request('GET', get_page_url(title, mode)).prepare().url
+        entry, body = network_archive.load('GET', url)
+        if entry is None or entry['status'] != 200:
+            continue
+        text = body.decode('utf8', errors='replace')
+        if mode == 'parse':
+            text = json.loads(text)['parse']['text']
+        return text
+    return None
+
+def load_corpus(entity, limit=None):
+    """
+    加载某类实体的归档页面
+
+    Args:
+        entity: 实体类型
+        limit: 最多加载的页面数
+
+    Returns:
+        list: (条目, 页面HTML) 列表
+    """
+    items = load_from_file(os.path.join(DATA_PATH, f'{entity}_list.json')) or []
+    corpus = []
+    for item in items:
+        html = load_archived_page(PAGE_TITLES[entity](item['name']))
+        if html is not None:
+            corpus.append((item, html))
+            if limit and len(corpus) >= limit:
+                break
+    return corpus
+
+def run_extractor(extractor, corpus, repeat):
+    """
+    对语料运行解析函数
+
+    Args:
+        extractor: (条目, 页面HTML) -> 解析结果
+        corpus: (条目, 页面HTML) 列表
+        repeat: 重复次数，取最快一次的耗时
+
+    Returns:
+        tuple: (解析结果列表（JSON文本，解析失败时为异常描述）, 耗时秒数)
+    """
+    best = None
+    outputs = []
+    for _ in range(repeat):
+        outputs = []
+        started = time.perf_counter()
+        for item, html in corpus:
+            try:
+                result = json.dumps(extractor(item, html), ensure_ascii=False)
+            except Exception as e:
+                result = f'{type(e).__name__}: {e}'
+            outputs.append(result)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return outputs, best
+
+def measure_peak_memory(extractor, corpus):
+    """
+    测量解析单个页面的最大内存峰值
+
+    Returns:
+        int: 各页面内存峰值中的最大值（字节）
+    """
+    peak = 0
+    tracemalloc.start()
+    try:
+        for item, html in corpus:
+            tracemalloc.reset_peak()
+            try:
+                extractor(item, html)
+            except Exception:
+                pass
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def count_mismatches(corpus, expected, actual, label):
+    """
+    对比两组解析结果，输出不一致的条目
+
+    Returns:
+        int: 不一致的条目数
+    """
+    mismatches = [item['name'] for (item, _), a, b in zip(corpus, expected, actual) if a != b]
+    for name in mismatches[:5]:
+        print(f"    输出不一致 [{label}]: {name}")
+    return len(mismatches)
+
+def print_timing(label, seconds, pages, baseline, mismatches, peak=None):
+    """输出一行耗时对比"""
+    speedup = baseline / seconds if seconds else 0
+    memory = f"  峰值内存 {peak / 1024 / 1024:7.2f}MB" if peak is not None else ''
+    print(f"  {label:<16} {seconds:8.3f}s  {seconds / pages * 1000:8.2f}ms/页  {speedup:5.2f}x  不一致 {mismatches}{memory}")
+
+def benchmark_parser(args):
+    """对比不同解析器后端：输出必须与html.parser完全一致"""
+    backends = [backend for backend in PARSER_BACKENDS if is_backend_available(backend)]
+    failed = 0
+    for entity in args.entity:
+        corpus = load_corpus(entity, args.limit)
+        if not corpus:
+            print(f"{entity}: 归档中没有页面，请先在录制模式下运行抓取脚本")
+            continue
+        print(f"{entity}: {len(corpus)} 个页面")
+
+        results = {}
+        for backend in backends:
+            set_parser_backend(backend)
+            results[backend] = run_extractor(EXTRACTORS[entity], corpus, args.repeat)
+
+        expected, baseline = results['html.parser']
+        for backend in backends:
+            outputs, seconds = results[backend]
+            mismatches = count_mismatches(corpus, expected, outputs, backend)
+            failed += mismatches
+            print_timing(backend, seconds, len(corpus), baseline, mismatches)
+    return failed
+
+def benchmark_partial(args):
+    """对比完整解析与只解析正文：输出必须完全一致"""
+    failed = 0
+    for entity in args.entity:
+        corpus = load_corpus(entity, args.limit)
+        if not corpus:
+            print(f"{entity}: 归档中没有页面，请先在录制模式下运行抓取脚本")
+            continue
+        print(f"{entity}: {len(corpus)} 个页面")
+
+        results = {}
+        for label, enabled in (('full', False), ('partial', True)):
+            set_partial_parse(enabled)
+            outputs, seconds = run_extractor(EXTRACTORS[entity], corpus, args.repeat)
+            results[label] = (outputs, seconds, measure_peak_memory(EXTRACTORS[entity], corpus))
+
+        expected, baseline, _ = results['full']
+        for label, (outputs, seconds, peak) in results.items():
+            mismatches = count_mismatches(corpus, expected, outputs, label)
+            failed += mismatches
+            print_timing(label, seconds, len(corpus), baseline, mismatches, peak)
+    return failed
+
+def benchmark_prune(args):
+    """对比预处理前后：默认设置下输出应完全相同，差异逐页列出，并统计去除的字节数和节点数"""
+    failed = 0
+    for entity in args.entity:
+        corpus = load_corpus(entity, args.limit)
+        if not corpus:
+            print(f"{entity}: 归档中没有页面，请先在录制模式下运行抓取脚本")
+            continue
+        print(f"{entity}: {len(corpus)} 个页面，共 {sum(len(html.encode('utf8')) for _, html in corpus)} 字节")
+
+        results = {}
+        for label, enabled in (('original', False), ('pruned', True)):
+            set_pruning(enabled)
+            outputs, seconds = run_extractor(EXTRACTORS[entity], corpus, args.repeat)
+            results[label] = (outputs, seconds, measure_peak_memory(EXTRACTORS[entity], corpus))
+
+        expected, baseline, _ = results['original']
+        for label, (outputs, seconds, peak) in results.items():
+            mismatches = count_mismatches(corpus, expected, outputs, label)
+            failed += mismatches
+            print_timing(label, seconds, len(corpus), baseline, mismatches, peak)
+
+        stats = get_prune_stats()
+        print(f"  每页平均去除 {stats['pruned_bytes'] / stats['pruned_pages']:.0f} 字节、{stats['pruned_nodes'] / stats['pruned_pages']:.0f} 个节点")
+        prune_stats.reset()
+    return failed
+
+def run_field_extractor(extractor, soups, repeat):
+    """
+    对已解析的页面运行字段提取函数
+
+    Args:
+        extractor: (soup, 条目) -> 提取结果
+        soups: (条目, soup) 列表
+        repeat: 重复次数，取最快一次的耗时
+
+    Returns:
+        tuple: (提取结果列表（JSON文本，失败时为error）, 耗时秒数)
+    """
+    best = None
+    outputs = []
+    for _ in range(repeat):
+        outputs = []
+        started = time.perf_counter()
+        for item, soup in soups:
+            try:
+                result = json.dumps(extractor(soup, item), ensure_ascii=False)
+            except Exception:
+                # 两种实现的异常类型和描述不同，只比较是否失败
+                result = 'error'
+            outputs.append(result)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return outputs, best
+
+def benchmark_schema(args):
+    """对比手写提取函数与声明式字段定义：输出必须完全一致，只计字段提取的耗时（不含构建soup）"""
+    failed = 0
+    for entity in args.entity:
+        corpus = load_corpus(entity, args.limit)
+        if not corpus:
+            print(f"{entity}: 归档中没有页面，请先在录制模式下运行抓取脚本")
+            continue
+        print(f"{entity}: {len(corpus)} 个页面")
+        soups = [(item, make_pruned_soup(html)) for item, html in corpus]
+
+        for field, reference, schema in SCHEMA_EXTRACTORS[entity]:
+            expected, baseline = run_field_extractor(reference, soups, args.repeat)
+            outputs, seconds = run_field_extractor(schema, soups, args.repeat)
+            mismatches = count_mismatches(corpus, expected, outputs, field)
+            failed += mismatches
+            print_timing(f'{field} (原实现)', baseline, len(corpus), baseline, 0)
+            print_timing(f'{field} (schema)', seconds, len(corpus), baseline, mismatches)
+    return failed
+
+def benchmark_learnset(args):
+    """对比宝可梦招式表的BeautifulSoup实现与lxml快速提取：输出必须完全一致（快速提取的耗时包含lxml解析页面）"""
+    corpus = load_corpus('pokemon', args.limit)
+    if not corpus:
+        print("pokemon: 归档中没有页面，请先在录制模式下运行抓取脚本")
+        return 0
+    print(f"pokemon: {len(corpus)} 个页面")
+
+    # get_moves会修改soup，每轮使用新的soup，构建soup不计入耗时
+    expected, baseline = [], None
+    for _ in range(args.repeat):
+        soups = [make_pruned_soup(html) for _, html in corpus]
+        started = time.perf_counter()
+        outputs = []
+        for soup in soups:
+            try:
+                outputs.append(json.dumps(pokemon.get_moves(soup), ensure_ascii=False))
+            except Exception:
+                outputs.append('error')
+        elapsed = time.perf_counter() - started
+        baseline = elapsed if baseline is None else min(baseline, elapsed)
+        expected = outputs
+
+    results, seconds = run_extractor(lambda item, html: extract_learnsets(html), corpus, args.repeat)
+    fallbacks = sum(1 for result in results if result == 'null')
+    # 快速提取放弃的页面由get_moves处理，不算不一致
+    outputs = [a if b == 'null' else b for a, b in zip(expected, results)]
+    mismatches = count_mismatches(corpus, expected, outputs, 'lxml')
+    print_timing('beautifulsoup', baseline, len(corpus), baseline, 0)
+    print_timing('lxml', seconds, len(corpus), baseline, mismatches)
+    print(f"  回退到BeautifulSoup的页面: {fallbacks}")
+    return mismatches
+
+def get_ability_pokemon(soup):
+    """与原实现的输出形式一致：没有宝可梦表时为空字典"""
+    pokemon_list = ability.get_pokemon_list(SectionIndex(soup))
+    return {'pokemon': pokemon_list} if pokemon_list is not None else {}
+
+# 实体类型 -> (原始实现, 通用表格提取)，函数签名为 (soup, 条目) -> 提取结果
+LEARNER_EXTRACTORS = {
+    'move': (
+        lambda soup, item: reference_extractors.get_move_learners(soup),
+        lambda soup, item: move.get_learners(SectionIndex(soup))
+    ),
+    'ability': (
+        lambda soup, item: reference_extractors.get_ability_pokemon(soup),
+        lambda soup, item: get_ability_pokemon(soup)
+    )
+}
+
+def benchmark_learner(args):
+    """学习宝可梦表的微基准：取表格最大的页面（如常见招式学习器），对比原实现与通用表格提取"""
+    failed = 0
+    for entity in args.entity:
+        if entity not in LEARNER_EXTRACTORS:
+            continue
+        corpus = load_corpus(entity)
+        if not corpus:
+            print(f"{entity}: 归档中没有页面，请先在录制模式下运行抓取脚本")
+            continue
+        # 按记录行数（bgwhite出现次数）取最大的页面
+        corpus.sort(key=lambda entry: entry[1].count('bgwhite'), reverse=True)
+        corpus = corpus[:args.limit or 20]
+        soups = [(item, make_pruned_soup(html)) for item, html in corpus]
+        rows = sum(len(soup.find_all('tr', class_='bgwhite')) for _, soup in soups)
+        print(f"{entity}: {len(corpus)} 个页面，共 {rows} 行")
+
+        reference, generic = LEARNER_EXTRACTORS[entity]
+        expected, baseline = run_field_extractor(reference, soups, args.repeat)
+        outputs, seconds = run_field_extractor(generic, soups, args.repeat)
+        mismatches = count_mismatches(corpus, expected, outputs, 'table_utils')
+        failed += mismatches
+        print_timing('原实现', baseline, len(corpus), baseline, 0)
+        print_timing('table_utils', seconds, len(corpus), baseline, mismatches)
+    return failed
+
+def fill(unit, size_kb):
+    """重复unit直到不小于size_kb千字节"""
+    count = max(1, -(-size_kb * 1024 // len(unit.encode('utf8'))))
+    return unit * count
+
+def make_stub_pages(entity, count, args):
+    """
+    生成模拟服务器上的页面：完整页面为站点框架加正文，解析API只返回正文，页面源码按给定大小填充
+
+    Returns:
+        dict: 标题 -> 页面数据
+    """
+    content = '<div class="mw-parser-output">' + fill('<p>妙蛙种子在出生后的一段时间内会从背上的种子中吸取养分成长。</p>\n', args.content_kb) + '</div>'
+    chrome = fill('<li><a href="/wiki/%E4%B8%BB%E9%A1%B5">导航</a></li>\n', max(args.html_kb - args.content_kb, 1))
+    html = f'<!DOCTYPE html><html><head><title>页面</title></head><body><ul>{chrome}</ul>{content}</body></html>'
+    # 源码能提供种族值和效果说明：只输出这些字段时wikitext模式不获取HTML，输出完整记录时还要获取文章页面
+    wikitext = ('{{种族值|HP=45|攻击=49|防御=49|特攻=65|特防=65|速度=45}}\n\n==特性效果==\n草属性招式的威力提高。\n\n==招式附加效果==\n'
+                + fill('妙蛙种子是[[草属性]]宝可梦。\n\n', args.wikitext_kb))
+    return {
+        PAGE_TITLES[entity](f'模拟页面{i}'): {'revid': i + 1, 'html': html, 'text': content, 'wikitext': wikitext}
+        for i in range(count)
+    }
+
+# 页面获取方式：(方式, wikitext模式需要输出的字段)，wikitext模式分别测量完整记录和只输出源码能提供的字段
+FETCH_VARIANTS = {
+    entity: [(mode, DETAIL_FIELDS[entity]) for mode in FETCH_MODES] + [('wikitext', fields)]
+    for entity, fields in (('pokemon', ('stats',)), ('move', ('effect',)), ('ability', ('effect',)))
+}
+
+def benchmark_fetch(args):
+    """在本地模拟服务器上对比页面获取方式（page/parse/wikitext）的请求数、传输字节数和耗时"""
+    # 模拟服务器不需要限速；HTTP缓存和单飞会让后面的轮次直接复用响应
+    rate_limiter.enabled = False
+    http_cache.enabled = False
+    SINGLE_FLIGHT_CONFIG['enabled'] = False
+    count = args.limit or 100
+    failed = 0
+    with WikiStub(latency=args.latency) as stub, stub.patch_config():
+        for entity in args.entity:
+            stub.pages = make_stub_pages(entity, count, args)
+            titles = list(stub.pages)
+            print(f"{entity}: {count} 个页面，模拟延迟 {args.latency * 1000:.0f}ms")
+
+            baseline = None
+            for mode, fields in FETCH_VARIANTS[entity]:
+                PAGE_FETCH_CONFIG['modes'][entity] = mode
+                WIKITEXT_CONFIG['fields'][entity] = list(fields)
+                label = mode if fields == DETAIL_FIELDS[entity] else f'{mode}（{"、".join(fields)}）'
+                best = None
+                for _ in range(args.repeat):
+                    stub.reset_stats()
+                    fetched = 0
+                    started = time.perf_counter()
+                    # 与抓取流水线相同，按批次获取
+                    for batch in iter_batches(titles, PAGE_FETCH_CONFIG['batch_size']):
+                        fetched += len(fetch_pages(entity, batch))
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                baseline = baseline or best
+                failed += count - fetched
+                print(f"  {pad(label, -24)} {best:8.3f}s  {best / count * 1000:8.2f}ms/页  {baseline / best:5.2f}x  "
+                      f"请求 {stub.count_requests()}  传输 {stub.bytes_sent / 1024 / 1024:7.2f}MB  获取失败 {count - fetched}")
+            WIKITEXT_CONFIG['fields'][entity] = list(DETAIL_FIELDS[entity])
+    return failed
+
+COMMANDS = {
+    'parser': benchmark_parser,
+    'partial': benchmark_partial,
+    'prune': benchmark_prune,
+    'schema': benchmark_schema,
+    'learnset': benchmark_learnset,
+    'learner': benchmark_learner,
+    'fetch': benchmark_fetch
+}
+
+def main():
+    parser = argparse.ArgumentParser(description='解析一致性检查与性能对比')
+    parser.add_argument('command', choices=COMMANDS.keys())
+    parser.add_argument('--entity', nargs='+', choices=ENTITIES, default=list(ENTITIES))
+    parser.add_argument('--limit', type=int, default=None, help='每类实体最多使用的页面数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最快一次')
+    parser.add_argument('--latency', type=float, default=0.05, help='fetch: 模拟服务器每个请求的延迟（秒）')
+    parser.add_argument('--html-kb', type=int, default=600, help='fetch: 完整页面的大小（KB）')
+    parser.add_argument('--content-kb', type=int, default=400, help='fetch: 正文的大小（KB）')
+    parser.add_argument('--wikitext-kb', type=int, default=40, help='fetch: 页面源码的大小（KB）')
+    args = parser.parse_args()
+
+    failed = COMMANDS[args.command](args)
+    if failed:
+        print(f"共 {failed} 个页面输出不一致")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+手写提取函数的原始实现（仅供基准测试）
+提取逻辑改为声明式字段定义后保留原实现，供benchmark.py对比输出与耗时，不随抓取脚本使用
+"""
+import re
+
+
+def get_form_infos(soup, names, pokemon_name, pokemon_index):
+    infos = []
+    info_table_list = soup.select('table.roundy.a-r.at-c')
+
+    for index, form in enumerate(info_table_list):
+        if index < len(names):
+            name = names[index] if names[index] != '' else pokemon_name
+            name = name if pokemon_name in name else f'{pokemon_name}-{name}'
+            form_info = {
+                "name": name,
+                "index": pokemon_index if index == 0 else f'{pokemon_index}.{index}',
+                "is_mega": False,
+                "is_gmax": False,
+            }
+            if '超级' in name:
+                form_info['is_mega'] = True
+            elif '极巨化' in name:
+                form_info['is_gmax'] = True
+
+            image_name = f'{form_info["index"]}-{name}'
+            form_info['image'] = f'{image_name}.png'
+            td_list = form.select('.fulltable')
+
+            for td in td_list:
+                # types
+                type_a = td.find('a', attrs={'title': '属性'})
+                if type_a:
+                    type_spans = td.select('span.type-box-9-text')
+                    types = []
+                    for span in type_spans:
+                        types.append(span.text.strip())
+                    form_info['types'] = types
+
+                # genus
+                genus_a = td.find('a', attrs={'title': '分类'})
+                if genus_a:
+                    genus_el = td.select('td > a')[0]
+                    for el in genus_el:
+                        form_info['genus'] = el.text.strip()
+
+                # ability
+                ability_a = td.find('a', attrs={'title': '特性'})
+                if ability_a:
+                    ability_el = ability_a.parent.find_next('table').find_all('td')
+                    abilities = []
+                    for a in ability_el[0].find_all('a'):
+                        name = a.text.strip()
+                        abilities.append({
+                            'name': name,
+                            'is_hidden': False
+                        })
+                    if len(ability_el) > 1:
+                        for a in ability_el[1].find_all('a'):
+                            name = a.text.strip()
+                            abilities.append({
+                                'name': name,
+                                'is_hidden': True
+                            })
+                    form_info['ability'] = abilities
+
+                # experience
+                experience_a = td.find('a', attrs={'title': '经验值'})
+                if experience_a:
+                    experience_el = td.select('td > table')
+
+                    for el in experience_el:
+                        exp = el.select('td')[0].contents[0].text.strip()
+                        speed = el.select('small')[0].text.strip().replace('（', '').replace('）', '') if el.select('small') else ''
+                        form_info['experience'] = {
+                            'number': exp,
+                            'speed': speed
+                        }
+
+                # height weight
+                height_a = td.find_all(string=lambda text: '身高' in text if text else False)
+                if height_a:
+                    height = td.select('td.roundy')[0].text.strip()
+                    form_info['height'] = height
+                weight_a = td.find_all(string=lambda text: '体重' in text if text else False)
+                if weight_a:
+                    weight = td.select('td.roundy')[0].text.strip()
+                    form_info['weight'] = weight
+
+            # image
+            img_el = form.select('.roundy.bgwhite.fulltable')[0].find('img')
+
+            image_url = img_el.get('data-url')
+
+            # gender rate
+            gender_a = form.find('a', attrs={'title': '宝可梦列表（按性别比例分类）'})
+            if gender_a:
+                gender_table = gender_a.parent.find_next('table')
+                male_el = gender_table.find('span', attrs={
+                    'style': 'color:#00F;'
+                })
+                male = re.findall(r'\d+\.?\d*%', male_el.text.strip())[0] if male_el else None
+                # male = re.search(r'\d+%', male_el.text.strip()).group() if male_el else None
+                female_el = gender_table.find('span', attrs={
+                    'style': 'color:#FF6060;'
+                })
+                female = re.findall(r'\d+\.?\d*%', female_el.text.strip())[0] if female_el else None
+                # female = re.search(r'\d+%', female_el.text.strip()).group() if female_el else None
+                form_info['gender_rate'] = {
+                    'male': male,
+                    'female': female
+                } if male or female else None
+            infos.append(form_info)
+
+            # shape
+            shape_a = form.find('a', attrs={'title': '宝可梦列表（按体形分类）'})
+            if shape_a:
+                shape_el = shape_a.parent.find_next('table').find('a')
+                form_info['shape'] = shape_el.get('title')
+
+            # color
+            color_a = form.find('a', attrs={'title': '宝可梦列表（按颜色分类）'})
+            if color_a:
+                color_el = color_a.parent.find_next('table').find('span')
+                form_info['color'] = color_el.text.strip()
+
+            # catch rate
+            catch_a = form.find('a', attrs={'title': '捕获率'})
+            if catch_a:
+                catch_el = catch_a.parent.find_next('table').find('td')
+                num = catch_el.contents[0].strip()
+                rate = catch_el.find('span').text.strip() if catch_el.find('span') else None
+                form_info['catch_rate'] = {
+                    'number': num,
+                    'rate': rate
+                }
+
+            # raise
+            raise_a = form.find('a', attrs={'title': '宝可梦培育'})
+            if raise_a:
+                egg_groups = []
+                raise_td_list = raise_a.parent.find_next('table').find_all('td')
+                egg_group_a_list = raise_td_list[0].find_all('a')
+                for a in egg_group_a_list:
+                    egg_group = a.text.strip().replace('群', '')
+                    egg_groups.append(egg_group)
+                form_info['egg_groups'] = egg_groups
+
+    return infos
+
+def get_names(soup, name):
+    names = {
+        'zh_hans': name
+    }
+    name_table = soup.find('table', {
+        'class': 'wiki-nametable'
+    })
+
+    name_tr_list = name_table.select('tr.varname1')
+
+    for tr in name_tr_list:
+        tr_cn = tr.find_all(string=lambda text: '任天堂' == text if text else False)
+        tr_en = tr.find_all(string=lambda text: '英文' in text if text else False)
+        tr_fr = tr.find_all(string=lambda text: '英文' in text if text else False)
+        tr_es = tr.find_all(string=lambda text: '西班牙文' in text if text else False)
+        tr_it = tr.find_all(string=lambda text: '意大利文' in text if text else False)
+        tr_de = tr.find_all(string=lambda text: '德文' in text if text else False)
+
+        if tr_cn:
+            name_zh_hant = tr.select('td')[2].contents[0].strip() if tr.select('td') else name
+            names['zh_hant'] = name_zh_hant
+        if tr_en:
+            name_en = tr.select('td')[2].text.strip()
+            names['en'] = name_en
+        if tr_fr:
+            name_fr = tr.select('td')[2].text.strip()
+            names['fr'] = name_fr
+        if tr_es:
+            name_es = tr.select('td')[2].text.strip()
+            names['es'] = name_es
+        if tr_de:
+            name_de = tr.select('td')[2].text.strip()
+            names['de'] = name_de
+        if tr_it:
+            name_it = tr.select('td')[2].text.strip()
+            names['it'] = name_it
+
+    name_ja = name_table.find('span', attrs={'lang': 'ja'}).text.strip()
+    names['ja'] = name_ja
+    name_ko = name_table.find('span', attrs={'lang': 'ko'})
+    names['ko'] = name_ko.text.strip() if name_ko else None
+    return names
+
+def get_move_info(soup):
+    move_detail = {}
+    info_text = []
+    info_table = soup.find('table', class_="a-r")
+    info_li_list = info_table.find('ul').find_all('li')
+    for li in info_li_list:
+        info_text.append(li.text.strip())
+    move_detail['info'] = info_text
+
+    range_el = info_table.find('a', title="范围").find_parent('tr').find_next_sibling('tr').find_next_sibling('tr')
+    move_detail['range'] = range_el.text.strip()
+    return move_detail
+
+def get_ability_info(soup):
+    info_text = []
+    info_table = soup.find('table', class_="a-r")
+    info_li_list = info_table.find('ul').find_all('li')
+    for li in info_li_list:
+        info_text.append(li.text.strip())
+    return {'info': info_text}
+
+def get_move_learners(soup):
+    # pokemon
+    pokemons = {
+        "level": [],
+        "machine": [],
+        "egg": [],
+        "tutor": [],
+    }
+    # level
+    level_el = soup.find('span', id="通过等级提升")
+    if level_el:
+        level_table = level_el.find_parent(['h3', 'h4']).find_next_sibling('table')
+        level_tr_list = level_table.find_all('tr', class_="bgwhite")
+        for tr in level_tr_list:
+            tds = tr.find_all('td')
+            name = '-'.join([a.text.strip() for a in tds[2].find_all('a')])
+            pokemon = {
+                "index": tds[0].text.strip(),
+                "name": name
+            }
+            pokemons["level"].append(pokemon)
+
+    # machine
+    machine_el = soup.find('span', id="通过招式学习器")
+    if machine_el:
+        machine_table = machine_el.find_parent('h3').find_next_sibling('table')
+        machine_tr_list = machine_table.find_all('tr', class_="bgwhite")
+        for tr in machine_tr_list:
+            tds = tr.find_all('td')
+            name = '-'.join([a.text.strip().replace('\u200e', '') for a in tds[2].find_all('a')])
+            pokemon = {
+                "index": tds[0].text.strip(),
+                "name": name
+            }
+            pokemons["machine"].append(pokemon)
+
+    # egg
+    egg_el = soup.find('span', id=lambda x: x in ["通过遺傳", "通过遗传", "通過遺傳"])
+    if egg_el:
+        egg_table = egg_el.find_parent('h3').find_next_sibling('table')
+        egg_tr_list = egg_table.find_all('tr', class_="bgwhite")
+        for tr in egg_tr_list:
+            tds = tr.find_all('td')
+            name = '-'.join([a.text.strip() for a in tds[2].find_all('a')])
+            pokemon = {
+                "index": tds[0].text.strip(),
+                "name": name
+            }
+            pokemons["egg"].append(pokemon)
+
+    # tutor
+    tutor_el = soup.find('span', id="通过教授招式")
+    if tutor_el:
+        tutor_table = tutor_el.find_parent('h3').find_next_sibling('table')
+        tutor_tr_list = tutor_table.find_all('tr', class_="bgwhite")
+        for tr in tutor_tr_list:
+            tds = tr.find_all('td')
+            name = '-'.join([a.text.strip() for a in tds[2].find_all('a')])
+            pokemon = {
+                "index": tds[0].text.strip(),
+                "name": name
+            }
+            pokemons["tutor"].append(pokemon)
+    return pokemons
+
+def get_ability_pokemon(soup):
+    ability_detail = {}
+    # pokemons
+    pokemon_list = []
+    pokemon_tag = soup.find('span', id="具有该特性的宝可梦")
+    if pokemon_tag:
+        pokemon_table = pokemon_tag.parent.find_next_sibling('table')
+        tr_list = pokemon_table.find('tbody').find_all('tr', class_="bgwhite")
+        for idx, tr in enumerate(tr_list):
+            tds = tr.find_all('td')
+            ths = tr.find_all('th')
+            name = '-'.join([a.text.strip() for a in tds[2].find_all('a')])
+            types = [tds[3].text.strip()]
+            if tds[4].text.strip() != '[[（属性）|]]':
+                types.append(tds[4].text.strip())
+
+            pokemon = {
+                "index": tds[0].text.strip(),
+                "name": name,
+                "types": types,
+                "first": ths[0].text.strip(),
+                "second": ths[1].text.strip() if len(ths) > 2 else None,
+                "hidden": ths[-1].text.strip(),
+            }
+            pokemon_list.append(pokemon)
+        ability_detail["pokemon"] = pokemon_list
+    return ability_detail
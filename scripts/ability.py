@@ -1,66 +1,111 @@
 # -*- coding: utf-8 -*-
 
-from bs4 import BeautifulSoup
 import requests
+import soupsieve
 
+from config import PAGE_TITLES, WIKITEXT_CONFIG
+from extraction_schema import Field, Schema, li_texts
+from html_pruner import make_pruned_soup
+from page_source import fetch_page, get_fetch_mode
+from parse_cache import parse_cache
+from parser_utils import SectionIndex
+from table_utils import cell_text, extract_records, find_section_table, joined_links
 from utils import save_to_file
+from wikitext_parser import extract_ability_fields, get_missing_fields
 
 PATH = './../data/ability'
 
+INFO_TABLE_SELECTOR = soupsieve.compile('table.a-r')
 
-def get_ability(ability_simple):
-  headers = {
-    'Accept-Language': 'zh-Hans'
+INFO_TABLE_SCHEMA = Schema(
+  Field('info', selector='ul', process=li_texts, required=True),
+)
+
+def get_pokemon(tds, ths):
+  types = [cell_text(tds[3])]
+  second_type = cell_text(tds[4])
+  if second_type != '[[（属性）|]]':
+    types.append(second_type)
+  return {
+    "index": cell_text(tds[0]),
+    "name": joined_links(tds[2]),
+    "types": types,
+    "first": cell_text(ths[0]),
+    "second": cell_text(ths[1]) if len(ths) > 2 else None,
+    "hidden": cell_text(ths[-1]),
   }
+
+def get_pokemon_list(sections):
+  pokemon_table = find_section_table(sections, ("具有该特性的宝可梦",))
+  if pokemon_table is None:
+    return None
+  return extract_records(pokemon_table.find('tbody'), get_pokemon)
+
+def get_ability(ability_simple, page=None):
   name = ability_simple["name"]
-  url = f'https://wiki.52poke.com/wiki/{name}（特性）'
-  response = requests.get(url, headers=headers)
-  response.raise_for_status()
-  soup = BeautifulSoup(response.text, "html.parser")
+  title = PAGE_TITLES['ability'](name)
+  if page is None:
+    page = fetch_page('ability', title)
+  if page is None:
+    raise requests.exceptions.RequestException(f'请求失败: {title}')
+  if get_fetch_mode('ability') == 'wikitext':
+    return parse_ability_wikitext(page, ability_simple)
+  # 页面内容和提取器版本都没变时直接使用缓存的解析结果（条目的基本信息也是缓存键的一部分）
+  data = parse_cache.get_or_parse('ability', page, ability_simple, lambda: parse_ability_page(page, ability_simple))
+  ability_simple.update(data)
+  return ability_simple
 
-  ability_detail = ability_simple
+def parse_ability_wikitext(page, ability_simple):
+  fields = extract_ability_fields(page.wikitext)
+  required = WIKITEXT_CONFIG['fields']['ability']
+  # wikitext无法提供的字段从获取阶段一并取回的HTML中解析，只运行这些字段的提取函数
+  missing = get_missing_fields(fields, required)
+  if missing:
+    if page.html is None:
+      # 没有HTML时不输出缺少字段的记录，否则保存后增量抓取会一直跳过它
+      return None
+    fields.update(parse_ability_page(page.html, {}, fields=missing))
 
-  # effect
-  effect_tag = soup.find('span', id=lambda x: x in ["特性效果", "游戏中"]).find_parent('h2')
+  for key in required:
+    if key in fields:
+      ability_simple[key] = fields[key]
+  return ability_simple
+
+def get_info(soup):
+  info_table = INFO_TABLE_SELECTOR.select_one(soup)
+  return dict(INFO_TABLE_SCHEMA.extract(info_table))
+
+def get_effect(sections):
+  effect_tag = sections.find("特性效果", "游戏中").find_parent('h2')
   effect_p = effect_tag.find_next_sibling(['p', 'ul'])
   effect_text = ''
   while effect_p and effect_p.name == 'p' or effect_p.name == 'ul':
     effect_text += effect_p.get_text()
     effect_p = effect_p.find_next_sibling()
-  ability_detail['effect'] = effect_text
+  return effect_text
+
+def parse_ability_page(html, ability_simple, fields=None):
+  # fields为None时提取全部字段，否则只提取其中的字段
+  soup = make_pruned_soup(html)
+
+  ability_detail = ability_simple
+
+  # 章节索引只建立一次，效果和宝可梦表都按id定位
+  sections = SectionIndex(soup)
+
+  # effect
+  if fields is None or 'effect' in fields:
+    ability_detail['effect'] = get_effect(sections)
 
   # info
-  info_text = []
-  info_table = soup.find('table', class_="a-r")
-  info_li_list = info_table.find('ul').find_all('li')
-  for li in info_li_list:
-    info_text.append(li.text.strip())
-  ability_detail['info'] = info_text
+  if fields is None or 'info' in fields:
+    ability_detail.update(get_info(soup))
   
   # pokemons
-  pokemon_list = []
-  pokemon_tag = soup.find('span', id="具有该特性的宝可梦")
-  if pokemon_tag:
-    pokemon_table = pokemon_tag.parent.find_next_sibling('table')
-    tr_list = pokemon_table.find('tbody').find_all('tr', class_="bgwhite")
-    for idx, tr in enumerate(tr_list):
-      tds = tr.find_all('td')
-      ths = tr.find_all('th')
-      name = '-'.join([a.text.strip() for a in tds[2].find_all('a')])
-      types = [tds[3].text.strip()]
-      if tds[4].text.strip() != '[[（属性）|]]':
-        types.append(tds[4].text.strip())
-      
-      pokemon = {
-        "index": tds[0].text.strip(),
-        "name": name,
-        "types": types,
-        "first": ths[0].text.strip(),
-        "second": ths[1].text.strip() if len(ths) > 2 else None,
-        "hidden": ths[-1].text.strip(),
-      }
-      pokemon_list.append(pokemon)
-    ability_detail["pokemon"] = pokemon_list
+  if fields is None or 'pokemon' in fields:
+    pokemon_list = get_pokemon_list(sections)
+    if pokemon_list is not None:
+      ability_detail["pokemon"] = pokemon_list
   return ability_detail
 
 
@@ -1,21 +1,17 @@
 # -*- coding: utf-8 -*-
 
-from bs4 import BeautifulSoup
 import requests
 
 from ability import get_ability
-from utils import file_exists, save_to_file
+from crawl_runner import run_detail_crawl
+from network_utils import safe_request
+from parser_utils import make_soup
+from utils import save_to_file
 
 PATH = './../data'
 
-def get_ability_list():
-  headers = {
-    'Accept-Language': 'zh-Hans'
-  }
-  url = 'https://wiki.52poke.com/wiki/特性列表'
-  response = requests.get(url, headers=headers)
-  response.raise_for_status()
-  soup = BeautifulSoup(response.text, "html.parser")
+def parse_ability_list(html):
+  soup = make_soup(html)
 
   abilities = []
   ability_tables = soup.find_all('table', class_='eplist')
@@ -38,18 +34,25 @@ def get_ability_list():
           'hidden_count': int(tds[6].text.strip() or 0),
         }
         abilities.append(ability)
+  return abilities
+
+def get_ability_list():
+  headers = {
+    'Accept-Language': 'zh-Hans'
+  }
+  url = 'https://wiki.52poke.com/wiki/特性列表'
+  response = safe_request(url, headers)
+  if response is None:
+    raise requests.exceptions.RequestException(f'请求失败: {url}')
+  abilities = parse_ability_list(response.text)
   save_to_file(f'{PATH}/ability_list.json', abilities)
   return abilities
 
 if __name__ == '__main__':
   ability_list = get_ability_list()
-  for ability in ability_list:
-    index = ability['index']
-    name = ability['name']
-    file_name = f'{PATH}/ability/{index}-{name}.json'
-    if file_exists(file_name):
-      print(f'{name} 已存在, 跳过...')
-      continue
-    print(f'正在获取 {name}...')
-    data = get_ability(ability_simple=ability)
-    save_to_file(file_name, data)
\ No newline at end of file
+  run_detail_crawl(
+    'ability',
+    ability_list,
+    lambda ability: f"{PATH}/ability/{ability['index']}-{ability['name']}.json",
+    get_ability
+  )
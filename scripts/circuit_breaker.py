@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+熔断模块
+按最近请求的错误率熔断：熔断期间所有请求等待，到期后只放行一个探测请求，探测成功才恢复；
+同时限制整个运行期间的重试总数，避免服务器故障时每个请求各自耗尽重试次数
+"""
+import threading
+import time
+from collections import deque
+
+from config import CIRCUIT_BREAKER_CONFIG
+from logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 熔断状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """熔断器（线程安全，所有请求共享）"""
+
+    def __init__(self, enabled=None, window=None, min_requests=None, error_threshold=None,
+                 open_duration=None, max_open_duration=None, retry_budget_ratio=None, min_retries=None):
+        self.enabled = CIRCUIT_BREAKER_CONFIG['enabled'] if enabled is None else enabled
+        self.min_requests = min_requests or CIRCUIT_BREAKER_CONFIG['min_requests']
+        self.error_threshold = error_threshold or CIRCUIT_BREAKER_CONFIG['error_threshold']
+        self.base_open_duration = open_duration or CIRCUIT_BREAKER_CONFIG['open_duration']
+        self.max_open_duration = max_open_duration or CIRCUIT_BREAKER_CONFIG['max_open_duration']
+        self.retry_budget_ratio = CIRCUIT_BREAKER_CONFIG['retry_budget_ratio'] if retry_budget_ratio is None else retry_budget_ratio
+        self.min_retries = CIRCUIT_BREAKER_CONFIG['min_retries'] if min_retries is None else min_retries
+
+        self.state = CLOSED
+        # 最近请求的结果，True为成功
+        self.outcomes = deque(maxlen=window or CIRCUIT_BREAKER_CONFIG['window'])
+        self.open_duration = self.base_open_duration
+        self.open_until = 0.0
+        # 探测请求所在的线程，只有它的结果决定是否恢复
+        self.probe_thread = None
+
+        self.request_count = 0
+        self.retry_count = 0
+        self.retry_denied_count = 0
+        self.trip_count = 0
+        self.total_wait_time = 0.0
+        self._cond = threading.Condition()
+
+    def before_request(self, is_retry=False):
+        """
+        发出请求前调用，熔断期间阻塞等待
+
+        Args:
+            is_retry: 是否为重试（计入重试预算）
+        """
+        if not self.enabled:
+            return
+        started = time.monotonic()
+        with self._cond:
+            if is_retry:
+                self.retry_count += 1
+            else:
+                self.request_count += 1
+            while True:
+                if self.state == CLOSED:
+                    break
+                now = time.monotonic()
+                # 熔断到期（或上一个探测请求迟迟没有结果）时，由当前请求作为探测请求
+                if now >= self.open_until:
+                    self.state = HALF_OPEN
+                    self.probe_thread = threading.get_ident()
+                    self.open_until = now + self.open_duration
+                    logger.info("熔断到期，发出探测请求")
+                    break
+                self._cond.wait(self.open_until - now)
+            self.total_wait_time += time.monotonic() - started
+
+    def has_retry_budget(self):
+        """全局重试预算是否还有剩余"""
+        if not self.enabled:
+            return True
+        with self._cond:
+            return self.retry_count < self.request_count * self.retry_budget_ratio + self.min_retries
+
+    def allow_retry(self):
+        """
+        判断是否允许重试
+
+        Returns:
+            bool: 重试预算有剩余时返回True
+        """
+        if self.has_retry_budget():
+            return True
+        with self._cond:
+            self.retry_denied_count += 1
+            if self.retry_denied_count == 1:
+                logger.warning(f"全局重试预算已用尽（{self.retry_count} 次重试），后续失败的请求不再重试")
+        return False
+
+    def record_success(self):
+        """请求得到了服务器的正常响应"""
+        if not self.enabled:
+            return
+        with self._cond:
+            self.outcomes.append(True)
+            if self.state == HALF_OPEN and self.probe_thread == threading.get_ident():
+                self.state = CLOSED
+                self.probe_thread = None
+                self.open_duration = self.base_open_duration
+                self.outcomes.clear()
+                logger.info("探测请求成功，熔断恢复")
+                self._cond.notify_all()
+
+    def record_failure(self):
+        """请求失败（连接错误、超时或403/429/5xx）"""
+        if not self.enabled:
+            return
+        with self._cond:
+            self.outcomes.append(False)
+            if self.state == HALF_OPEN and self.probe_thread == threading.get_ident():
+                # 探测失败，延长下一次熔断时间
+                self.open_duration = min(self.open_duration * 2, self.max_open_duration)
+                self._trip()
+            elif self.state == CLOSED and len(self.outcomes) >= self.min_requests:
+                error_rate = self.outcomes.count(False) / len(self.outcomes)
+                if error_rate >= self.error_threshold:
+                    logger.warning(f"最近 {len(self.outcomes)} 个请求错误率 {error_rate:.0%}，熔断 {self.open_duration} 秒")
+                    self._trip()
+
+    def _trip(self):
+        """进入熔断状态（调用方已持有锁）"""
+        self.state = OPEN
+        self.probe_thread = None
+        self.open_until = time.monotonic() + self.open_duration
+        self.trip_count += 1
+        self._cond.notify_all()
+
+    def get_stats(self):
+        """获取熔断统计信息"""
+        with self._cond:
+            return {
+                'circuit_state': self.state,
+                'circuit_trips': self.trip_count,
+                'circuit_wait_time': round(self.total_wait_time, 3),
+                'retries_used': self.retry_count,
+                'retries_denied': self.retry_denied_count
+            }
+
+# 全局熔断器实例
+circuit_breaker = CircuitBreaker()
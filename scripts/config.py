@@ -3,6 +3,7 @@
 宝可梦数据抓取项目配置文件
 """
 import os
+import sys
 
 # 基础路径配置
 BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -42,10 +43,89 @@ NETWORK_CONFIG = {
     'timeout': 30,
     'max_retries': 5,  # 增加重试次数
     'retry_delay': 3,  # 增加重试延迟
-    'request_delay': 2,  # 增加请求间隔
     'retry_status_codes': [403, 429, 500, 502, 503, 504],  # 添加403到重试列表
     'proxy_enabled': False,  # 暂时不使用代理
-    'session_cookies': True  # 启用session cookies
+    'session_cookies': True,  # 启用session cookies
+    'max_concurrency': 16,  # 异步抓取引擎的全局并发上限（工作线程数）
+    'per_host_concurrency': 4,  # 同一主机的最大并发请求数
+    'pool_connections': 10,  # 连接池缓存的主机数
+    'pool_maxsize': 16,  # 每个主机保持的最大keep-alive连接数，应不小于max_concurrency
+    'pool_block': False  # 连接池耗尽时是否阻塞等待空闲连接
+}
+
+# 单飞配置：同一次运行中相同URL的并发或重复请求共享一次抓取
+SINGLE_FLIGHT_CONFIG = {
+    'enabled': True,
+    'memo_size': 64  # 保留最近响应的数量（页面较大，不宜过多）
+}
+
+# 对冲请求配置（环境变量 POKE_HEDGE=1 开启）：请求耗时超过近期的p95延迟时再发一份相同请求，取先返回的结果
+HEDGE_CONFIG = {
+    'enabled': os.environ.get('POKE_HEDGE') == '1',
+    'percentile': 0.95,  # 触发对冲的延迟分位数
+    'window': 200,  # 参与统计的最近请求数
+    'min_samples': 20,  # 样本不足时不对冲
+    'min_delay': 0.5,  # 对冲等待时间下限（秒）
+    'budget': 0.05  # 对冲请求占全部请求的比例上限
+}
+
+# 文件下载配置
+DOWNLOAD_CONFIG = {
+    'chunk_size': 64 * 1024,  # 流式写入的分块大小
+    'part_suffix': '.part'  # 下载中的临时文件后缀，完成后原子重命名
+}
+
+# 网络录制/回放配置：live正常访问，record访问并归档所有响应，replay只从归档返回响应
+NETWORK_ARCHIVE_CONFIG = {
+    'mode': os.environ.get('POKE_NETWORK_MODE', 'live'),
+    'archive_dir': os.environ.get('POKE_ARCHIVE_DIR', os.path.join(BASE_PATH, '.cache', 'archive')),
+    'replay_latency': float(os.environ.get('POKE_REPLAY_LATENCY', 0)),  # 回放时每个请求的模拟延迟（秒）
+    'replay_jitter': float(os.environ.get('POKE_REPLAY_JITTER', 0))  # 在模拟延迟上叠加的随机抖动（秒）
+}
+
+# 限速配置（令牌桶 + AIMD），取代固定的请求间隔
+RATE_LIMIT_CONFIG = {
+    # 回放模式默认不限速，以测量解析与调度本身的吞吐
+    'enabled': os.environ.get('POKE_RATE_LIMIT', '0' if NETWORK_ARCHIVE_CONFIG['mode'] == 'replay' else '1') != '0',
+    'initial_rate': 0.5,  # 初始速率（请求/秒）
+    'min_rate': 0.05,  # 最低速率
+    'max_rate': 10,  # 最高速率
+    'burst': 2,  # 令牌桶容量
+    'increase_step': 0.05,  # 每次成功后增加的速率
+    'decrease_factor': 0.5,  # 收到压力信号后速率乘以该系数
+    'pressure_status_codes': [403, 429, 500, 502, 503, 504],
+    'max_retry_after': 300  # Retry-After的最长等待时间（秒）
+}
+
+# 网络指标配置：记录每个请求的耗时、字节数、重试与休眠时间，脚本结束时按URL类别汇总导出JSON
+NETWORK_METRICS_CONFIG = {
+    'enabled': os.environ.get('POKE_METRICS', '1') != '0',
+    'output_dir': os.path.join(BASE_PATH, '.cache', 'metrics'),
+    'include_records': True  # 导出时是否附带每个请求的原始记录
+}
+
+# 熔断配置：近期错误率过高时暂停所有请求，只放行一个探测请求，恢复后再继续
+CIRCUIT_BREAKER_CONFIG = {
+    'enabled': os.environ.get('POKE_CIRCUIT_BREAKER', '1') != '0',
+    'window': 50,  # 统计错误率的最近请求数
+    'min_requests': 10,  # 样本不足时不熔断
+    'error_threshold': 0.5,  # 错误率达到该值时熔断
+    'open_duration': 60,  # 熔断后首次探测前的等待时间（秒）
+    'max_open_duration': 600,  # 探测失败时等待时间翻倍，最长不超过该值
+    # 全局重试预算：整个运行期间的重试次数不超过 请求数 × ratio + min_retries
+    'retry_budget_ratio': 0.2,
+    'min_retries': 20
+}
+
+# HTTP磁盘缓存配置（命令行 --no-cache 关闭缓存，--refresh 强制全量重新下载）
+# 录制/回放时关闭缓存，保证归档中都是完整响应
+HTTP_CACHE_CONFIG = {
+    'enabled': ('--no-cache' not in sys.argv and os.environ.get('POKE_HTTP_CACHE', '1') != '0'
+                and NETWORK_ARCHIVE_CONFIG['mode'] == 'live'),
+    'refresh': '--refresh' in sys.argv,
+    'cache_dir': os.path.join(BASE_PATH, '.cache', 'http'),
+    'max_size': 2 * 1024 * 1024 * 1024,  # 2GB
+    'flush_interval': 100  # 索引累计修改多少次后写回磁盘（退出时写回剩余部分）
 }
 
 # URL配置
@@ -60,6 +140,124 @@ URLS = {
     'move_detail': lambda name: f'https://wiki.52poke.com/wiki/{name}（招式）' if name in SPECIAL_MOVES else f'https://wiki.52poke.com/wiki/{name}'
 }
 
+# 页面标题配置（用于MediaWiki API查询）
+PAGE_TITLES = {
+    'pokemon': lambda name: name,
+    'ability': lambda name: f'{name}（特性）',
+    'move': lambda name: f'{name}（招式）' if name in SPECIAL_MOVES else name
+}
+
+# MediaWiki API配置（可通过环境变量指向本地模拟服务器）
+WIKI_API_CONFIG = {
+    'api_url': os.environ.get('POKE_WIKI_API_URL', 'https://wiki.52poke.com/api.php'),
+    'index_url': os.environ.get('POKE_WIKI_INDEX_URL', 'https://wiki.52poke.com/index.php'),
+    'batch_size': 50  # 单次查询的最大标题数
+}
+
+# 页面获取配置：page为完整文章页面，parse为MediaWiki解析API（只返回正文HTML，体积更小），
+# wikitext为页面源码（按批次通过API获取，直接解析模板参数）
+PAGE_FETCH_CONFIG = {
+    'modes': {
+        'pokemon': os.environ.get('POKE_FETCH_MODE_POKEMON', 'page'),
+        'move': os.environ.get('POKE_FETCH_MODE_MOVE', 'page'),
+        'ability': os.environ.get('POKE_FETCH_MODE_ABILITY', 'page')
+    },
+    'batch_size': 50,  # 每批并发预取的页面数
+    'accept_language': 'zh-Hans',
+    'variant': 'zh-hans'
+}
+
+# 各类实体详情页面解析输出的字段（按输出顺序，不含列表页已有的名称、编号等）
+DETAIL_FIELDS = {
+    'pokemon': ('profile', 'forms', 'stats', 'flavor_texts', 'evolution_chains', 'names', 'moves', 'home_images'),
+    'move': ('effect', 'info', 'range', 'pokemon'),
+    'ability': ('effect', 'info', 'pokemon')
+}
+
+# wikitext解析配置
+WIKITEXT_CONFIG = {
+    'html_fallback': True,  # wikitext无法提供需要输出的字段时，是否在获取阶段一并获取文章页面HTML
+    # 每种实体需要输出的字段，默认与HTML解析的输出相同：源码能逐字得到的字段直接使用，其余字段只对这些字段解析HTML。
+    # 缺少字段又没有HTML时不保存（不会写出不完整的记录）；只需要部分字段时可以缩减列表，
+    # 例如只列出源码能提供的字段（单一形态宝可梦的种族值、招式的效果说明）时不再请求HTML页面
+    'fields': {entity: list(fields) for entity, fields in DETAIL_FIELDS.items()}
+}
+
+# HTML解析器配置（环境变量 POKE_PARSER 指定 lxml / html5lib / html.parser），所选解析器未安装时回退到html.parser
+PARSER_CONFIG = {
+    # lxml与html.parser在 tests/fixtures 页面上的解析结果相同（tests/test_parsers.py）
+    'backend': os.environ.get('POKE_PARSER', 'lxml'),
+    # 详情页面只构建正文部分（div.mw-parser-output）的DOM，html5lib不支持部分解析
+    'partial': os.environ.get('POKE_PARTIAL_PARSE', '1') != '0',
+    'content_class': 'mw-parser-output',
+    # 宝可梦招式表使用lxml XPath快速提取（POKE_FAST_LEARNSETS=0 关闭），仅在解析器为lxml时生效
+    'fast_learnsets': os.environ.get('POKE_FAST_LEARNSETS', '1') != '0'
+}
+
+# 详情页面预处理配置（环境变量 POKE_PRUNE=0 关闭）：解析前去除脚本、样式和注释，解析后移除提取用不到的节点
+PRUNE_CONFIG = {
+    'enabled': os.environ.get('POKE_PRUNE', '1') != '0',
+    # 以下两项会改变提取结果（单元格中的角标文本、隐藏的排序键等会消失），默认关闭
+    'hidden': False,  # 行内样式为display:none的元素
+    'references': False,  # 参考文献角标（sup.reference）
+    'navboxes': True  # 页面底部的导航框，没有提取函数读取
+}
+
+# 增量更新配置（命令行 --incremental 开启），按页面修订版本号判断是否需要重新抓取
+INCREMENTAL_CONFIG = {
+    'enabled': '--incremental' in sys.argv or os.environ.get('POKE_INCREMENTAL') == '1',
+    'revid_suffix': '.revid'  # 修订版本号保存在输出JSON旁的同名文件中
+}
+
+# 抓取队列配置，记录每个详情页面的抓取状态，中断后重新运行会从断点继续
+CRAWL_FRONTIER_CONFIG = {
+    'db_path': os.path.join(BASE_PATH, '.cache', 'frontier.sqlite3'),
+    'slowest_count': 10,  # 结束时报告耗时最长的页面数
+    # 失败的页面不在原地反复重试，而是在主流程结束后冷却一段时间再统一重试
+    # 主流程中单个页面的即时请求次数（含首次请求）；传输层不另外重试，
+    # 单个页面在原地最多阻塞 inline_retries 次超时加上其间的重试等待
+    'inline_retries': 2,
+    'max_attempts': 4,  # 每个条目最多抓取次数（含延后重试，解析失败不重试），用尽后记为最终失败
+    'retry_cool_down': 30  # 每轮延后重试前的冷却时间（秒）
+}
+
+# 解析结果缓存配置（命令行 --no-cache 或环境变量 POKE_PARSE_CACHE=0 关闭）：
+# 页面内容、提取器版本和解析设置（PARSER_CONFIG、PRUNE_CONFIG）都没变时直接使用上次的解析结果；
+# 回放模式默认关闭，以测量解析本身的吞吐
+PARSE_CACHE_CONFIG = {
+    'enabled': ('--no-cache' not in sys.argv and os.environ.get(
+        'POKE_PARSE_CACHE', '0' if NETWORK_ARCHIVE_CONFIG['mode'] == 'replay' else '1') != '0'),
+    'cache_dir': os.path.join(BASE_PATH, '.cache', 'parse'),
+    'max_size': 512 * 1024 * 1024  # 512MB，每轮抓取结束后按最近访问时间淘汰
+}
+
+# 各类实体提取器的版本号：修改提取逻辑导致输出变化时加1，只使该类实体的解析缓存失效
+EXTRACTOR_VERSIONS = {
+    'pokemon': 1,
+    'move': 1,
+    'ability': 1
+}
+
+# 提取函数性能分析配置（环境变量 POKE_PROFILE=1 开启）：记录宝可梦页面各提取函数每次调用的耗时、CPU时间和内存分配，
+# 运行结束时输出汇总表和耗时异常的调用；未开启时不包装函数，没有额外开销
+PROFILE_CONFIG = {
+    'enabled': os.environ.get('POKE_PROFILE') == '1',
+    # tracemalloc会明显拖慢解析，POKE_PROFILE_MEMORY=0 时只记录时间
+    'memory': os.environ.get('POKE_PROFILE_MEMORY', '1') != '0',
+    'outlier_count': 10,  # 输出耗时异常的调用数上限
+    'outlier_ratio': 3  # 耗时超过同一函数中位数的倍数时记为异常
+}
+
+# 详情抓取流水线配置：获取、解析、写入分阶段进行，解析在进程池中并行
+PIPELINE_CONFIG = {
+    # 解析进程数，默认为CPU核数；为0时在本进程内解析
+    'parse_workers': int(os.environ.get('POKE_PARSE_WORKERS', os.cpu_count() or 1)),
+    # 子进程启动方式：获取线程运行时fork进程可能继承被占用的锁，默认使用spawn
+    'start_method': os.environ.get('POKE_PARSE_START_METHOD', 'spawn'),
+    'parse_queue_size': 64,  # 等待解析的页面数上限
+    'write_queue_size': 32  # 正在解析和等待写入的页面数上限
+}
+
 # 特殊招式列表（需要特殊URL处理）
 SPECIAL_MOVES = ['灼热暴冲', '黑暗暴冲', '剧毒暴冲', '格斗暴冲', '魔法暴冲']
 
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+持久化抓取队列模块
+基于SQLite记录每个待抓取页面的状态、尝试次数、错误和耗时，进程被中断后可以从断点继续
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import CRAWL_FRONTIER_CONFIG
+
+# 条目状态
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    entity TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    revid INTEGER,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    retryable INTEGER NOT NULL DEFAULT 1,
+    last_error TEXT,
+    seq INTEGER NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    fetch_time REAL,
+    parse_time REAL,
+    PRIMARY KEY (entity, key)
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (entity, state, seq);
+"""
+
+class CrawlFrontier:
+    """SQLite持久化的抓取队列"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or CRAWL_FRONTIER_CONFIG['db_path']
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        # 旧版本创建的数据库没有retryable列
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(items)')}
+        if 'retryable' not in columns:
+            self._conn.execute('ALTER TABLE items ADD COLUMN retryable INTEGER NOT NULL DEFAULT 1')
+        self._lock = threading.Lock()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def has_unfinished(self, entity, max_attempts=None):
+        """
+        是否存在未完成的条目
+
+        Args:
+            entity: 实体类型
+            max_attempts: 给定时，可以重试且尝试次数未用尽的失败条目也算未完成
+
+        Returns:
+            bool: 存在待抓取、抓取中（或仍可重试）的条目
+        """
+        rows = self._execute(
+            'SELECT COUNT(*) FROM items WHERE entity = ? '
+            'AND (state IN (?, ?) OR (state = ? AND retryable = 1 AND attempts < ?))',
+            (entity, PENDING, IN_FLIGHT, FAILED, max_attempts or 0)
+        )
+        return rows[0][0] > 0
+
+    def reset(self, entity, entries):
+        """
+        清空实体的队列并重新加入条目（新一轮抓取）
+
+        Args:
+            entity: 实体类型
+            entries: (key, payload, revid) 列表
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.execute('DELETE FROM items WHERE entity = ?', (entity,))
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO items (entity, key, payload, revid, state, seq, enqueued_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (entity, key, json.dumps(payload, ensure_ascii=False), revid, PENDING, seq, now)
+                        for seq, (key, payload, revid) in enumerate(entries)
+                    ]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def recover(self, entity):
+        """
+        把上次中断时处于抓取中的条目恢复为待抓取
+
+        Returns:
+            int: 恢复的条目数
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE items SET state = ? WHERE entity = ? AND state = ?',
+                (PENDING, entity, IN_FLIGHT)
+            )
+            return cursor.rowcount
+
+    def requeue_failed(self, entity, max_attempts):
+        """
+        把可以重试且尝试次数未用尽的失败条目放回待抓取
+
+        Returns:
+            int: 重新排队的条目数
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE items SET state = ? WHERE entity = ? AND state = ? AND retryable = 1 AND attempts < ?',
+                (PENDING, entity, FAILED, max_attempts)
+            )
+            return cursor.rowcount
+
+    def pending(self, entity):
+        """
+        获取待抓取的条目（按加入顺序）
+
+        Returns:
+            list: (key, payload, revid) 列表
+        """
+        rows = self._execute(
+            'SELECT key, payload, revid FROM items WHERE entity = ? AND state = ? ORDER BY seq',
+            (entity, PENDING)
+        )
+        return [(key, json.loads(payload), revid) for key, payload, revid in rows]
+
+    def start(self, entity, keys):
+        """标记条目开始抓取"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE items SET state = ?, attempts = attempts + 1, started_at = ? WHERE entity = ? AND key = ?',
+                [(IN_FLIGHT, now, entity, key) for key in keys]
+            )
+
+    def complete(self, entity, key, fetch_time=None, parse_time=None):
+        """标记条目抓取完成并记录耗时"""
+        self._execute(
+            'UPDATE items SET state = ?, finished_at = ?, fetch_time = ?, parse_time = ?, last_error = NULL '
+            'WHERE entity = ? AND key = ?',
+            (DONE, time.time(), fetch_time, parse_time, entity, key)
+        )
+
+    def fail(self, entity, key, error, fetch_time=None, parse_time=None, retryable=True):
+        """
+        标记条目抓取失败并记录错误
+
+        Args:
+            retryable: 为False时（重试也不会改变结果的失败，如解析错误）不再重新排队
+        """
+        self._execute(
+            'UPDATE items SET state = ?, finished_at = ?, fetch_time = ?, parse_time = ?, last_error = ?, retryable = ? '
+            'WHERE entity = ? AND key = ?',
+            (FAILED, time.time(), fetch_time, parse_time, str(error), int(retryable), entity, key)
+        )
+
+    def counts(self, entity):
+        """
+        按状态统计条目数
+
+        Returns:
+            dict: 状态 -> 条目数
+        """
+        rows = self._execute('SELECT state, COUNT(*) FROM items WHERE entity = ? GROUP BY state', (entity,))
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def failures(self, entity):
+        """
+        获取失败的条目
+
+        Returns:
+            list: (key, attempts, last_error) 列表
+        """
+        return self._execute(
+            'SELECT key, attempts, last_error FROM items WHERE entity = ? AND state = ? ORDER BY seq',
+            (entity, FAILED)
+        )
+
+    def retried(self, entity):
+        """
+        获取经过重试才成功的条目
+
+        Returns:
+            list: (key, attempts) 列表
+        """
+        return self._execute(
+            'SELECT key, attempts FROM items WHERE entity = ? AND state = ? AND attempts > 1 ORDER BY seq',
+            (entity, DONE)
+        )
+
+    def slowest(self, entity, limit=10):
+        """
+        获取耗时最长的条目
+
+        Returns:
+            list: (key, fetch_time, parse_time) 列表，按总耗时降序
+        """
+        return self._execute(
+            'SELECT key, fetch_time, parse_time FROM items '
+            'WHERE entity = ? AND finished_at IS NOT NULL '
+            'ORDER BY IFNULL(fetch_time, 0) + IFNULL(parse_time, 0) DESC LIMIT ?',
+            (entity, limit)
+        )
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+详情页面抓取流程
+宝可梦、招式、特性的详情抓取共用：筛选需要抓取的条目写入抓取队列，按批次预取页面、在进程池中解析并保存，
+失败的条目在主流程结束后延后重试，进程中断后重新运行会从队列中未完成的条目继续
+"""
+import os
+
+from config import CRAWL_FRONTIER_CONFIG, INCREMENTAL_CONFIG, PAGE_TITLES
+from crawl_frontier import CrawlFrontier
+from html_pruner import get_prune_stats
+from logger_utils import get_logger
+from parse_cache import parse_cache
+from pipeline import CrawlPipeline
+from rate_limiter import rate_limiter
+from utils import file_exists, should_skip_by_revid
+from wiki_api import get_latest_revids
+
+logger = get_logger(__name__)
+
+def get_item_key(file_path):
+    """队列中条目的键（输出文件名，不含扩展名）"""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+def plan_items(entity, items, file_path_fn):
+    """
+    筛选需要抓取的条目
+
+    Args:
+        entity: 实体类型
+        items: 列表页得到的全部条目
+        file_path_fn: 条目 -> 输出文件路径
+
+    Returns:
+        list: (键, 条目, 最新revid) 列表
+    """
+    title_fn = PAGE_TITLES[entity]
+    incremental = INCREMENTAL_CONFIG['enabled']
+    revids = get_latest_revids([title_fn(item['name']) for item in items]) if incremental else {}
+
+    entries = []
+    for item in items:
+        file_path = file_path_fn(item)
+        revid = revids.get(title_fn(item['name']))
+        if incremental and should_skip_by_revid(file_path, revid):
+            logger.debug(f"{item['name']} 未修改, 跳过")
+            continue
+        if not incremental and file_exists(file_path):
+            logger.debug(f"{item['name']} 已存在, 跳过")
+            continue
+        entries.append((get_item_key(file_path), item, revid))
+
+    logger.info(f"{entity}: 共 {len(items)} 个条目，需要抓取 {len(entries)} 个")
+    return entries
+
+def run_detail_crawl(entity, items, file_path_fn, crawl_fn, frontier=None):
+    """
+    抓取详情页面
+
+    主流程中获取失败的条目不在原地反复重试，主流程结束后冷却一段时间，再按轮次重试，
+    直到成功或尝试次数用尽；解析失败的条目重试也不会改变结果，直接记为最终失败
+
+    Args:
+        entity: 实体类型（pokemon/move/ability）
+        items: 列表页得到的全部条目
+        file_path_fn: 条目 -> 输出文件路径
+        crawl_fn: (条目, 页面内容) -> 详情数据，失败时返回None或抛出异常；
+            需要是模块顶层函数，才能交给解析进程
+        frontier: 抓取队列，默认使用配置中的数据库
+
+    Returns:
+        dict: 各状态的条目数
+    """
+    frontier = frontier or CrawlFrontier()
+    max_attempts = CRAWL_FRONTIER_CONFIG['max_attempts']
+
+    if frontier.has_unfinished(entity, max_attempts):
+        recovered = frontier.recover(entity)
+        logger.info(f"继续上次未完成的{entity}抓取，{recovered} 个中断时正在抓取的条目重新排队")
+    else:
+        frontier.reset(entity, plan_items(entity, items, file_path_fn))
+
+    crawl_pending(frontier, entity, file_path_fn, crawl_fn)
+
+    # 延后重试
+    while True:
+        requeued = frontier.requeue_failed(entity, max_attempts)
+        if not requeued:
+            break
+        cool_down = CRAWL_FRONTIER_CONFIG['retry_cool_down']
+        logger.info(f"{requeued} 个{entity}条目失败，冷却 {cool_down} 秒后重试")
+        rate_limiter.sleep(cool_down)
+        crawl_pending(frontier, entity, file_path_fn, crawl_fn)
+
+    if parse_cache.enabled:
+        parse_cache.evict()
+    return report(frontier, entity)
+
+def crawl_pending(frontier, entity, file_path_fn, crawl_fn):
+    """抓取队列中所有待抓取的条目（获取、解析、写入分阶段进行），结果记入队列"""
+    return CrawlPipeline(frontier, entity, file_path_fn, crawl_fn).run()
+
+def report(frontier, entity):
+    """输出抓取结果：重试后成功的条目、最终失败的条目和耗时最长的页面"""
+    counts = frontier.counts(entity)
+    retried = frontier.retried(entity)
+    failures = frontier.failures(entity)
+    logger.info(
+        f"{entity}抓取结束: 完成 {counts['done']}（其中重试后成功 {len(retried)}），"
+        f"最终失败 {counts['failed']}，未完成 {counts['pending'] + counts['in_flight']}"
+    )
+    if retried:
+        logger.info("重试后成功:")
+        for key, attempts in retried:
+            logger.info(f"  {key}（尝试 {attempts} 次）")
+    if failures:
+        logger.error("最终失败:")
+        for key, attempts, error in failures:
+            logger.error(f"  {key}（尝试 {attempts} 次）: {error}")
+
+    prune = get_prune_stats()
+    if prune['pruned_pages']:
+        logger.info(f"页面预处理: {prune['pruned_pages']} 个页面，去除 {prune['pruned_bytes']} 字节、{prune['pruned_nodes']} 个节点")
+
+    cache = parse_cache.get_stats()
+    if cache['parse_cache_hits'] or cache['parse_cache_misses']:
+        logger.info(
+            f"解析缓存: 命中 {cache['parse_cache_hits']}，未命中 {cache['parse_cache_misses']}，"
+            f"淘汰 {cache['parse_cache_evictions']}"
+        )
+
+    slowest = frontier.slowest(entity, CRAWL_FRONTIER_CONFIG['slowest_count'])
+    if slowest:
+        logger.info("耗时最长的页面（获取 / 解析，秒）:")
+        for key, fetch_time, parse_time in slowest:
+            logger.info(f"  {key}: {fetch_time or 0:.2f} / {parse_time or 0:.2f}")
+    return counts
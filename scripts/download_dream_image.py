@@ -1,6 +1,7 @@
 import math
-from bs4 import BeautifulSoup
 import requests
+from network_utils import safe_request
+from parser_utils import make_soup
 from utils import save_image
 
 TOTAL_PAGE = math.floor(1371 / 200) + 1
@@ -12,17 +13,21 @@ page = 1
 def get_name(el):
   return el.find('div', class_="gallerytext").find('a').text.strip().replace(' ', '_')
 
-def get_all(last_item):
-  full_url = URL if last_item is None else f'{URL}&filefrom={last_item}'
-  response = requests.get(full_url)
-  response.raise_for_status()
-  soup = BeautifulSoup(response.text, "html.parser")
+def parse_gallery(html):
+  """返回分类页中每张图片的(名称, 图片地址)"""
+  soup = make_soup(html)
 
   one_page_ul = soup.find('ul', class_="gallery")
   image_li_list = one_page_ul.find_all('li', class_="gallerybox")
-  for el in image_li_list:
-    name = get_name(el)
-    image_url = el.find('div', class_='thumb').find('img').get('data-url')
+  return [(get_name(el), el.find('div', class_='thumb').find('img').get('data-url')) for el in image_li_list]
+
+def get_all(last_item):
+  full_url = URL if last_item is None else f'{URL}&filefrom={last_item}'
+  response = safe_request(full_url)
+  if response is None:
+    raise requests.exceptions.RequestException(f'请求失败: {full_url}')
+  images = parse_gallery(response.text)
+  for name, image_url in images:
     print(name)
     save_image(f'{PATH}{name}', f'https:{image_url}')
 
@@ -30,8 +35,7 @@ def get_all(last_item):
   print(page)
   if page < TOTAL_PAGE:
     page = page + 1
-    last_li = image_li_list[len(image_li_list) - 1]
-    name = get_name(last_li)
+    name = images[len(images) - 1][0]
     get_all(name)
 
 if __name__ == '__main__':
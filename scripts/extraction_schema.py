@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+声明式字段提取模块
+每个字段声明一次：锚点（CSS选择器或文本条件）、相对锚点的路径和后处理。
+选择器在导入时编译，提取时只遍历一次作用范围内的节点来定位所有字段的锚点
+"""
+import re
+
+import soupsieve
+from bs4 import NavigableString, Tag
+
+# 后处理返回该值时不输出字段
+SKIP = object()
+_MISSING = object()
+
+TAG_NAME_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)(?=[.#\[:]|$)')
+
+def text_strip(element):
+    """元素文本（去除首尾空白）"""
+    return element.text.strip()
+
+def li_texts(element):
+    """元素内所有li的文本列表"""
+    return [li.text.strip() for li in element.find_all('li')]
+
+def contains(keyword):
+    """文本条件：文本节点包含关键字"""
+    return lambda text: keyword in text if text else False
+
+def equals(value):
+    """文本条件：文本节点与值完全相同"""
+    return lambda text: text == value
+
+class Field:
+    """字段定义"""
+
+    def __init__(self, name, selector=None, text=None, path=None, process=None, default=_MISSING, required=False):
+        """
+        Args:
+            name: 输出字段名
+            selector: 锚点的CSS选择器（取作用范围内第一个匹配的元素）
+            text: 锚点的文本条件（取第一个满足条件的文本节点）
+            path: (锚点, 作用范围) -> 值所在的节点，默认为锚点本身
+            process: 节点 -> 字段值，返回SKIP时不输出字段
+            default: 找不到锚点时输出的值，不指定时不输出字段
+            required: 找不到锚点时抛出异常
+        """
+        self.name = name
+        self.selector = soupsieve.compile(selector) if selector else None
+        # 按标签名预先过滤，减少选择器匹配次数
+        match = TAG_NAME_RE.match(selector) if selector and ',' not in selector else None
+        self.tag_name = match.group(1).lower() if match else None
+        self.text = text
+        self.path = path
+        self.process = process
+        self.default = default
+        self.required = required
+
+    def matches(self, node):
+        """节点是否为该字段的锚点"""
+        if isinstance(node, Tag):
+            if self.selector is None or (self.tag_name and node.name != self.tag_name):
+                return False
+            return self.selector.match(node)
+        return self.text is not None and self.text(node)
+
+class Schema:
+    """字段定义的集合，按声明顺序输出"""
+
+    def __init__(self, *fields):
+        self.fields = fields
+        self.has_text_fields = any(field.text is not None for field in fields)
+
+    def find_anchors(self, scope):
+        """
+        遍历一次作用范围，定位所有字段的锚点
+
+        Args:
+            scope: 作用范围（Tag）
+
+        Returns:
+            dict: 字段名 -> 锚点
+        """
+        anchors = {}
+        pending = list(self.fields)
+        for node in scope.descendants:
+            if not isinstance(node, Tag) and not (self.has_text_fields and isinstance(node, NavigableString)):
+                continue
+            matched = [field for field in pending if field.matches(node)]
+            if matched:
+                for field in matched:
+                    anchors[field.name] = node
+                pending = [field for field in pending if field not in matched]
+                if not pending:
+                    break
+        return anchors
+
+    def extract(self, scope):
+        """
+        提取字段
+
+        Args:
+            scope: 作用范围（Tag）
+
+        Returns:
+            list: (字段名, 值) 列表，按声明顺序
+        """
+        anchors = self.find_anchors(scope)
+        values = []
+        for field in self.fields:
+            anchor = anchors.get(field.name)
+            if anchor is None:
+                if field.required:
+                    raise ValueError(f"页面中找不到字段: {field.name}")
+                if field.default is not _MISSING:
+                    values.append((field.name, field.default))
+                continue
+            node = field.path(anchor, scope) if field.path else anchor
+            value = field.process(node) if field.process else node
+            if value is not SKIP:
+                values.append((field.name, value))
+        return values
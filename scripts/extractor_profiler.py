@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+提取函数性能分析模块（环境变量 POKE_PROFILE=1 开启）
+记录每个页面中各提取函数每次调用的耗时、本线程CPU时间和内存分配峰值（tracemalloc），
+运行结束时输出按函数汇总的表格和耗时明显高于同一函数中位数的调用。
+未开启时装饰器直接返回原函数，不产生任何额外开销。
+tracemalloc的峰值是进程级别的，在本进程内解析（parse_workers=0）时会计入获取线程的分配
+"""
+import atexit
+import functools
+import multiprocessing
+import threading
+import time
+import tracemalloc
+import unicodedata
+
+from config import PROFILE_CONFIG
+from logger_utils import get_logger
+from network_metrics import percentile
+
+logger = get_logger(__name__)
+
+# 每个线程当前所在的页面和正在测量内存的调用栈
+_local = threading.local()
+
+# 以页面为单位的函数名（汇总时作为占比的基准）
+_page_functions = set()
+
+class ExtractorProfiler:
+    """提取函数调用记录（线程安全）"""
+
+    def __init__(self, enabled=None, memory=None):
+        self.enabled = PROFILE_CONFIG['enabled'] if enabled is None else enabled
+        self.memory = PROFILE_CONFIG['memory'] if memory is None else memory
+        # (页面, 函数名, 耗时, CPU时间, 内存分配峰值)，未测量内存时峰值为None
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, page, name, wall_time, cpu_time, memory):
+        with self._lock:
+            self.records.append((page, name, wall_time, cpu_time, memory))
+
+    def measure(self, func, args, kwargs):
+        """调用函数并记录耗时和内存分配"""
+        stack = None
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            stack = getattr(_local, 'stack', None)
+            if stack is None:
+                stack = _local.stack = []
+            # [调用前已分配的内存, 内层调用期间的最高峰值]；内层调用会重置峰值，退出时把峰值交给外层
+            current, _ = tracemalloc.get_traced_memory()
+            stack.append([current, current])
+            tracemalloc.reset_peak()
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            wall_time = time.perf_counter() - wall_started
+            cpu_time = time.thread_time() - cpu_started
+            memory = None
+            if stack is not None:
+                _, peak = tracemalloc.get_traced_memory()
+                baseline, nested_peak = stack.pop()
+                peak = max(peak, nested_peak)
+                memory = peak - baseline
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], peak)
+            self.add(getattr(_local, 'page', None), func.__name__, wall_time, cpu_time, memory)
+
+    def merge(self, stats):
+        """合并其他进程的记录（get_stats()的结果）"""
+        with self._lock:
+            self.records.extend(stats['profile_records'])
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+
+    def get_stats(self):
+        with self._lock:
+            return {'profile_records': list(self.records)}
+
+    def summarize(self):
+        """
+        按函数汇总
+
+        Returns:
+            list: 每个函数的统计字典，按总耗时降序
+        """
+        with self._lock:
+            records = list(self.records)
+        grouped = {}
+        for record in records:
+            grouped.setdefault(record[1], []).append(record)
+
+        summary = []
+        for name, items in grouped.items():
+            wall_times = sorted(item[2] for item in items)
+            memories = [item[4] for item in items if item[4] is not None]
+            summary.append({
+                'name': name,
+                'calls': len(items),
+                'wall_total': sum(wall_times),
+                'wall_p50': percentile(wall_times, 50),
+                'wall_p95': percentile(wall_times, 95),
+                'cpu_total': sum(item[3] for item in items),
+                'memory_mean': sum(memories) / len(memories) if memories else None,
+                'memory_max': max(memories) if memories else None
+            })
+        summary.sort(key=lambda item: item['wall_total'], reverse=True)
+        return summary
+
+    def get_outliers(self, count=None, ratio=None):
+        """
+        耗时异常的调用：超过同一函数耗时中位数的ratio倍
+
+        Returns:
+            list: (页面, 函数名, 耗时, CPU时间, 内存分配峰值, 相对中位数的倍数)，按倍数降序
+        """
+        count = count or PROFILE_CONFIG['outlier_count']
+        ratio = ratio or PROFILE_CONFIG['outlier_ratio']
+        medians = {item['name']: item['wall_p50'] for item in self.summarize()}
+        with self._lock:
+            records = list(self.records)
+        outliers = []
+        for record in records:
+            median = medians[record[1]]
+            if median and record[2] > median * ratio:
+                outliers.append((*record, record[2] / median))
+        outliers.sort(key=lambda item: item[5], reverse=True)
+        return outliers[:count]
+
+    def report(self):
+        """输出汇总表和耗时异常的调用"""
+        summary = self.summarize()
+        if not summary:
+            return
+        # 页面函数的总耗时作为占比的基准，没有页面记录时以所有提取函数之和为基准
+        pages = [item for item in summary if item['name'] in _page_functions]
+        base = sum(item['wall_total'] for item in pages) or sum(item['wall_total'] for item in summary)
+
+        headers = (('函数', -28), ('调用', 7), ('总耗时(s)', 11), ('占比', 8), ('p50(ms)', 10), ('p95(ms)', 10),
+                   ('CPU(s)', 9), ('平均内存(KB)', 14), ('最大内存(KB)', 14))
+        lines = [''.join(pad(text, width) for text, width in headers)]
+        for item in summary:
+            lines.append(
+                f"{item['name']:<28}{item['calls']:>7}{item['wall_total']:>11.3f}"
+                f"{item['wall_total'] / base:>8.1%}{item['wall_p50'] * 1000:>10.2f}{item['wall_p95'] * 1000:>10.2f}"
+                f"{item['cpu_total']:>9.3f}{format_kb(item['memory_mean']):>14}{format_kb(item['memory_max']):>14}"
+            )
+        logger.info("提取函数性能统计:\n" + '\n'.join(lines))
+
+        outliers = self.get_outliers()
+        if outliers:
+            lines = [
+                f"  {page or '-'} {name}: {wall_time * 1000:.2f}ms（中位数的{times:.1f}倍），"
+                f"CPU {cpu_time * 1000:.2f}ms，内存 {format_kb(memory)}KB"
+                for page, name, wall_time, cpu_time, memory, times in outliers
+            ]
+            logger.info("耗时异常的调用:\n" + '\n'.join(lines))
+
+def pad(text, width):
+    """按显示宽度补齐（中文字符占两列），width为负数时左对齐"""
+    fill = ' ' * max(0, abs(width) - sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text))
+    return text + fill if width < 0 else fill + text
+
+def format_kb(size):
+    return '-' if size is None else f'{size / 1024:.1f}'
+
+# 全局性能分析实例
+extractor_profiler = ExtractorProfiler()
+
+def profile_extractor(func):
+    """装饰器：记录提取函数每次调用的耗时和内存分配，未开启时返回原函数"""
+    if not extractor_profiler.enabled:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return extractor_profiler.measure(func, args, kwargs)
+    return wrapper
+
+def profile_page(page_arg):
+    """
+    装饰器：标记页面解析函数，其中调用的提取函数记在该页面下，未开启时返回原函数
+
+    Args:
+        page_arg: 页面名称是第几个位置参数
+    """
+    def decorator(func):
+        if not extractor_profiler.enabled:
+            return func
+        _page_functions.add(func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            previous = getattr(_local, 'page', None)
+            _local.page = args[page_arg]
+            try:
+                return extractor_profiler.measure(func, args, kwargs)
+            finally:
+                _local.page = previous
+        return wrapper
+    return decorator
+
+def _report_at_exit():
+    # 解析进程的记录已合并到主进程，只在主进程输出
+    if multiprocessing.parent_process() is not None:
+        return
+    try:
+        extractor_profiler.report()
+    except Exception as e:
+        logger.warning(f"输出提取函数性能统计失败: {e}")
+
+if extractor_profiler.enabled:
+    atexit.register(_report_at_exit)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+异步抓取引擎模块
+基于asyncio的并发抓取，按主机限制并发数，底层复用NetworkManager的重试与退避逻辑；
+开启对冲时，发出后耗时超过近期p95延迟的请求会再发一份，取先成功返回的结果；
+对冲请求同样占用主机的并发名额，落后的请求在线程中结束前一直占用自己的名额
+"""
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from config import NETWORK_CONFIG
+from hedge_policy import hedge_policy
+from logger_utils import get_logger
+from network_utils import network_manager
+from parser_utils import make_soup
+
+logger = get_logger(__name__)
+
+class AsyncFetchEngine:
+    """异步抓取引擎"""
+
+    def __init__(self, manager=None, max_concurrency=None, per_host_concurrency=None, hedge=None):
+        self.manager = manager or network_manager
+        self.hedge_policy = hedge or hedge_policy
+        self.manager.register_stats(self.hedge_policy.get_stats)
+        self.max_concurrency = max_concurrency or NETWORK_CONFIG['max_concurrency']
+        self.per_host_concurrency = per_host_concurrency or NETWORK_CONFIG['per_host_concurrency']
+        # requests是阻塞的，放到线程池中执行，由信号量控制每个主机的并发
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix='fetch'
+        )
+        # 信号量与事件循环绑定，按事件循环分别维护
+        self._host_semaphores = weakref.WeakKeyDictionary()
+        # 仍在线程中执行的请求（事件循环 -> 任务集合），包括对冲落后、已不再被等待的请求
+        self._in_flight = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self, url):
+        """获取URL所属主机的信号量"""
+        loop = asyncio.get_running_loop()
+        semaphores = self._host_semaphores.setdefault(loop, {})
+        host = urlsplit(url).netloc
+        if host not in semaphores:
+            semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return semaphores[host]
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """在引擎的线程池中执行阻塞函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def fetch(self, url, headers=None, **kwargs):
+        """
+        异步请求单个URL
+
+        Args:
+            url: 请求URL
+            headers: 请求头
+            **kwargs: 透传给NetworkManager.safe_request的参数
+
+        Returns:
+            requests.Response对象或None
+        """
+        semaphore = self._get_semaphore(url)
+        await semaphore.acquire()
+        if not self.hedge_policy.enabled:
+            try:
+                return await self.run_blocking(self.manager.safe_request, url, headers, **kwargs)
+            finally:
+                semaphore.release()
+        return await self._fetch_hedged(url, headers, semaphore, **kwargs)
+
+    def _start_request(self, semaphore, url, headers, **kwargs):
+        """
+        在线程中发出请求，请求结束时释放它占用的主机并发名额（调用方已获取名额）
+
+        Returns:
+            asyncio.Future: 请求任务
+        """
+        in_flight = self._in_flight.setdefault(asyncio.get_running_loop(), set())
+        task = asyncio.ensure_future(self.run_blocking(self.manager.safe_request, url, headers, **kwargs))
+        in_flight.add(task)
+
+        def on_done(task):
+            _discard_result(task)
+            in_flight.discard(task)
+            semaphore.release()
+
+        task.add_done_callback(on_done)
+        return task
+
+    async def _fetch_hedged(self, url, headers, semaphore, **kwargs):
+        """
+        请求URL，发出后耗时超过对冲等待时间时再发一份相同请求，返回先成功的结果
+
+        Args:
+            semaphore: 主机的信号量，原请求的名额已由调用方获取
+        """
+        policy = self.hedge_policy
+        policy.on_request()
+        loop = asyncio.get_running_loop()
+        # 原请求通过熔断器和限速器、真正发出时置位，对冲计时从这里开始
+        sent = asyncio.Event()
+        primary = self._start_request(
+            semaphore, url, headers, on_send=lambda: loop.call_soon_threadsafe(sent.set), **kwargs
+        )
+        tasks = {primary}
+
+        delay = policy.hedge_delay()
+        if delay is not None and await self._wait_sent(primary, sent):
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            # 对冲请求也占用一个主机并发名额，名额已满（或有请求在排队）时不对冲
+            if not done and not semaphore.locked() and policy.try_acquire():
+                await semaphore.acquire()
+                logger.debug(f"请求发出后超过 {delay:.2f} 秒，发出对冲请求: {url}")
+                # 对冲请求不能与原请求合并，否则只会等待同一次抓取
+                tasks.add(self._start_request(semaphore, url, headers, **{**kwargs, 'dedupe': False}))
+
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None or task.result() is None:
+                    continue
+                response = task.result()
+                if task is not primary:
+                    policy.on_win()
+                # 只统计HTTP请求本身的耗时（response.elapsed），不含限速器和熔断器的等待；缓存的响应不计入
+                if not getattr(response, 'from_cache', False):
+                    policy.record_latency(response.elapsed.total_seconds())
+                return response
+        if primary.exception() is not None:
+            raise primary.exception()
+        return None
+
+    async def _wait_sent(self, primary, sent):
+        """
+        等待原请求真正发出
+
+        Returns:
+            bool: 原请求已发出且尚未结束（请求直接结束或与进行中的相同请求合并时返回False）
+        """
+        waiter = asyncio.ensure_future(sent.wait())
+        try:
+            await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        return sent.is_set() and not primary.done()
+
+    async def fetch_many(self, urls, headers=None, **kwargs):
+        """
+        并发请求多个URL
+
+        Args:
+            urls: URL列表
+            headers: 请求头
+            **kwargs: 透传给NetworkManager.safe_request的参数
+
+        Returns:
+            list: 与urls顺序一致的响应列表，失败项为None
+        """
+        tasks = [self.fetch(url, headers, **kwargs) for url in urls]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 事件循环关闭后落后的请求仍会在线程中运行，却不再计入任何并发名额，返回前等待它们结束
+        in_flight = self._in_flight.get(asyncio.get_running_loop())
+        if in_flight:
+            await asyncio.wait(set(in_flight))
+
+        responses = []
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                logger.error(f"异步请求异常: {url} - {result}")
+                result = None
+            responses.append(result)
+        return responses
+
+    async def get_soup(self, url, headers=None):
+        """
+        异步获取BeautifulSoup对象
+
+        Args:
+            url: 请求URL
+            headers: 请求头
+
+        Returns:
+            BeautifulSoup对象或None
+        """
+        response = await self.fetch(url, headers)
+        if response:
+            return make_soup(response.text)
+        return None
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=True)
+
+def _discard_result(task):
+    """读取落后请求的异常，避免asyncio报告未处理的异常"""
+    if not task.cancelled():
+        task.exception()
+
+# 全局异步抓取引擎实例
+fetch_engine = AsyncFetchEngine()
+
+async def fetch_many(urls, headers=None, **kwargs):
+    """便捷的并发请求函数"""
+    return await fetch_engine.fetch_many(urls, headers, **kwargs)
+
+async def get_soup(url, headers=None):
+    """便捷的异步获取soup对象函数"""
+    return await fetch_engine.get_soup(url, headers)
+
+def fetch_many_sync(urls, headers=None, **kwargs):
+    """同步调用并发请求，供非异步脚本批量抓取使用"""
+    return asyncio.run(fetch_engine.fetch_many(urls, headers, **kwargs))
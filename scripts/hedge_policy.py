@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+对冲请求策略模块
+统计最近请求的延迟分位数，请求耗时超过该分位数时允许再发一份相同请求（受对冲预算限制）
+"""
+import math
+import threading
+from collections import deque
+
+from config import HEDGE_CONFIG
+
+class HedgePolicy:
+    """对冲请求策略（线程安全）"""
+
+    def __init__(self, enabled=None, percentile=None, window=None, min_samples=None, min_delay=None, budget=None):
+        self.enabled = HEDGE_CONFIG['enabled'] if enabled is None else enabled
+        self.percentile = percentile or HEDGE_CONFIG['percentile']
+        self.min_samples = min_samples or HEDGE_CONFIG['min_samples']
+        self.min_delay = HEDGE_CONFIG['min_delay'] if min_delay is None else min_delay
+        self.budget = HEDGE_CONFIG['budget'] if budget is None else budget
+
+        self.latencies = deque(maxlen=window or HEDGE_CONFIG['window'])
+        self.request_count = 0
+        self.hedge_count = 0
+        self.win_count = 0
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        """记录一次请求（用于计算对冲预算）"""
+        with self._lock:
+            self.request_count += 1
+
+    def record_latency(self, seconds):
+        """记录一次成功请求的耗时"""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def hedge_delay(self):
+        """
+        获取触发对冲前的等待时间
+
+        Returns:
+            float: 等待秒数，样本不足时返回None（不对冲）
+        """
+        with self._lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return max(ordered[index], self.min_delay)
+
+    def try_acquire(self):
+        """
+        申请发出一次对冲请求
+
+        Returns:
+            bool: 对冲请求数未超过预算时返回True
+        """
+        with self._lock:
+            if self.hedge_count + 1 > self.budget * self.request_count:
+                return False
+            self.hedge_count += 1
+            return True
+
+    def on_win(self):
+        """对冲请求先于原请求返回"""
+        with self._lock:
+            self.win_count += 1
+
+    def get_stats(self):
+        """获取对冲统计信息"""
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                'hedged_requests': self.hedge_count,
+                'hedge_wins': self.win_count,
+                'hedge_delay': round(delay, 3) if delay is not None else None
+            }
+
+# 全局对冲策略实例
+hedge_policy = HedgePolicy()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+HTML预处理模块
+解析前用正则去除脚本、样式和注释，解析后移除导航框，并统计去除的字节数和节点数。
+默认只移除不会被任何提取函数读取的内容，提取结果与不预处理时相同；
+移除隐藏元素和参考文献角标会改变提取结果，需要在配置中单独开启
+"""
+import re
+import threading
+
+from config import PRUNE_CONFIG
+from logger_utils import get_logger
+from parser_utils import make_soup
+
+logger = get_logger(__name__)
+
+# 解析前整体去除的片段
+MARKUP_RE = re.compile(r'<script\b[^>]*>.*?</script\s*>|<style\b[^>]*>.*?</style\s*>|<!--.*?-->', re.S | re.I)
+
+class PruneStats:
+    """累计的预处理统计（线程安全）"""
+
+    def __init__(self):
+        self.pages = 0
+        self.bytes_dropped = 0
+        self.nodes_dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, bytes_dropped, nodes_dropped):
+        with self._lock:
+            self.pages += 1
+            self.bytes_dropped += bytes_dropped
+            self.nodes_dropped += nodes_dropped
+
+    def merge(self, stats):
+        """合并其他进程的统计（get_stats()的结果）"""
+        with self._lock:
+            self.pages += stats['pruned_pages']
+            self.bytes_dropped += stats['pruned_bytes']
+            self.nodes_dropped += stats['pruned_nodes']
+
+    def reset(self):
+        with self._lock:
+            self.pages = 0
+            self.bytes_dropped = 0
+            self.nodes_dropped = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'pruned_pages': self.pages,
+                'pruned_bytes': self.bytes_dropped,
+                'pruned_nodes': self.nodes_dropped
+            }
+
+prune_stats = PruneStats()
+
+_enabled = PRUNE_CONFIG['enabled']
+
+def set_pruning(enabled):
+    """
+    开启或关闭预处理（供对比测试使用）
+
+    Returns:
+        bool: 切换前的设置
+    """
+    global _enabled
+    previous = _enabled
+    _enabled = enabled
+    return previous
+
+def is_pruning_enabled():
+    """是否开启预处理"""
+    return _enabled
+
+def prune_markup(markup):
+    """
+    解析前去除脚本、样式和注释
+
+    Args:
+        markup: HTML文本
+
+    Returns:
+        tuple: (处理后的HTML, 去除的字节数)
+    """
+    dropped = 0
+
+    def drop(match):
+        nonlocal dropped
+        dropped += len(match.group().encode('utf8'))
+        return ''
+
+    return MARKUP_RE.sub(drop, markup), dropped
+
+def preprocess_markup(markup):
+    """
+    解析前的预处理，未开启时原样返回；同一页面需要用多个解析器构建时只处理一次
+
+    Args:
+        markup: HTML文本
+
+    Returns:
+        tuple: (处理后的HTML, 去除的字节数)
+    """
+    if not _enabled:
+        return markup, 0
+    return prune_markup(markup)
+
+def get_prune_flags():
+    """
+    当前的解析后移除规则（运行时读取配置）
+
+    Returns:
+        tuple: (隐藏元素, 参考文献角标, 导航框)
+    """
+    return PRUNE_CONFIG['hidden'], PRUNE_CONFIG['references'], PRUNE_CONFIG['navboxes']
+
+def should_prune(tag):
+    """节点是否在解析后移除"""
+    if PRUNE_CONFIG['hidden']:
+        style = tag.get('style')
+        if style and 'display:none' in style:
+            return True
+    classes = tag.get('class') or ()
+    if PRUNE_CONFIG['references'] and tag.name == 'sup' and 'reference' in classes:
+        return True
+    if PRUNE_CONFIG['navboxes'] and 'navbox' in classes:
+        return True
+    return False
+
+def prune_tree(soup):
+    """
+    移除导航框以及配置中开启的隐藏元素、参考文献角标（只遍历一次）
+
+    Args:
+        soup: BeautifulSoup对象
+
+    Returns:
+        int: 移除的节点数（含子节点）
+    """
+    targets = [tag for tag in soup.find_all(True) if should_prune(tag)]
+    removed = set()
+    dropped = 0
+    for tag in targets:
+        # 祖先已被移除的节点随祖先一起移除
+        if any(id(parent) in removed for parent in tag.parents):
+            continue
+        removed.add(id(tag))
+        dropped += 1 + len(tag.find_all(True))
+        tag.decompose()
+    return dropped
+
+def make_pruned_soup(markup, partial=True, bytes_dropped=None):
+    """
+    预处理并解析详情页面
+
+    Args:
+        markup: 页面HTML
+        partial: 是否只解析正文部分
+        bytes_dropped: markup已经过preprocess_markup处理时传入其去除的字节数，为None时在这里处理
+
+    Returns:
+        BeautifulSoup对象
+    """
+    if not _enabled:
+        return make_soup(markup, partial=partial)
+    if bytes_dropped is None:
+        markup, bytes_dropped = prune_markup(markup)
+    soup = make_soup(markup, partial=partial)
+    nodes_dropped = prune_tree(soup)
+    prune_stats.add(bytes_dropped, nodes_dropped)
+    logger.debug(f"预处理去除 {bytes_dropped} 字节、{nodes_dropped} 个节点")
+    return soup
+
+def get_prune_stats():
+    """获取累计的预处理统计"""
+    return prune_stats.get_stats()
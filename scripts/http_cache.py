@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP磁盘缓存模块
+按URL缓存响应内容及ETag/Last-Modified，发起条件请求并在304时从磁盘返回内容。
+索引在内存中维护，累计一定次数的修改（写入和命中）后整体写回磁盘，进程退出时写回剩余的修改
+"""
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import HTTP_CACHE_CONFIG
+from logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 从原始响应中保留的响应头（内容已解压，不能保留Content-Encoding）
+KEPT_HEADERS = ['Content-Type', 'ETag', 'Last-Modified']
+
+class HttpCache:
+    """基于磁盘的HTTP响应缓存，按总大小做LRU淘汰"""
+
+    def __init__(self, cache_dir=None, max_size=None, enabled=None, refresh=None, flush_interval=None):
+        self.cache_dir = cache_dir or HTTP_CACHE_CONFIG['cache_dir']
+        self.max_size = max_size or HTTP_CACHE_CONFIG['max_size']
+        self.enabled = HTTP_CACHE_CONFIG['enabled'] if enabled is None else enabled
+        # refresh模式下不发送条件请求，但仍然写入最新内容
+        self.refresh = HTTP_CACHE_CONFIG['refresh'] if refresh is None else refresh
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self.hit_count = 0
+        self.store_count = 0
+        self.evict_count = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_size = 0
+        # 上次写回索引后的修改次数
+        self._dirty = 0
+        self.flush_interval = flush_interval or HTTP_CACHE_CONFIG['flush_interval']
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+
+    def _load_index(self):
+        """加载缓存索引，按最近访问时间排序"""
+        try:
+            with open(self.index_path, 'r', encoding='utf8') as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"缓存索引损坏，将重新建立: {e}")
+            return
+
+        for url, entry in sorted(entries.items(), key=lambda item: item[1].get('last_access', 0)):
+            if os.path.exists(self._body_path(entry['key'])):
+                self._entries[url] = entry
+                self._total_size += entry['size']
+
+    def _save_index(self):
+        """原子方式写入缓存索引（调用方持有锁）"""
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf8') as file:
+            json.dump(self._entries, file, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = 0
+
+    def _mark_dirty(self):
+        """记录一次索引修改，累计到flush_interval次时写回（调用方持有锁）"""
+        self._dirty += 1
+        if self._dirty >= self.flush_interval:
+            try:
+                self._save_index()
+            except OSError as e:
+                logger.warning(f"写入缓存索引失败: {e}")
+
+    def flush(self):
+        """写回尚未保存的索引修改（包括命中时更新的最近访问时间）"""
+        with self._lock:
+            if not self.enabled or not self._dirty:
+                return
+            try:
+                self._save_index()
+            except OSError as e:
+                logger.warning(f"写入缓存索引失败: {e}")
+
+    def _body_path(self, key):
+        """缓存内容文件路径"""
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def conditional_headers(self, url):
+        """
+        获取条件请求头
+
+        Args:
+            url: 请求URL
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since 请求头，无缓存时为空
+        """
+        if not self.enabled or self.refresh:
+            return {}
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load_response(self, url):
+        """
+        从缓存构造响应对象（用于304响应）
+
+        Args:
+            url: 请求URL
+
+        Returns:
+            requests.Response对象，缓存缺失时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry:
+                return None
+            entry['last_access'] = time.time()
+            self._entries.move_to_end(url)
+            self._mark_dirty()
+
+        try:
+            with open(self._body_path(entry['key']), 'rb') as file:
+                body = file.read()
+        except OSError as e:
+            logger.warning(f"读取缓存失败: {url} - {e}")
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry.get('encoding')
+        response._content = body
+        response.from_cache = True
+
+        with self._lock:
+            self.hit_count += 1
+        logger.debug(f"缓存命中(304): {url}")
+        return response
+
+    def store(self, url, response):
+        """
+        写入缓存，只缓存带有ETag或Last-Modified的200响应
+
+        Args:
+            url: 请求URL
+            response: requests.Response对象
+        """
+        if not self.enabled or response.status_code != 200:
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        body = response.content
+        key = hashlib.sha256(url.encode('utf8')).hexdigest()
+        body_path = self._body_path(key)
+        try:
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            tmp_path = f'{body_path}.tmp'
+            with open(tmp_path, 'wb') as file:
+                file.write(body)
+            os.replace(tmp_path, body_path)
+        except OSError as e:
+            logger.warning(f"写入缓存失败: {url} - {e}")
+            return
+
+        entry = {
+            'key': key,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding,
+            'headers': {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            'size': len(body),
+            'last_access': time.time()
+        }
+        with self._lock:
+            old_entry = self._entries.pop(url, None)
+            if old_entry:
+                self._total_size -= old_entry['size']
+            self._entries[url] = entry
+            self._total_size += entry['size']
+            self.store_count += 1
+            self._evict()
+            self._mark_dirty()
+
+    def _evict(self):
+        """超过容量时淘汰最久未访问的条目（调用方持有锁）"""
+        while self._total_size > self.max_size and len(self._entries) > 1:
+            url, entry = self._entries.popitem(last=False)
+            self._total_size -= entry['size']
+            self.evict_count += 1
+            try:
+                os.remove(self._body_path(entry['key']))
+            except OSError:
+                pass
+            logger.debug(f"淘汰缓存: {url}")
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                'cache_hits': self.hit_count,
+                'cache_stores': self.store_count,
+                'cache_evictions': self.evict_count,
+                'cache_size': self._total_size
+            }
+
+# 全局HTTP缓存实例
+http_cache = HttpCache()
+
+def _flush_at_exit():
+    # 只在主进程写回：解析进程不发出请求，其中的缓存实例是未修改的副本
+    if multiprocessing.parent_process() is not None:
+        return
+    http_cache.flush()
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+宝可梦招式表快速提取模块
+招式表是宝可梦页面中最大的部分，BeautifulSoup逐行移除隐藏单元格、逐个单元格查找链接较慢。
+这里用lxml解析（已去除脚本、样式和注释的）页面，按与make_pruned_soup相同的规则移除节点后，用预编译的XPath一次遍历表格
+得到各列数组，再组装成与pokemon.get_moves完全相同的结构。
+任何与预期结构不符的情况都返回None，由调用方回退到BeautifulSoup实现
+"""
+from config import PARSER_CONFIG
+from extractor_profiler import profile_extractor
+from html_pruner import get_prune_flags, is_pruning_enabled, prune_markup
+from logger_utils import get_logger
+from parser_utils import get_parser_backend, is_partial_parse
+
+logger = get_logger(__name__)
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+_enabled = PARSER_CONFIG['fast_learnsets']
+
+def has_class(name):
+    """XPath条件：class中包含指定的类名（先用子串预先过滤）"""
+    return f"(contains(@class, '{name}') and contains(concat(' ', normalize-space(@class), ' '), ' {name} '))"
+
+# 移除规则 -> 编译好的XPath（运行时可以切换规则，按规则分别缓存）
+_prune_xpaths = {}
+
+def get_prune_xpath():
+    """
+    与html_pruner.should_prune相同规则的XPath（按当前配置）
+
+    Returns:
+        etree.XPath: 没有需要移除的节点类型时返回None
+    """
+    flags = get_prune_flags()
+    if flags not in _prune_xpaths:
+        hidden, references, navboxes = flags
+        conditions = []
+        if hidden:
+            conditions.append("contains(@style, 'display:none')")
+        if references:
+            conditions.append(f"(self::sup and {has_class('reference')})")
+        if navboxes:
+            conditions.append(has_class('navbox'))
+        _prune_xpaths[flags] = etree.XPath(f"//*[{' or '.join(conditions)}]") if conditions else None
+    return _prune_xpaths[flags]
+
+# 招式表的列：(字段, 列序号, 取值方式)，text为单元格文本，link为第一个链接的文本，explain为说明的title
+LEVEL_COLUMNS = (
+    ('level_learned_at', 0, 'text'),
+    ('name', 1, 'link'),
+    ('flavor_text', 1, 'explain'),
+    ('type', 2, 'link'),
+    ('category', 3, 'text'),
+    ('power', 4, 'text'),
+    ('accuracy', 5, 'text'),
+    ('pp', 6, 'text')
+)
+MACHINE_COLUMNS = (
+    ('machine_used', 1, 'link'),
+    ('name', 2, 'link'),
+    ('flavor_text', 2, 'explain'),
+    ('type', 3, 'link'),
+    ('category', 4, 'text'),
+    ('power', 5, 'text'),
+    ('accuracy', 6, 'text'),
+    ('pp', 7, 'text')
+)
+# 章节id -> (输出键, 列定义, 固定字段)
+SECTIONS = (
+    ('可学会的招式', 'learned', LEVEL_COLUMNS, {'machine_used': None, 'method': '提升等级'}),
+    ('能使用的招式学习器', 'machine', MACHINE_COLUMNS, {'level_learned_at': None, 'method': '招式学习器'})
+)
+# 输出字段顺序与get_moves一致
+MOVE_KEYS = ('level_learned_at', 'machine_used', 'method', 'name', 'flavor_text', 'type', 'category', 'power', 'accuracy', 'pp')
+
+if etree is not None:
+    CONTENT_XPATH = etree.XPath(f"//div[{has_class(PARSER_CONFIG['content_class'])}]")
+    HEADING_XPATH = etree.XPath('//span[@id = $id]')
+    NEXT_TABLE_XPATH = etree.XPath('(descendant::table | following::table)')
+    NEXT_MOVE_TABLE_XPATH = etree.XPath(f"(descendant::table | following::table)[{has_class('at-c')}]")
+    TOGGLE_XPATH = etree.XPath(f".//span[{has_class('toggle-p')}]")
+    ROW_XPATH = etree.XPath(f".//tr[{has_class('at-c')}]")
+    CELL_XPATH = etree.XPath('.//td')
+    LINK_XPATH = etree.XPath('.//a')
+    EXPLAIN_XPATH = etree.XPath(f".//span[{has_class('explain')}]")
+    # 与BeautifulSoup的.text一致：不含脚本、样式、模板和注音中的文本；
+    # 表格中没有这些元素时直接取字符串值
+    SPECIAL_TEXT_XPATH = etree.XPath('boolean(.//script | .//style | .//template | .//rt | .//rp)')
+    TEXT_XPATH = etree.XPath(
+        './/text()[not(ancestor::script or ancestor::style or ancestor::template or ancestor::rt or ancestor::rp)]'
+    )
+    STRING_XPATH = etree.XPath('string()')
+
+class StructureError(Exception):
+    """页面结构与预期不符，需要回退到BeautifulSoup实现"""
+
+def set_fast_learnsets(enabled):
+    """
+    开启或关闭快速提取（供对比测试使用）
+
+    Returns:
+        bool: 切换前的设置
+    """
+    global _enabled
+    previous = _enabled
+    _enabled = enabled
+    return previous
+
+def is_available():
+    """快速提取是否可用：需要lxml，且页面解析器也是lxml（两者得到的树结构一致）"""
+    return _enabled and etree is not None and get_parser_backend() == 'lxml'
+
+def make_pruned_tree(markup, preprocessed=False):
+    """
+    按与make_pruned_soup相同的规则预处理并解析页面（不计入预处理统计）
+
+    Args:
+        markup: 页面HTML
+        preprocessed: markup是否已经过html_pruner.preprocess_markup处理（与soup共用，不再重复去除）
+
+    Returns:
+        tuple: (lxml根元素, 正文容器列表（未开启部分解析或页面没有正文容器时为空）)
+    """
+    pruning = is_pruning_enabled()
+    if pruning and not preprocessed:
+        markup, _ = prune_markup(markup)
+    # 与BeautifulSoup的lxml后端使用相同的解析器
+    root = etree.HTML(markup)
+    if root is None:
+        raise StructureError('页面为空')
+    prune_xpath = get_prune_xpath() if pruning else None
+    if prune_xpath is not None:
+        for element in prune_xpath(root):
+            if element.getparent() is not None:
+                drop_element(element)
+    contents = CONTENT_XPATH(root) if is_partial_parse() else []
+    return root, contents
+
+def drop_element(element):
+    """与decompose一致：移除元素及其子树，保留元素后面的文本"""
+    parent = element.getparent()
+    if element.tail:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or '') + element.tail
+        else:
+            parent.text = (parent.text or '') + element.tail
+    parent.remove(element)
+
+def get_text(element, special=True):
+    """
+    元素文本
+
+    Args:
+        element: lxml元素
+        special: 元素中是否可能有脚本、样式、模板或注音（没有时直接取字符串值）
+    """
+    if special:
+        return ''.join(TEXT_XPATH(element))
+    return STRING_XPATH(element)
+
+def is_hidden_cell(cell):
+    """get_moves中移除的单元格：class含hide，或style恰好为display: none"""
+    classes = cell.get('class')
+    return (classes is not None and 'hide' in classes.split()) or cell.get('style') == 'display: none'
+
+class LearnsetExtractor:
+    """单个页面的招式表提取"""
+
+    def __init__(self, root, contents):
+        self.root = root
+        # 只解析正文时，soup中不存在正文之外的元素
+        self.contents = set(contents)
+
+    def in_soup(self, element):
+        if not self.contents:
+            return True
+        return any(ancestor in self.contents for ancestor in element.iterancestors('div'))
+
+    def first_in_soup(self, elements):
+        for element in elements:
+            if self.in_soup(element):
+                return element
+        raise StructureError('找不到后续表格')
+
+    def heading(self, section_id):
+        """与SectionIndex.heading一致：文档中第一个该id的span的父元素"""
+        for span in HEADING_XPATH(self.root, id=section_id):
+            if self.in_soup(span):
+                return span.getparent()
+        raise StructureError(f'找不到章节: {section_id}')
+
+    def get_tables(self, section_id):
+        """
+        定位章节下的招式表
+
+        Returns:
+            list: (形态名, 表格) 列表
+        """
+        table = self.first_in_soup(NEXT_TABLE_XPATH(self.heading(section_id)))
+        classes = table.get('class')
+        if classes is None:
+            raise StructureError('表格没有class')
+        if 'fulltable' not in classes.split():
+            return [('一般', table)]
+
+        # 多形态：每个形态名对应后面的一个招式表
+        names = [get_text(span).strip() for span in TOGGLE_XPATH(table)]
+        tables = []
+        for name in names:
+            table = self.first_in_soup(NEXT_MOVE_TABLE_XPATH(table))
+            tables.append((name, table))
+        return tables
+
+    def get_columns(self, table, columns):
+        """
+        一次遍历表格的所有行，得到各列的数组
+
+        Returns:
+            dict: 字段 -> 各行的值
+        """
+        arrays = {field: [] for field, _, _ in columns}
+        special = SPECIAL_TEXT_XPATH(table)
+        for row in ROW_XPATH(table):
+            # 与get_moves一致，先移除隐藏的单元格（同一个表格可能被多次处理，移除需要保留在树上）
+            cells = CELL_XPATH(row)
+            hidden = [cell for cell in cells if is_hidden_cell(cell)]
+            if hidden:
+                for cell in hidden:
+                    if cell.getparent() is not None:
+                        drop_element(cell)
+                cells = CELL_XPATH(row)
+            for field, index, kind in columns:
+                if index >= len(cells):
+                    raise StructureError('单元格数量不足')
+                cell = cells[index]
+                if kind == 'text':
+                    value = get_text(cell, special).strip()
+                elif kind == 'link':
+                    links = LINK_XPATH(cell)
+                    if not links:
+                        raise StructureError('单元格中没有链接')
+                    value = get_text(links[0], special).strip()
+                else:
+                    explains = EXPLAIN_XPATH(cell)
+                    if not explains:
+                        raise StructureError('单元格中没有招式说明')
+                    value = explains[0].get('title')
+                arrays[field].append(value)
+        return arrays
+
+    def extract(self):
+        """
+        Returns:
+            dict: 与get_moves相同的 {"learned": [...], "machine": [...]}
+        """
+        moves = {}
+        for section_id, key, columns, fixed in SECTIONS:
+            results = []
+            for form, table in self.get_tables(section_id):
+                arrays = self.get_columns(table, columns)
+                count = len(arrays[columns[0][0]])
+                data = []
+                for i in range(count):
+                    move = {}
+                    for field in MOVE_KEYS:
+                        move[field] = fixed[field] if field in fixed else arrays[field][i]
+                    data.append(move)
+                results.append({
+                    "form": form,
+                    "data": data
+                })
+            moves[key] = results
+        return moves
+
+@profile_extractor
+def extract_learnsets(html, preprocessed=False):
+    """
+    快速提取宝可梦页面的招式表
+
+    Args:
+        html: 页面HTML
+        preprocessed: html是否已经过html_pruner.preprocess_markup处理
+
+    Returns:
+        dict: 与pokemon.get_moves相同的结构，不可用或页面结构不符时返回None
+    """
+    if not is_available():
+        return None
+    try:
+        return LearnsetExtractor(*make_pruned_tree(html, preprocessed)).extract()
+    except Exception as e:
+        logger.debug(f"招式表快速提取失败，回退到BeautifulSoup: {e}")
+        return None
@@ -1,113 +1,120 @@
 # -*- coding: utf-8 -*-
 
-from bs4 import BeautifulSoup
 import requests
-
+import soupsieve
+
+from config import PAGE_TITLES, WIKITEXT_CONFIG
+from extraction_schema import Field, Schema, li_texts, text_strip
+from html_pruner import make_pruned_soup
+from page_source import fetch_page, get_fetch_mode
+from parse_cache import parse_cache
+from parser_utils import SectionIndex
+from table_utils import cell_text, extract_records, find_section_table, joined_links
 from utils import save_to_file
+from wikitext_parser import extract_move_fields, get_missing_fields
 
 PATH = './../data/move'
 
-T_MOVE = ['灼热暴冲', '黑暗暴冲', '剧毒暴冲', '格斗暴冲', '魔法暴冲']
+INFO_TABLE_SELECTOR = soupsieve.compile('table.a-r')
+
+def get_range_row(a, info_table):
+  return a.find_parent('tr').find_next_sibling('tr').find_next_sibling('tr')
 
-def get_move(move_simple):
-  headers = {
-    'Accept-Language': 'zh-Hans'
+INFO_TABLE_SCHEMA = Schema(
+  Field('info', selector='ul', process=li_texts, required=True),
+  Field('range', selector='a[title="范围"]', path=get_range_row, process=text_strip, required=True),
+)
+
+def get_learner(tds, ths):
+  return {
+    "index": cell_text(tds[0]),
+    "name": joined_links(tds[2])
   }
-  name = move_simple['name']
-  generation = move_simple['generation']
-  url = f'https://wiki.52poke.com/wiki/{name}（招式）' if name in T_MOVE else f'https://wiki.52poke.com/wiki/{name}'
-  response = requests.get(url, headers=headers)
-  response.raise_for_status()
-  soup = BeautifulSoup(response.text, "html.parser")
 
-  move_detail = move_simple
+def get_machine_learner(tds, ths):
+  return {
+    "index": cell_text(tds[0]),
+    "name": joined_links(tds[2], remove='\u200e')
+  }
 
-  # effect
-  effect_tag = soup.find('span', id="招式附加效果").find_parent('h2')
+# 各学习方式的宝可梦表：(键, 章节id, 标题标签, 行 -> 记录)
+LEARNER_TABLES = (
+  ('level', ("通过等级提升",), ['h3', 'h4'], get_learner),
+  ('machine', ("通过招式学习器",), 'h3', get_machine_learner),
+  ('egg', ("通过遺傳", "通过遗传", "通過遺傳"), 'h3', get_learner),
+  ('tutor', ("通过教授招式",), 'h3', get_learner),
+)
+
+def get_learners(sections):
+  pokemons = {}
+  for key, ids, heading_names, build_record in LEARNER_TABLES:
+    table = find_section_table(sections, ids, heading_names)
+    pokemons[key] = extract_records(table, build_record) if table is not None else []
+  return pokemons
+
+def get_move(move_simple, page=None):
+  name = move_simple['name']
+  title = PAGE_TITLES['move'](name)
+  if page is None:
+    page = fetch_page('move', title)
+  if page is None:
+    raise requests.exceptions.RequestException(f'请求失败: {title}')
+  if get_fetch_mode('move') == 'wikitext':
+    return parse_move_wikitext(page, move_simple)
+  # 页面内容和提取器版本都没变时直接使用缓存的解析结果（条目的基本信息也是缓存键的一部分）
+  data = parse_cache.get_or_parse('move', page, move_simple, lambda: parse_move_page(page, move_simple))
+  move_simple.update(data)
+  return move_simple
+
+def parse_move_wikitext(page, move_simple):
+  fields = extract_move_fields(page.wikitext)
+  required = WIKITEXT_CONFIG['fields']['move']
+  # wikitext无法提供的字段从获取阶段一并取回的HTML中解析，只运行这些字段的提取函数
+  missing = get_missing_fields(fields, required)
+  if missing:
+    if page.html is None:
+      # 没有HTML时不输出缺少字段的记录，否则保存后增量抓取会一直跳过它
+      return None
+    fields.update(parse_move_page(page.html, {}, fields=missing))
+
+  for key in required:
+    if key in fields:
+      move_simple[key] = fields[key]
+  return move_simple
+
+def get_info(soup):
+  info_table = INFO_TABLE_SELECTOR.select_one(soup)
+  return dict(INFO_TABLE_SCHEMA.extract(info_table))
+
+def get_effect(sections):
+  effect_tag = sections.find("招式附加效果").find_parent('h2')
   effect_p = effect_tag.find_next_sibling('p')
   effect_text = ''
   while effect_p and effect_p.name == 'p':
     effect_text += effect_p.get_text()
     effect_p = effect_p.find_next_sibling()
-  move_detail['effect'] = effect_text
+  return effect_text
+
+def parse_move_page(html, move_simple, fields=None):
+  # fields为None时提取全部字段，否则只提取其中的字段
+  soup = make_pruned_soup(html)
 
-  # info
-  info_text = []
-  info_table = soup.find('table', class_="a-r")
-  info_li_list = info_table.find('ul').find_all('li')
-  for li in info_li_list:
-    info_text.append(li.text.strip())
-  move_detail['info'] = info_text
+  move_detail = move_simple
 
-  # range
-  range_el = info_table.find('a', title="范围").find_parent('tr').find_next_sibling('tr').find_next_sibling('tr')
-  range_text = range_el.text.strip()
-  move_detail['range'] = range_text
+  # 章节索引只建立一次，效果和各学习方式的表格都按id定位
+  sections = SectionIndex(soup)
+
+  # effect
+  if fields is None or 'effect' in fields:
+    move_detail['effect'] = get_effect(sections)
+
+  # info range
+  if fields is None or 'info' in fields or 'range' in fields:
+    move_detail.update(get_info(soup))
 
   # pokemon
-  pokemons = {
-    "level": [],
-    "machine": [],
-    "egg": [],
-    "tutor": [],
-  }
-  # level
-  level_el = soup.find('span', id="通过等级提升")
-  if level_el:
-    level_table = level_el.find_parent(['h3', 'h4']).find_next_sibling('table')
-    level_tr_list = level_table.find_all('tr', class_="bgwhite")
-    for tr in level_tr_list:
-        tds = tr.find_all('td')
-        name = '-'.join([a.text.strip() for a in tds[2].find_all('a')])
-        pokemon = {
-          "index": tds[0].text.strip(),
-          "name": name
-        }
-        pokemons["level"].append(pokemon)
-
-  # machine
-  machine_el = soup.find('span', id="通过招式学习器")
-  if machine_el:
-    machine_table = machine_el.find_parent('h3').find_next_sibling('table')
-    machine_tr_list = machine_table.find_all('tr', class_="bgwhite")
-    for tr in machine_tr_list:
-        tds = tr.find_all('td')
-        name = '-'.join([a.text.strip().replace('\u200e', '') for a in tds[2].find_all('a')])
-        pokemon = {
-          "index": tds[0].text.strip(),
-          "name": name
-        }
-        pokemons["machine"].append(pokemon)
-
-  # egg
-  egg_el = soup.find('span', id=lambda x: x in ["通过遺傳", "通过遗传", "通過遺傳"])
-  if egg_el:
-    egg_table = egg_el.find_parent('h3').find_next_sibling('table')
-    egg_tr_list = egg_table.find_all('tr', class_="bgwhite")
-    for tr in egg_tr_list:
-        tds = tr.find_all('td')
-        name = '-'.join([a.text.strip() for a in tds[2].find_all('a')])
-        pokemon = {
-          "index": tds[0].text.strip(),
-          "name": name
-        }
-        pokemons["egg"].append(pokemon)
-
-  # tutor
-  tutor_el = soup.find('span', id="通过教授招式")
-  if tutor_el:
-    tutor_table = tutor_el.find_parent('h3').find_next_sibling('table')
-    tutor_tr_list = tutor_table.find_all('tr', class_="bgwhite")
-    for tr in tutor_tr_list:
-        tds = tr.find_all('td')
-        name = '-'.join([a.text.strip() for a in tds[2].find_all('a')])
-        pokemon = {
-          "index": tds[0].text.strip(),
-          "name": name
-        }
-        pokemons["tutor"].append(pokemon)
-
-  move_detail['pokemon'] = pokemons
+  if fields is None or 'pokemon' in fields:
+    move_detail['pokemon'] = get_learners(sections)
 
   return move_detail
 
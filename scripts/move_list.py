@@ -1,21 +1,17 @@
 # -*- coding: utf-8 -*-
 
-from bs4 import BeautifulSoup
 import requests
 
+from crawl_runner import run_detail_crawl
 from move import get_move
-from utils import file_exists, save_to_file
+from network_utils import safe_request
+from parser_utils import make_soup
+from utils import save_to_file
 
 PATH = './../data'
 
-def get_move_list():
-  headers = {
-    'Accept-Language': 'zh-Hans'
-  }
-  url = 'https://wiki.52poke.com/wiki/招式列表'
-  response = requests.get(url, headers=headers)
-  response.raise_for_status()
-  soup = BeautifulSoup(response.text, "html.parser")
+def parse_move_list(html):
+  soup = make_soup(html)
 
   moves = []
   move_tables = soup.find_all('table', class_='hvlist')
@@ -40,19 +36,25 @@ def get_move_list():
           'text': tds[9].text.strip(),
         }
         moves.append(move)
+  return moves
+
+def get_move_list():
+  headers = {
+    'Accept-Language': 'zh-Hans'
+  }
+  url = 'https://wiki.52poke.com/wiki/招式列表'
+  response = safe_request(url, headers)
+  if response is None:
+    raise requests.exceptions.RequestException(f'请求失败: {url}')
+  moves = parse_move_list(response.text)
   save_to_file(f'{PATH}/move_list.json', moves)
   return moves
 
 if __name__ == '__main__':
   move_list = get_move_list()
-  for move in move_list:
-    # get_move(move)
-    index = move['index']
-    name = move['name']
-    file_name = f'{PATH}/move/{index}-{name}.json'
-    if file_exists(file_name):
-      print(f'{name} 已存在, 跳过...')
-      continue
-    print(f'正在获取 {name}...')
-    data = get_move(move_simple=move)
-    save_to_file(file_name, data)
\ No newline at end of file
+  run_detail_crawl(
+    'move',
+    move_list,
+    lambda move: f"{PATH}/move/{move['index']}-{move['name']}.json",
+    get_move
+  )
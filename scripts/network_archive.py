@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+网络录制/回放模块
+录制模式下归档NetworkManager收到的每个响应，回放模式下从归档返回响应（可模拟延迟），
+用于离线、可复现地测试解析和抓取性能
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import NETWORK_ARCHIVE_CONFIG
+from logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 归档的内容已解码，回放时不能带上这些响应头
+DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+class NetworkArchive:
+    """响应归档，每个请求保存为一个元数据文件和一个内容文件"""
+
+    def __init__(self, archive_dir=None):
+        self.archive_dir = archive_dir or NETWORK_ARCHIVE_CONFIG['archive_dir']
+        self.record_count = 0
+        self.replay_count = 0
+        self.miss_count = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, method, url):
+        """请求对应的归档文件路径（不含扩展名）"""
+        key = hashlib.sha256(f'{method} {url}'.encode('utf8')).hexdigest()
+        return os.path.join(self.archive_dir, key[:2], key)
+
+    def record(self, request, response):
+        """
+        归档响应
+
+        Args:
+            request: requests.PreparedRequest对象
+            response: requests.Response对象（内容已读取）
+        """
+        path = self._entry_path(request.method, request.url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        body = response.content or b''
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS}
+        entry = {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': headers,
+            'elapsed': response.elapsed.total_seconds(),
+            'recorded_at': time.time()
+        }
+        with open(f'{path}.body', 'wb') as file:
+            file.write(body)
+        with open(f'{path}.json', 'w', encoding='utf8') as file:
+            json.dump(entry, file, ensure_ascii=False, indent=2)
+        with self._lock:
+            self.record_count += 1
+
+    def load(self, method, url):
+        """
+        读取归档
+
+        Args:
+            method: 请求方法
+            url: 请求URL（已编码）
+
+        Returns:
+            tuple: (元数据, 内容)，不存在时返回(None, None)
+        """
+        path = self._entry_path(method, url)
+        try:
+            with open(f'{path}.json', 'r', encoding='utf8') as file:
+                entry = json.load(file)
+            with open(f'{path}.body', 'rb') as file:
+                body = file.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.miss_count += 1
+            return None, None
+        with self._lock:
+            self.replay_count += 1
+        return entry, body
+
+    def get_stats(self):
+        """获取录制/回放统计信息"""
+        with self._lock:
+            return {
+                'recorded': self.record_count,
+                'replayed': self.replay_count,
+                'replay_misses': self.miss_count
+            }
+
+class RecordingAdapter(HTTPAdapter):
+    """正常发送请求，同时归档响应"""
+
+    def __init__(self, archive, **kwargs):
+        self.archive = archive
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        try:
+            self.archive.record(request, response)
+        except Exception as e:
+            logger.warning(f"归档响应失败: {request.url} - {e}")
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """从归档返回响应，不访问网络"""
+
+    def __init__(self, archive, latency=None, jitter=None):
+        super().__init__()
+        self.archive = archive
+        self.latency = NETWORK_ARCHIVE_CONFIG['replay_latency'] if latency is None else latency
+        self.jitter = NETWORK_ARCHIVE_CONFIG['replay_jitter'] if jitter is None else jitter
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        entry, body = self.archive.load(request.method, request.url)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"回放归档中没有该请求: {request.url}", request=request)
+
+        # 模拟网络延迟
+        delay = self.latency + random.uniform(0, self.jitter) if self.jitter else self.latency
+        if delay > 0:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.headers['Content-Length'] = str(len(body))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=delay)
+        response._content = body
+        response._content_consumed = True
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+def create_adapter(mode, **kwargs):
+    """
+    按网络模式创建传输适配器
+
+    Args:
+        mode: live/record/replay
+        **kwargs: 透传给HTTPAdapter的连接池参数
+
+    Returns:
+        requests适配器对象
+    """
+    if mode == 'record':
+        logger.info(f"录制模式，响应将归档到: {network_archive.archive_dir}")
+        return RecordingAdapter(network_archive, **kwargs)
+    if mode == 'replay':
+        logger.info(f"回放模式，从归档读取响应: {network_archive.archive_dir}")
+        return ReplayAdapter(network_archive)
+    return HTTPAdapter(**kwargs)
+
+# 全局归档实例
+network_archive = NetworkArchive()
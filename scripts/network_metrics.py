@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+网络指标模块
+记录每个请求的连接耗时、首字节时间、传输耗时、字节数、重试次数和主动休眠时间，
+按URL类别汇总为p50/p95/p99，并可在脚本结束时导出为JSON
+"""
+import atexit
+import json
+import math
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import NETWORK_METRICS_CONFIG
+from logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+URL_CLASSES = ('pokemon', 'move', 'ability', 'image', 'list', 'api', 'other')
+IMAGE_RE = re.compile(r'\.(png|jpe?g|gif|webp|svg)$', re.I)
+
+# 参与分位数统计的字段
+METRIC_FIELDS = (
+    'connect_time', 'ttfb', 'transfer_time', 'total_time', 'sleep_time',
+    'bytes_compressed', 'bytes_uncompressed', 'retries'
+)
+PERCENTILES = (50, 95, 99)
+
+# 连接耗时按线程记录：requests在调用线程中建立连接，请求结束后由NetworkManager取走
+_local = threading.local()
+
+def _add_connect_time(seconds):
+    _local.connect_time = getattr(_local, 'connect_time', 0.0) + seconds
+
+def take_connect_time():
+    """取出并清零当前线程累计的连接耗时（DNS解析+TCP连接+TLS握手）"""
+    seconds = getattr(_local, 'connect_time', 0.0)
+    _local.connect_time = 0.0
+    return seconds
+
+class TimedHTTPConnection(HTTPConnection):
+    """记录建立连接耗时的HTTP连接"""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _add_connect_time(time.perf_counter() - started)
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """记录建立连接耗时的HTTPS连接"""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _add_connect_time(time.perf_counter() - started)
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+def install_connection_timing(adapter):
+    """
+    让适配器的连接池使用可计时的连接类
+
+    Args:
+        adapter: requests适配器（回放适配器没有连接池，直接跳过）
+    """
+    if hasattr(adapter, 'poolmanager'):
+        adapter.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+
+def classify_url(url):
+    """
+    按URL推断类别（详情页面由调用方显式指定类别）
+
+    Args:
+        url: 请求URL
+
+    Returns:
+        str: URL类别
+    """
+    parts = urlsplit(url)
+    path = unquote(parts.path)
+    query = unquote(parts.query)
+    if IMAGE_RE.search(path):
+        return 'image'
+    if '列表' in path or 'Category:' in query:
+        return 'list'
+    if path.endswith('api.php'):
+        return 'api'
+    return 'other'
+
+def percentile(values, percent):
+    """最近秩法计算分位数（values已排序）"""
+    if not values:
+        return None
+    index = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[index]
+
+def get_raw_bytes(response, default=0):
+    """从连接上读取的原始（压缩后）字节数，回放或缓存的响应没有原始连接，返回default"""
+    raw = response.raw
+    if raw is not None and hasattr(raw, 'tell'):
+        return raw.tell()
+    return default
+
+class RequestRecord:
+    """单个请求（含所有重试）的指标"""
+
+    def __init__(self, url, url_class):
+        self.url = url
+        self.url_class = url_class if url_class in URL_CLASSES else classify_url(url)
+        self.started = time.perf_counter()
+        self.status = None
+        self.ok = False
+        self.cache_hit = False
+        self.attempts = 0
+        self.connect_time = 0.0
+        self.ttfb = 0.0
+        self.transfer_time = 0.0
+        self.sleep_time = 0.0
+        self.bytes_compressed = 0
+        self.bytes_uncompressed = 0
+        self.total_time = 0.0
+
+    def add_attempt(self, response, wall_time, connect_time, stream=False):
+        """
+        记录一次请求尝试
+
+        Args:
+            response: requests.Response对象
+            wall_time: session.get的总耗时
+            connect_time: 本次尝试建立连接的耗时
+            stream: 是否为流式请求（内容尚未读取，由调用方读取后调用add_transfer）
+        """
+        self.attempts += 1
+        self.status = response.status_code
+        self.connect_time += connect_time
+        # requests的elapsed从发送请求到解析完响应头
+        ttfb = response.elapsed.total_seconds()
+        self.ttfb += ttfb
+        if not stream:
+            uncompressed = len(response.content or b'')
+            self.add_transfer(max(wall_time - ttfb, 0.0), get_raw_bytes(response, uncompressed), uncompressed)
+
+    def add_transfer(self, seconds, compressed, uncompressed):
+        """记录读取响应体的耗时和压缩前后的字节数"""
+        self.transfer_time += seconds
+        self.bytes_compressed += compressed
+        self.bytes_uncompressed += uncompressed
+
+    def add_error(self, connect_time):
+        """记录一次没有得到响应的尝试"""
+        self.attempts += 1
+        self.connect_time += connect_time
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'url_class': self.url_class,
+            'status': self.status,
+            'ok': self.ok,
+            'cache_hit': self.cache_hit,
+            'retries': max(self.attempts - 1, 0),
+            'connect_time': round(self.connect_time, 4),
+            'ttfb': round(self.ttfb, 4),
+            'transfer_time': round(self.transfer_time, 4),
+            'total_time': round(self.total_time, 4),
+            'sleep_time': round(self.sleep_time, 4),
+            'bytes_compressed': self.bytes_compressed,
+            'bytes_uncompressed': self.bytes_uncompressed
+        }
+
+class NetworkMetrics:
+    """请求指标收集器（线程安全）"""
+
+    def __init__(self, enabled=None):
+        self.enabled = NETWORK_METRICS_CONFIG['enabled'] if enabled is None else enabled
+        self.records = []
+        self._lock = threading.Lock()
+
+    def start(self, url, url_class=None):
+        """开始记录一个请求"""
+        return RequestRecord(url, url_class)
+
+    def finish(self, record, ok):
+        """
+        结束记录
+
+        Args:
+            record: RequestRecord对象
+            ok: 请求是否成功
+        """
+        if not self.enabled:
+            return
+        record.ok = ok
+        record.total_time = time.perf_counter() - record.started
+        with self._lock:
+            self.records.append(record.to_dict())
+
+    def summarize(self):
+        """
+        按URL类别汇总
+
+        Returns:
+            dict: 类别 -> 请求数、失败数、缓存命中数、总字节数、总休眠时间以及各指标的{p50, p95, p99}
+        """
+        with self._lock:
+            records = list(self.records)
+
+        grouped = {}
+        for record in records:
+            grouped.setdefault(record['url_class'], []).append(record)
+
+        summary = {}
+        for url_class, items in grouped.items():
+            stats = {
+                'count': len(items),
+                'failed': sum(1 for item in items if not item['ok']),
+                'cache_hits': sum(1 for item in items if item['cache_hit']),
+                'total_bytes_compressed': sum(item['bytes_compressed'] for item in items),
+                'total_bytes_uncompressed': sum(item['bytes_uncompressed'] for item in items),
+                'total_sleep_time': round(sum(item['sleep_time'] for item in items), 3)
+            }
+            for field in METRIC_FIELDS:
+                values = sorted(item[field] for item in items)
+                stats[field] = {f'p{p}': percentile(values, p) for p in PERCENTILES}
+            summary[url_class] = stats
+        return summary
+
+    def get_stats(self):
+        """供NetworkManager.get_stats()合并的统计信息"""
+        return {'metrics': self.summarize()}
+
+    def dump(self, file_path=None):
+        """
+        导出指标为JSON
+
+        Args:
+            file_path: 输出路径，默认按脚本名和时间生成在输出目录下
+
+        Returns:
+            str: 输出路径，没有记录时返回None
+        """
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return None
+        if file_path is None:
+            script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+            file_name = f"{script}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+            file_path = os.path.join(NETWORK_METRICS_CONFIG['output_dir'], file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        data = {'summary': self.summarize()}
+        if NETWORK_METRICS_CONFIG['include_records']:
+            data['records'] = records
+        with open(file_path, 'w', encoding='utf8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+        logger.info(f"网络指标已导出: {file_path}")
+        return file_path
+
+# 全局指标收集器实例
+network_metrics = NetworkMetrics()
+
+def _dump_at_exit():
+    # 只在主进程导出：子进程的指标不完整，文件名按秒区分，同一秒退出时会覆盖主进程的导出
+    if multiprocessing.parent_process() is not None:
+        return
+    try:
+        network_metrics.dump()
+    except Exception as e:
+        logger.warning(f"导出网络指标失败: {e}")
+
+if network_metrics.enabled:
+    atexit.register(_dump_at_exit)
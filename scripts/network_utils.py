@@ -3,50 +3,90 @@
 网络请求工具模块
 提供统一的网络请求、重试机制和错误处理
 """
+import os
+import re
 import time
 import random
+import threading
+from collections import OrderedDict
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
 import urllib3
 
-from config import NETWORK_CONFIG
+from circuit_breaker import circuit_breaker
+from config import DOWNLOAD_CONFIG, NETWORK_ARCHIVE_CONFIG, NETWORK_CONFIG, SINGLE_FLIGHT_CONFIG
+from http_cache import http_cache
 from logger_utils import get_logger
+from network_archive import create_adapter, network_archive
+from network_metrics import get_raw_bytes, install_connection_timing, network_metrics, take_connect_time
+from parser_utils import make_soup
+from rate_limiter import rate_limiter
 
 # 禁用SSL警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = get_logger(__name__)
 
+# 重试更换请求头时需要保留的请求头
+PRESERVED_HEADERS = ('Accept', 'Accept-Encoding', 'Range')
+
+class _Flight:
+    """进行中的请求，供相同URL的并发请求等待共享结果"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+
 class NetworkManager:
     """网络请求管理器"""
     
-    def __init__(self):
+    def __init__(self, limiter=None, cache=None, breaker=None, metrics=None):
         self.session = self._create_session()
+        self.rate_limiter = limiter or rate_limiter
+        self.http_cache = cache or http_cache
+        self.circuit_breaker = breaker or circuit_breaker
+        self.metrics = metrics or network_metrics
         self.request_count = 0
         self.success_count = 0
         self.fail_count = 0
+        self.dedupe_count = 0
+        # 异步抓取引擎会在多个线程中并发调用，计数器需要加锁
+        self._stats_lock = threading.Lock()
+        # 单飞（single-flight）：相同请求共享一次抓取，并保留最近的响应供本次运行复用
+        self._flight_lock = threading.Lock()
+        self._inflight = {}
+        self._memo = OrderedDict()
+        # 其他模块（如抓取引擎的对冲策略）注册的统计来源
+        self._stats_providers = [self.metrics.get_stats]
+        # 不为None时禁止发出请求（值为原因），解析进程中的限速器、熔断器和缓存都是独立的副本
+        self.disabled_reason = None
+    
+    def disable(self, reason):
+        """禁止本进程发出请求（之后的请求抛出RuntimeError）"""
+        self.disabled_reason = reason
     
     def _create_session(self):
-        """创建带有重试机制的session"""
+        """创建带有重试机制和连接池的session（进程内所有请求共享）"""
         session = requests.Session()
         
-        # 设置重试策略
-        retry_strategy = Retry(
-            total=NETWORK_CONFIG['max_retries'],
-            backoff_factor=1,
-            status_forcelist=NETWORK_CONFIG['retry_status_codes'],
-            allowed_methods=["HEAD", "GET", "OPTIONS"]
+        # 传输层不重试：连接和读取错误都交给safe_request，重试才会计入重试预算、熔断器和网络指标，
+        # 在原地阻塞的时间也由调用方的重试次数决定
+        # 录制/回放模式下使用对应的适配器
+        adapter = create_adapter(
+            NETWORK_ARCHIVE_CONFIG['mode'],
+            pool_connections=NETWORK_CONFIG['pool_connections'],
+            pool_maxsize=NETWORK_CONFIG['pool_maxsize'],
+            pool_block=NETWORK_CONFIG['pool_block'],
+            max_retries=0
         )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # 连接池使用可计时的连接类，记录DNS解析与建立连接的耗时
+        install_connection_timing(adapter)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
         return session
     
-    def safe_request(self, url, headers=None, max_retries=None, delay=None, stream=False):
+    def safe_request(self, url, headers=None, max_retries=None, delay=None, stream=False, dedupe=True, url_class=None,
+                     on_send=None):
         """
         安全的网络请求，带有重试机制和403处理
         
@@ -56,66 +96,153 @@ class NetworkManager:
             max_retries: 最大重试次数
             delay: 重试延迟
             stream: 是否流式下载
+            dedupe: 是否与相同请求共享结果（流式下载总是单独请求）
+            url_class: 网络指标中的URL类别（pokemon/move/ability等），默认按URL推断
+            on_send: 每次通过熔断器和限速器、即将发出请求时调用（无参数），与进行中的相同请求合并时不调用
             
         Returns:
             requests.Response对象或None
+            
+        Raises:
+            RuntimeError: 本进程禁止发出请求
         """
+        if self.disabled_reason is not None:
+            raise RuntimeError(f"{self.disabled_reason}: {url}")
+        if stream or not dedupe or not SINGLE_FLIGHT_CONFIG['enabled']:
+            return self._request(url, headers, max_retries, delay, stream, url_class, on_send)
+        
+        # 不同语言变体的页面内容不同，需要区分
+        key = (url, (headers or NETWORK_CONFIG['headers']).get('Accept-Language'))
+        with self._flight_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.dedupe_count += 1
+                logger.debug(f"复用本次运行已获取的响应: {url}")
+                return self._memo[key]
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.dedupe_count += 1
+        
+        if not is_leader:
+            logger.debug(f"等待进行中的相同请求: {url}")
+            flight.event.wait()
+            return flight.response
+        
+        try:
+            flight.response = self._request(url, headers, max_retries, delay, stream, url_class, on_send)
+        finally:
+            with self._flight_lock:
+                del self._inflight[key]
+                if flight.response is not None:
+                    self._memo[key] = flight.response
+                    while len(self._memo) > SINGLE_FLIGHT_CONFIG['memo_size']:
+                        self._memo.popitem(last=False)
+            flight.event.set()
+        return flight.response
+    
+    def _request(self, url, headers=None, max_retries=None, delay=None, stream=False, url_class=None, on_send=None):
+        """执行网络请求并记录网络指标"""
+        record = self.metrics.start(url, url_class)
+        response = self._send_with_retries(url, headers, max_retries, delay, stream, record, on_send)
+        if stream and response is not None:
+            # 流式下载在读取完内容后由调用方结束记录
+            response.metrics_record = record
+        else:
+            self.metrics.finish(record, response is not None)
+        return response
+    
+    def _send_with_retries(self, url, headers, max_retries, delay, stream, record, on_send=None):
+        """执行实际的网络请求（重试、限速、缓存）"""
         if headers is None:
             headers = NETWORK_CONFIG['headers'].copy()
         
         if max_retries is None:
             max_retries = NETWORK_CONFIG['max_retries']
+        
+        # 回放的结果是确定的，重试没有意义
+        if NETWORK_ARCHIVE_CONFIG['mode'] == 'replay':
+            max_retries = 1
             
         if delay is None:
             delay = NETWORK_CONFIG['retry_delay']
         
-        self.request_count += 1
+        with self._stats_lock:
+            self.request_count += 1
+        
+        # 流式下载不走缓存，其余请求带上条件请求头
+        cache_headers = {} if stream else self.http_cache.conditional_headers(url)
         
         for attempt in range(max_retries):
+            # 重试受全局重试预算限制
+            if attempt > 0 and not self.circuit_breaker.allow_retry():
+                logger.error(f"重试预算已用尽，放弃请求: {url}")
+                break
+            
             try:
                 logger.debug(f"请求: {url} (尝试 {attempt + 1}/{max_retries})")
                 
-                # 为每次请求添加随机延迟以模拟人类行为
-                if attempt > 0:
-                    random_delay = random.uniform(1, 3)
-                    logger.debug(f"随机延迟: {random_delay:.2f}秒")
-                    time.sleep(random_delay)
+                # 熔断期间所有请求在此等待，恢复后再继续
+                waited = time.perf_counter()
+                self.circuit_breaker.before_request(is_retry=attempt > 0)
+                
+                # 所有请求都经过共享的限速器，由服务器反馈决定节奏
+                self.rate_limiter.acquire()
+                record.sleep_time += time.perf_counter() - waited
+                if on_send is not None:
+                    on_send()
                 
-                # 对于403错误，尝试更换User-Agent
+                # 对于403错误，尝试更换User-Agent（保留Range等与请求语义相关的头）
                 if attempt > 0:
-                    headers = self._get_random_headers()
+                    preserved = {name: headers[name] for name in PRESERVED_HEADERS if name in headers}
+                    headers = {**self._get_random_headers(), **preserved}
                 
+                take_connect_time()
+                sent = time.perf_counter()
                 response = self.session.get(
                     url, 
-                    headers=headers, 
+                    headers={**headers, **cache_headers}, 
                     timeout=NETWORK_CONFIG['timeout'],
                     stream=stream,
                     verify=False,  # 跳过SSL验证
                     allow_redirects=True
                 )
+                record.add_attempt(response, time.perf_counter() - sent, take_connect_time(), stream)
+                self.rate_limiter.on_response(response.status_code, response.headers)
                 
-                # 检查响应状态
-                if response.status_code == 403:
-                    logger.warning(f"403 Forbidden: {url} - 尝试更换策略")
+                # 检查响应状态，403/429/5xx交给限速器降速后重试
+                if response.status_code in NETWORK_CONFIG['retry_status_codes']:
+                    self.circuit_breaker.record_failure()
+                    logger.warning(f"{response.status_code}: {url} - 降低请求速率后重试")
                     if attempt < max_retries - 1:
-                        # 对于403错误，增加更长的延迟
-                        extended_delay = delay + random.uniform(5, 10)
-                        logger.info(f"403错误，等待 {extended_delay:.1f} 秒后重试...")
-                        time.sleep(extended_delay)
                         continue
-                    else:
-                        raise requests.exceptions.HTTPError(f"403 Client Error: Forbidden for url: {url}")
+                else:
+                    self.circuit_breaker.record_success()
+                
+                # 续传请求的416是确定的结果（临时文件已完整或与服务器上的文件不一致），
+                # 重试不会改变，直接交给调用方处理
+                if response.status_code == 416 and 'Range' in headers:
+                    return response
+                
+                # 304时从磁盘缓存返回内容
+                if response.status_code == 304 and cache_headers:
+                    cached_response = self.http_cache.load_response(url)
+                    if cached_response is None:
+                        cache_headers = {}
+                        continue
+                    response = cached_response
+                    record.cache_hit = True
                 
                 response.raise_for_status()
                 
-                self.success_count += 1
-                logger.debug(f"请求成功: {url}")
+                if not stream and not getattr(response, 'from_cache', False):
+                    self.http_cache.store(url, response)
                 
-                # 添加请求间隔
-                if NETWORK_CONFIG['request_delay'] > 0:
-                    base_delay = NETWORK_CONFIG['request_delay']
-                    actual_delay = base_delay + random.uniform(0.5, 1.5)
-                    time.sleep(actual_delay)
+                with self._stats_lock:
+                    self.success_count += 1
+                logger.debug(f"请求成功: {url}")
                 
                 return response
                 
@@ -127,16 +254,25 @@ class NetworkManager:
                 else:
                     logger.warning(error_msg)
                 
-                if attempt < max_retries - 1:
+                if getattr(e, 'response', None) is None:
+                    record.add_error(take_connect_time())
+                    self.rate_limiter.on_error()
+                    self.circuit_breaker.record_failure()
+                
+                if attempt < max_retries - 1 and self.circuit_breaker.has_retry_budget():
                     retry_delay = delay + random.uniform(1, 3)
                     logger.info(f"等待 {retry_delay:.1f} 秒后重试...")
-                    time.sleep(retry_delay)
+                    self.rate_limiter.sleep(retry_delay)
+                    record.sleep_time += retry_delay
                     delay *= 1.5  # 温和的指数退避
                 else:
                     logger.error(f"所有重试都失败了，无法获取: {url}")
-                    self.fail_count += 1
+                    with self._stats_lock:
+                        self.fail_count += 1
                     return None
         
+        with self._stats_lock:
+            self.fail_count += 1
         return None
     
     def _get_random_headers(self):
@@ -170,12 +306,12 @@ class NetworkManager:
         """
         response = self.safe_request(url, headers)
         if response:
-            return BeautifulSoup(response.text, "html.parser")
+            return make_soup(response.text)
         return None
     
     def download_file(self, url, file_path, headers=None):
         """
-        下载文件
+        下载文件（分块流式写入临时文件，完成后原子重命名，支持断点续传）
         
         Args:
             url: 文件URL
@@ -185,35 +321,159 @@ class NetworkManager:
         Returns:
             bool: 下载是否成功
         """
+        part_path = f"{file_path}{DOWNLOAD_CONFIG['part_suffix']}"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        
+        request_headers = (headers or NETWORK_CONFIG['headers']).copy()
+        # 不接受压缩编码，保证Content-Length与写入的字节数一致
+        request_headers['Accept-Encoding'] = 'identity'
+        if offset:
+            request_headers['Range'] = f'bytes={offset}-'
+        
+        response = None
+        succeeded = False
         try:
-            response = self.safe_request(url, headers, stream=True)
-            if response:
-                with open(file_path, 'wb') as file:
-                    file.write(response.content)
-                logger.debug(f"文件下载成功: {file_path}")
-                return True
-            else:
+            response = self.safe_request(url, request_headers, stream=True)
+            if response is not None and response.status_code == 416:
+                # Content-Range: bytes */总大小，临时文件正好是完整文件时直接完成
+                if self._get_range_total(response) == offset:
+                    os.replace(part_path, file_path)
+                    logger.debug(f"临时文件已完整: {file_path}")
+                    succeeded = True
+                    return True
+                # 临时文件与服务器上的文件不一致，丢弃后立即从头下载
+                logger.warning(f"续传范围无效: {url}，从头下载")
+                os.remove(part_path)
+                return self.download_file(url, file_path, headers)
+            if not response:
                 logger.error(f"文件下载失败: {url}")
                 return False
+            
+            if response.status_code == 206:
+                if self._get_range_start(response) != offset:
+                    logger.error(f"续传位置不一致: {url}，丢弃临时文件")
+                    os.remove(part_path)
+                    return False
+                mode = 'ab'
+            else:
+                # 服务器不支持Range，从头写入
+                mode = 'wb'
+                offset = 0
+            
+            content_length = response.headers.get('Content-Length')
+            expected_size = offset + int(content_length) if content_length else None
+            
+            transfer_started = time.perf_counter()
+            written = 0
+            with open(part_path, mode) as file:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CONFIG['chunk_size']):
+                    if chunk:
+                        file.write(chunk)
+                        written += len(chunk)
+                file.flush()
+                os.fsync(file.fileno())
+            record = getattr(response, 'metrics_record', None)
+            if record is not None:
+                record.add_transfer(time.perf_counter() - transfer_started, get_raw_bytes(response, written), written)
+            
+            actual_size = os.path.getsize(part_path)
+            if expected_size is not None and actual_size != expected_size:
+                logger.error(f"文件不完整: {url} ({actual_size}/{expected_size}字节)，保留临时文件以便续传")
+                return False
+            
+            os.replace(part_path, file_path)
+            logger.debug(f"文件下载成功: {file_path}")
+            succeeded = True
+            return True
         except Exception as e:
             logger.error(f"文件下载异常: {url} - {e}")
             return False
+        finally:
+            if response is not None:
+                response.close()
+                record = getattr(response, 'metrics_record', None)
+                if record is not None:
+                    self.metrics.finish(record, succeeded)
+    
+    def _get_range_start(self, response):
+        """解析Content-Range响应头中的起始字节"""
+        match = re.match(r'bytes (\d+)-', response.headers.get('Content-Range', ''))
+        return int(match.group(1)) if match else None
+    
+    def _get_range_total(self, response):
+        """解析Content-Range响应头中的文件总大小（416响应为 bytes */总大小）"""
+        match = re.match(r'bytes [^/]*/(\d+)', response.headers.get('Content-Range', ''))
+        return int(match.group(1)) if match else None
+    
+    def get_pool_stats(self):
+        """
+        获取连接池统计信息
+        
+        Returns:
+            dict: 新建连接数、经连接池发出的请求数以及连接复用次数
+        """
+        connections_opened = 0
+        pooled_requests = 0
+        adapters = {id(adapter): adapter for adapter in self.session.adapters.values()}
+        for adapter in adapters.values():
+            # 回放适配器没有连接池
+            if not hasattr(adapter, 'poolmanager'):
+                continue
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                connections_opened += pool.num_connections
+                pooled_requests += pool.num_requests
+        
+        return {
+            'connections_opened': connections_opened,
+            'pooled_requests': pooled_requests,
+            'connections_reused': max(pooled_requests - connections_opened, 0)
+        }
+    
+    def register_stats(self, provider):
+        """
+        注册额外的统计来源，其结果合并到get_stats()中
+        
+        Args:
+            provider: 无参数、返回dict的函数
+        """
+        if provider not in self._stats_providers:
+            self._stats_providers.append(provider)
     
     def get_stats(self):
         """获取请求统计信息"""
-        return {
+        limiter_stats = self.rate_limiter.get_stats()
+        breaker_stats = self.circuit_breaker.get_stats()
+        cache_stats = self.http_cache.get_stats()
+        pool_stats = self.get_pool_stats()
+        stats = {
             'total_requests': self.request_count,
             'successful_requests': self.success_count,
             'failed_requests': self.fail_count,
-            'success_rate': (self.success_count / self.request_count * 100) if self.request_count > 0 else 0
+            'success_rate': (self.success_count / self.request_count * 100) if self.request_count > 0 else 0,
+            'current_rate': limiter_stats['current_rate'],
+            'total_sleep_time': limiter_stats['total_sleep_time'],
+            'throttle_count': limiter_stats['throttle_count'],
+            **breaker_stats,
+            'cache_hits': cache_stats['cache_hits'],
+            'cache_size': cache_stats['cache_size'],
+            'connections_opened': pool_stats['connections_opened'],
+            'connections_reused': pool_stats['connections_reused'],
+            'deduplicated_requests': self.dedupe_count,
+            'network_mode': NETWORK_ARCHIVE_CONFIG['mode'],
+            **network_archive.get_stats()
         }
+        for provider in self._stats_providers:
+            stats.update(provider())
+        return stats
 
 # 全局网络管理器实例
 network_manager = NetworkManager()
 
-def safe_request(url, headers=None):
+def safe_request(url, headers=None, **kwargs):
     """便捷的安全请求函数"""
-    return network_manager.safe_request(url, headers)
+    return network_manager.safe_request(url, headers, **kwargs)
 
 def get_soup(url, headers=None):
     """便捷的获取soup对象函数"""
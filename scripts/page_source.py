@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+页面内容获取模块
+按实体类型选择获取方式：完整文章页面（page）、MediaWiki解析API（parse）或页面源码（wikitext），
+并支持批量获取，把页面内容交给对应的解析函数
+"""
+import time
+from collections import namedtuple
+
+from config import NETWORK_CONFIG, PAGE_FETCH_CONFIG
+from fetch_engine import fetch_many_sync
+from logger_utils import get_logger
+from network_utils import safe_request
+from wiki_api import build_api_url, build_raw_url, get_page_wikitexts
+from wikitext_parser import needs_html
+
+logger = get_logger(__name__)
+
+FETCH_MODES = ('page', 'parse', 'wikitext')
+
+# wikitext模式的页面内容：源码和（源码缺少需要输出的字段时）文章页面HTML，
+# 两者都在获取阶段取回，解析阶段不再发出请求
+WikitextPage = namedtuple('WikitextPage', ['wikitext', 'html'])
+
+def get_fetch_mode(entity):
+    """
+    获取实体类型对应的页面获取方式
+
+    Args:
+        entity: 实体类型（pokemon/move/ability）
+
+    Returns:
+        str: page、parse 或 wikitext
+    """
+    mode = PAGE_FETCH_CONFIG['modes'].get(entity, 'page')
+    if mode not in FETCH_MODES:
+        logger.warning(f"未知的页面获取方式: {entity}={mode}，使用page")
+        mode = 'page'
+    return mode
+
+def get_page_headers():
+    """页面请求头（简体中文变体）"""
+    headers = NETWORK_CONFIG['headers'].copy()
+    headers['Accept-Language'] = PAGE_FETCH_CONFIG['accept_language']
+    return headers
+
+def get_page_url(title, mode):
+    """
+    构造页面请求URL
+
+    Args:
+        title: 页面标题
+        mode: 获取方式
+
+    Returns:
+        str: 请求URL
+    """
+    if mode == 'parse':
+        return build_api_url({
+            'action': 'parse',
+            'page': title,
+            'prop': 'text',
+            'redirects': '1',
+            'variant': PAGE_FETCH_CONFIG['variant'],
+            'disableeditsection': '1',
+            'disablelimitreport': '1'
+        })
+    if mode == 'wikitext':
+        return build_raw_url(title)
+    return f"{NETWORK_CONFIG['base_url']}{title}"
+
+def extract_content(response, mode):
+    """
+    从响应中取出页面内容
+
+    Args:
+        response: requests.Response对象
+        mode: 获取方式
+
+    Returns:
+        str: 页面HTML（wikitext模式下为源码），失败时返回None
+    """
+    if mode != 'parse':
+        return response.text
+    try:
+        result = response.json()
+    except ValueError as e:
+        logger.error(f"解析API返回内容无法解析: {response.url} - {e}")
+        return None
+    if 'error' in result:
+        logger.error(f"解析API错误: {result['error']}")
+        return None
+    return result['parse']['text']
+
+def fetch_page(entity, title, mode=None):
+    """
+    获取单个页面的内容
+
+    Args:
+        entity: 实体类型
+        title: 页面标题
+        mode: 获取方式，默认使用实体类型的配置
+
+    Returns:
+        页面HTML（wikitext模式下为WikitextPage），失败时返回None
+    """
+    mode = mode or get_fetch_mode(entity)
+    response = safe_request(get_page_url(title, mode), get_page_headers(), url_class=entity)
+    if response is None:
+        return None
+    content = extract_content(response, mode)
+    if mode != 'wikitext' or content is None:
+        return content
+    html = None
+    if needs_html(entity, content):
+        html = fetch_page(entity, title, mode='page')
+        if html is None:
+            return None
+    return WikitextPage(content, html)
+
+def fetch_contents(entity, titles, mode, timings=None, max_retries=None):
+    """
+    并发获取多个页面的内容
+
+    Args:
+        entity: 实体类型
+        titles: 页面标题列表
+        mode: 获取方式
+        timings: 可选的字典，获取耗时（秒）累加到 标题 -> 耗时
+        max_retries: 单个页面的最大请求次数，默认使用网络配置
+
+    Returns:
+        dict: 标题 -> 页面内容，失败的标题不在结果中
+    """
+    urls = [get_page_url(title, mode) for title in titles]
+    responses = fetch_many_sync(urls, get_page_headers(), max_retries=max_retries, url_class=entity) if urls else []
+
+    contents = {}
+    for title, response in zip(titles, responses):
+        if response is None:
+            continue
+        if timings is not None:
+            timings[title] = timings.get(title, 0) + response.elapsed.total_seconds()
+        content = extract_content(response, mode)
+        if content is not None:
+            contents[title] = content
+    return contents
+
+def fetch_wikitext_pages(entity, titles, timings=None, max_retries=None):
+    """
+    获取多个页面的源码，源码缺少需要输出的字段时一并获取文章页面HTML
+
+    一次API请求取回一批页面的源码，API省略的页面再单独并发获取；
+    需要HTML的页面在这里（获取阶段）并发获取，HTML获取失败的页面视为获取失败，留给延后重试
+
+    Returns:
+        dict: 标题 -> WikitextPage，失败的标题不在结果中
+    """
+    started = time.perf_counter()
+    wikitexts = {title: page['content'] for title, page in get_page_wikitexts(titles).items()}
+    if timings is not None:
+        elapsed = time.perf_counter() - started
+        timings.update((title, elapsed) for title in wikitexts)
+    rest = [title for title in titles if title not in wikitexts]
+    wikitexts.update(fetch_contents(entity, rest, 'wikitext', timings, max_retries))
+
+    fallback = [title for title, text in wikitexts.items() if needs_html(entity, text)]
+    htmls = fetch_contents(entity, fallback, 'page', timings, max_retries)
+
+    failed = set(fallback) - htmls.keys()
+    return {title: WikitextPage(text, htmls.get(title)) for title, text in wikitexts.items() if title not in failed}
+
+def fetch_pages(entity, titles, timings=None, max_retries=None):
+    """
+    获取多个页面的内容
+
+    Args:
+        entity: 实体类型
+        titles: 页面标题列表
+        timings: 可选的字典，填入 标题 -> 获取耗时（秒）
+        max_retries: 单个页面的最大请求次数，默认使用网络配置
+
+    Returns:
+        dict: 标题 -> 页面内容（wikitext模式下为WikitextPage），失败的标题不在结果中
+    """
+    mode = get_fetch_mode(entity)
+    if mode == 'wikitext':
+        return fetch_wikitext_pages(entity, titles, timings, max_retries)
+    return fetch_contents(entity, titles, mode, timings, max_retries)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+解析结果缓存模块
+按 (页面正文的SHA-256, 条目参数) 缓存详情页面的解析结果，存放在提取器版本和解析设置对应的目录下。
+页面内容、提取器版本和解析设置都没有变化时直接返回保存的结果，不再构建soup；
+修改某类实体的提取逻辑后提高config.EXTRACTOR_VERSIONS中的版本号，只会使该类实体的缓存失效。
+每轮抓取结束后删除旧版本提取器的缓存，并按最近访问时间淘汰超出容量的文件
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+from config import EXTRACTOR_VERSIONS, PARSE_CACHE_CONFIG, PARSER_CONFIG, PRUNE_CONFIG
+from html_pruner import is_pruning_enabled, prune_markup
+from learnset_extractor import is_available as is_fast_learnsets
+from logger_utils import get_logger
+from parser_utils import get_parser_backend, is_partial_parse
+
+logger = get_logger(__name__)
+
+# 正文容器的起始标签
+CONTENT_START_RE = re.compile(r'<div\b[^>]*\bclass="[^"]*\b' + re.escape(PARSER_CONFIG['content_class']) + r'\b')
+
+def get_content_markup(page):
+    """
+    缓存键使用的页面内容
+
+    完整文章页面中每次请求都不同的内容（脚本中的wgRequestId、wgBackendResponseTime，
+    注释中的解析器缓存时间戳和限制报告）都在脚本和注释里，去除后从正文容器开始取，
+    页面没有变化时重新获取也能命中缓存
+
+    Args:
+        page: 页面HTML
+
+    Returns:
+        str: 去除脚本、样式和注释后从正文容器开始的HTML，没有正文容器时为去除后的整个页面
+    """
+    markup, _ = prune_markup(page)
+    match = CONTENT_START_RE.search(markup)
+    return markup[match.start():] if match else markup
+
+def get_parse_settings():
+    """
+    影响解析结果的运行时设置（解析器、部分解析、页面预处理、招式表快速提取）
+
+    Returns:
+        dict: 设置名 -> 当前值
+    """
+    return {
+        'parser': get_parser_backend(),
+        'partial': is_partial_parse(),
+        'prune': is_pruning_enabled() and {key: value for key, value in PRUNE_CONFIG.items() if key != 'enabled'},
+        'fast_learnsets': is_fast_learnsets()
+    }
+
+def get_settings_fingerprint():
+    """解析设置的摘要，作为缓存版本目录名的一部分"""
+    settings = json.dumps(get_parse_settings(), sort_keys=True)
+    return hashlib.sha256(settings.encode('utf8')).hexdigest()[:12]
+
+class ParseCache:
+    """基于磁盘的解析结果缓存"""
+
+    def __init__(self, cache_dir=None, max_size=None, enabled=None):
+        self.cache_dir = cache_dir or PARSE_CACHE_CONFIG['cache_dir']
+        self.max_size = max_size or PARSE_CACHE_CONFIG['max_size']
+        self.enabled = PARSE_CACHE_CONFIG['enabled'] if enabled is None else enabled
+        self.hit_count = 0
+        self.miss_count = 0
+        self.evict_count = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, page, args):
+        """
+        缓存键
+
+        Args:
+            page: 页面内容
+            args: 影响解析结果的其他参数（可JSON序列化）
+
+        Returns:
+            str: 十六进制SHA-256
+        """
+        digest = hashlib.sha256(get_content_markup(page).encode('utf8'))
+        digest.update(b'\0')
+        digest.update(json.dumps(args, ensure_ascii=False, sort_keys=True).encode('utf8'))
+        return digest.hexdigest()
+
+    def _path(self, entity, key):
+        """缓存文件路径：{cache_dir}/{实体类型}/v{提取器版本}-{解析设置摘要}/{键前两位}/{键}.json"""
+        version = EXTRACTOR_VERSIONS[entity]
+        return os.path.join(self.cache_dir, entity, f'v{version}-{get_settings_fingerprint()}', key[:2], f'{key}.json')
+
+    def load(self, entity, key):
+        """读取缓存，不存在或已损坏时返回None"""
+        path = self._path(entity, key)
+        try:
+            with open(path, 'r', encoding='utf8') as file:
+                data = json.load(file)
+            # 更新修改时间，淘汰时按最近访问的顺序保留
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"解析缓存损坏，重新解析: {entity} {key} - {e}")
+            return None
+
+    def store(self, entity, key, data):
+        """原子方式写入缓存（多个解析进程可能同时写入）"""
+        path = self._path(entity, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf8') as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"写入解析缓存失败: {entity} {key} - {e}")
+
+    def get_or_parse(self, entity, page, args, parse):
+        """
+        读取解析结果，缓存中没有时解析并写入缓存
+
+        Args:
+            entity: 实体类型
+            page: 页面内容
+            args: 影响解析结果的其他参数（可JSON序列化）
+            parse: () -> 解析结果，结果为空时不缓存
+
+        Returns:
+            解析结果
+        """
+        if not self.enabled:
+            return parse()
+        key = self.make_key(page, args)
+        data = self.load(entity, key)
+        if data is not None:
+            with self._lock:
+                self.hit_count += 1
+            logger.debug(f"解析缓存命中: {entity} {key}")
+            return data
+
+        with self._lock:
+            self.miss_count += 1
+        data = parse()
+        if data:
+            self.store(entity, key, data)
+        return data
+
+    def evict(self):
+        """
+        删除旧版本提取器的缓存目录，总大小超过容量时按最近访问时间从旧到新删除文件
+
+        不同解析设置的目录都保留（切换回原设置时仍可命中），一并参与容量淘汰
+
+        Returns:
+            int: 淘汰后的缓存总大小（字节）
+        """
+        files = []
+        for entity in os.listdir(self.cache_dir) if os.path.isdir(self.cache_dir) else []:
+            entity_dir = os.path.join(self.cache_dir, entity)
+            if not os.path.isdir(entity_dir):
+                continue
+            current = f'v{EXTRACTOR_VERSIONS[entity]}-' if entity in EXTRACTOR_VERSIONS else None
+            for version in os.listdir(entity_dir):
+                version_dir = os.path.join(entity_dir, version)
+                if current is None or not version.startswith(current):
+                    shutil.rmtree(version_dir, ignore_errors=True)
+                    logger.debug(f"删除旧版本解析缓存: {version_dir}")
+                    continue
+                for root, _, names in os.walk(version_dir):
+                    for name in names:
+                        path = os.path.join(root, name)
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        files.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in files)
+        files.sort()
+        for _, size, path in files:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            with self._lock:
+                self.evict_count += 1
+        return total_size
+
+    def merge(self, stats):
+        """合并其他进程的统计（get_stats()的结果）"""
+        with self._lock:
+            self.hit_count += stats['parse_cache_hits']
+            self.miss_count += stats['parse_cache_misses']
+
+    def reset(self):
+        with self._lock:
+            self.hit_count = 0
+            self.miss_count = 0
+            self.evict_count = 0
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                'parse_cache_hits': self.hit_count,
+                'parse_cache_misses': self.miss_count,
+                'parse_cache_evictions': self.evict_count
+            }
+
+# 全局解析缓存实例
+parse_cache = ParseCache()
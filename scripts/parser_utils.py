@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+HTML解析工具模块
+统一创建BeautifulSoup对象，解析器后端（lxml/html5lib/html.parser）由配置选择；
+详情页面可以只解析正文部分，跳过导航框、侧栏和页脚
+"""
+import importlib.util
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config import PARSER_CONFIG
+from logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 按速度从快到慢排列，html.parser为Python内置，始终可用
+PARSER_BACKENDS = ('lxml', 'html5lib', 'html.parser')
+
+# 部分解析时只保留正文容器及其子树
+CONTENT_STRAINER = SoupStrainer('div', class_=PARSER_CONFIG['content_class'])
+
+_backend = None
+_partial = PARSER_CONFIG['partial']
+
+def is_backend_available(backend):
+    """解析器后端是否已安装"""
+    if backend == 'html.parser':
+        return True
+    return backend in PARSER_BACKENDS and importlib.util.find_spec(backend) is not None
+
+def get_parser_backend():
+    """
+    获取当前使用的解析器后端
+
+    Returns:
+        str: 配置的解析器，未安装时回退到html.parser
+    """
+    global _backend
+    if _backend is None:
+        backend = PARSER_CONFIG['backend']
+        if not is_backend_available(backend):
+            logger.warning(f"解析器 {backend} 不可用，使用html.parser")
+            backend = 'html.parser'
+        _backend = backend
+    return _backend
+
+def set_parser_backend(backend):
+    """
+    切换解析器后端（供对比测试使用）
+
+    Args:
+        backend: 解析器名称
+
+    Returns:
+        str: 切换前的解析器
+    """
+    global _backend
+    if not is_backend_available(backend):
+        raise ValueError(f"解析器不可用: {backend}")
+    previous = get_parser_backend()
+    _backend = backend
+    return previous
+
+def set_partial_parse(enabled):
+    """
+    开启或关闭部分解析（供对比测试使用）
+
+    Returns:
+        bool: 切换前的设置
+    """
+    global _partial
+    previous = _partial
+    _partial = enabled
+    return previous
+
+def is_partial_parse():
+    """详情页面是否只解析正文部分"""
+    return _partial
+
+def make_soup(markup, parser=None, partial=False):
+    """
+    创建BeautifulSoup对象
+
+    Args:
+        markup: HTML文本
+        parser: 指定解析器，默认使用配置的解析器
+        partial: 是否只解析正文部分（配置关闭、解析器不支持或页面没有正文容器时解析整个页面）
+
+    Returns:
+        BeautifulSoup对象
+    """
+    parser = parser or get_parser_backend()
+    if partial and _partial and parser != 'html5lib':
+        soup = BeautifulSoup(markup, parser, parse_only=CONTENT_STRAINER)
+        if soup.find(True) is not None:
+            return soup
+    return BeautifulSoup(markup, parser)
+
+class SectionIndex:
+    """
+    页面中带id的span索引（章节标题的mw-headline等），遍历一次页面建立，
+    之后按id查找章节不再遍历整棵树
+    """
+
+    def __init__(self, soup):
+        self._spans = {}
+        for position, span in enumerate(soup.find_all('span', id=True)):
+            # 与soup.find一致，重复的id取文档中第一个
+            self._spans.setdefault(span['id'], (position, span))
+
+    def find(self, *ids):
+        """
+        按id查找span
+
+        Args:
+            *ids: 可能的id（如简繁两种写法）
+
+        Returns:
+            文档中最先出现的匹配span，不存在时返回None
+        """
+        matches = [self._spans[span_id] for span_id in ids if span_id in self._spans]
+        if not matches:
+            return None
+        return min(matches, key=lambda match: match[0])[1]
+
+    def heading(self, *ids):
+        """获取章节标题元素（span的父元素），不存在时返回None"""
+        span = self.find(*ids)
+        return span.parent if span is not None else None
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+详情页面抓取流水线
+获取、解析、写入分为三个阶段：获取线程按批次预取页面，解析在独立进程池中进行（解析是CPU密集型），
+主线程按顺序写入结果并更新抓取队列。阶段之间使用有界队列，下游处理不过来时上游阻塞等待
+"""
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from requests.exceptions import RequestException
+
+from config import CRAWL_FRONTIER_CONFIG, PAGE_FETCH_CONFIG, PAGE_TITLES, PIPELINE_CONFIG
+from extractor_profiler import extractor_profiler
+from html_pruner import prune_stats
+from logger_utils import get_logger
+from network_utils import network_manager
+from page_source import fetch_pages
+from parse_cache import parse_cache
+from utils import save_revid, save_to_file
+from wiki_api import iter_batches
+
+logger = get_logger(__name__)
+
+# 阶段结束标记
+_DONE = object()
+
+# 在解析进程中累计、需要合并回主进程的统计
+WORKER_STATS = (prune_stats, parse_cache, extractor_profiler)
+
+# 延后重试可能成功的失败：页面获取失败、保存失败、解析进程异常退出；
+# 解析和校验错误（提取函数异常、未能获取详情数据）重试也不会改变结果，直接记为最终失败
+RETRYABLE_ERRORS = (RequestException, OSError, BrokenProcessPool)
+
+def init_parse_worker():
+    """
+    解析进程的初始化函数
+
+    网络请求只在获取阶段发出：解析进程中的限速器、熔断器、缓存和网络指标都是独立的副本，
+    在这里发出请求会成倍提高请求速率，耗时也会被记为解析时间
+    """
+    network_manager.disable('解析进程不发出网络请求')
+
+def parse_entry(crawl_fn, item, page):
+    """
+    在解析进程中运行解析函数
+
+    Args:
+        crawl_fn: (条目, 页面内容) -> 详情数据，必须是模块顶层函数（需要传给子进程）
+        item: 条目
+        page: 页面内容
+
+    Returns:
+        tuple: (详情数据, 解析耗时, 本次解析的各项统计, 解析异常或None)
+    """
+    # 每个进程有自己的统计，清零后得到的就是本次解析的统计
+    for provider in WORKER_STATS:
+        provider.reset()
+    data, elapsed, error = run_crawl_fn(crawl_fn, item, page)
+    return data, elapsed, [provider.get_stats() for provider in WORKER_STATS], error
+
+def run_crawl_fn(crawl_fn, item, page):
+    """
+    运行解析函数，失败的解析同样计时
+
+    Returns:
+        tuple: (详情数据, 解析耗时, 解析异常或None)
+    """
+    started = time.perf_counter()
+    try:
+        return crawl_fn(item, page), time.perf_counter() - started, None
+    except Exception as e:
+        return None, time.perf_counter() - started, e
+
+def is_picklable(obj):
+    """对象能否传给子进程"""
+    try:
+        pickle.dumps(obj)
+    except Exception:
+        return False
+    return True
+
+class StageStats:
+    """单个阶段的耗时统计"""
+
+    def __init__(self):
+        self.items = 0
+        self.failed = 0  # 处理失败的条目（也计入items和busy）
+        self.busy = 0.0  # 处理耗时
+        self.blocked = 0.0  # 等待上游或下游的时间
+
+    def to_dict(self):
+        return {
+            'items': self.items,
+            'failed': self.failed,
+            'busy': round(self.busy, 3),
+            'blocked': round(self.blocked, 3)
+        }
+
+class CrawlPipeline:
+    """一轮详情页面抓取（获取 -> 解析 -> 写入）"""
+
+    def __init__(self, frontier, entity, file_path_fn, crawl_fn, workers=None):
+        """
+        Args:
+            frontier: 抓取队列
+            entity: 实体类型
+            file_path_fn: 条目 -> 输出文件路径
+            crawl_fn: (条目, 页面内容) -> 详情数据
+            workers: 解析进程数，默认使用配置；为0时在本进程的解析线程中直接解析
+        """
+        self.frontier = frontier
+        self.entity = entity
+        self.file_path_fn = file_path_fn
+        self.crawl_fn = crawl_fn
+        self.workers = PIPELINE_CONFIG['parse_workers'] if workers is None else workers
+        self.parse_queue = queue.Queue(maxsize=PIPELINE_CONFIG['parse_queue_size'])
+        self.write_queue = queue.Queue(maxsize=PIPELINE_CONFIG['write_queue_size'])
+        self.stats = {stage: StageStats() for stage in ('fetch', 'parse', 'write')}
+        self._fetch_error = None
+
+    def _put(self, target, entry, stats):
+        started = time.perf_counter()
+        target.put(entry)
+        stats.blocked += time.perf_counter() - started
+
+    def _get(self, source, stats):
+        started = time.perf_counter()
+        entry = source.get()
+        stats.blocked += time.perf_counter() - started
+        return entry
+
+    def _fetch_stage(self):
+        """获取阶段：按批次预取页面，逐个交给解析阶段"""
+        stats = self.stats['fetch']
+        title_fn = PAGE_TITLES[self.entity]
+        try:
+            for batch in iter_batches(self.frontier.pending(self.entity), PAGE_FETCH_CONFIG['batch_size']):
+                titles = [title_fn(item['name']) for _, item, _ in batch]
+                self.frontier.start(self.entity, [key for key, _, _ in batch])
+                timings = {}
+                started = time.perf_counter()
+                pages = fetch_pages(self.entity, titles, timings, max_retries=CRAWL_FRONTIER_CONFIG['inline_retries'])
+                stats.busy += time.perf_counter() - started
+                stats.items += len(titles)
+                logger.info(f"预取{self.entity}页面: {len(pages)}/{len(titles)}")
+
+                for (key, item, revid), title in zip(batch, titles):
+                    self._put(self.parse_queue, (key, item, revid, title, pages.get(title), timings.get(title)), stats)
+        except Exception as e:
+            # 已标记开始的条目会在下次运行时重新排队
+            self._fetch_error = e
+        finally:
+            self.parse_queue.put(_DONE)
+
+    def _dispatch_stage(self, executor):
+        """解析阶段：把页面提交给解析进程，按提交顺序交给写入阶段"""
+        stats = self.stats['parse']
+        while True:
+            entry = self._get(self.parse_queue, stats)
+            if entry is _DONE:
+                break
+            key, item, revid, title, page, fetch_time = entry
+            if page is None:
+                # 获取失败的页面留给延后重试，不在这里重新请求
+                future = Future()
+                future.set_exception(RequestException(f'页面获取失败: {title}'))
+            elif executor is None:
+                future = Future()
+                data, elapsed, error = run_crawl_fn(self.crawl_fn, item, page)
+                future.set_result((data, elapsed, None, error))
+            else:
+                try:
+                    future = executor.submit(parse_entry, self.crawl_fn, item, page)
+                except Exception as e:
+                    # 解析进程异常退出后进程池不再可用，剩余条目记为失败留给延后重试
+                    future = Future()
+                    future.set_exception(e)
+            # 写入队列有界，同时也限制了正在解析的页面数
+            self._put(self.write_queue, (key, item, revid, fetch_time, future), stats)
+        self.write_queue.put(_DONE)
+
+    def _write(self, key, item, revid, fetch_time, future):
+        """写入阶段：保存解析结果，记入抓取队列"""
+        stats = self.stats['write']
+        parse = self.stats['parse']
+        parse_time = None
+        try:
+            try:
+                data, parse_time, worker_stats, error = future.result()
+            except BrokenProcessPool:
+                # 解析进程异常退出，也是一次失败的解析
+                parse.items += 1
+                parse.failed += 1
+                raise
+            parse.items += 1
+            parse.busy += parse_time
+            if worker_stats:
+                for provider, result in zip(WORKER_STATS, worker_stats):
+                    provider.merge(result)
+            if error is not None:
+                parse.failed += 1
+                raise error
+            if not data:
+                parse.failed += 1
+                raise ValueError('未能获取详情数据')
+            started = time.perf_counter()
+            file_path = self.file_path_fn(item)
+            if not save_to_file(file_path, data):
+                raise OSError(f'保存失败: {file_path}')
+            if revid is not None:
+                save_revid(file_path, revid)
+            stats.busy += time.perf_counter() - started
+            stats.items += 1
+        except Exception as e:
+            self.frontier.fail(self.entity, key, e, fetch_time, parse_time, retryable=isinstance(e, RETRYABLE_ERRORS))
+            logger.warning(f"{self.entity} {key} 抓取失败: {e}")
+            return
+        self.frontier.complete(self.entity, key, fetch_time, parse_time)
+        logger.info(f"成功保存{self.entity}数据: {key}")
+
+    def run(self):
+        """
+        抓取队列中所有待抓取的条目
+
+        Returns:
+            dict: 阶段 -> {items, busy, blocked}
+        """
+        executor = None
+        if self.workers > 0 and not is_picklable(self.crawl_fn):
+            logger.warning(f"{self.entity}解析函数无法传给子进程（需要是模块顶层函数），改为在本进程内解析")
+            self.workers = 0
+        if self.workers > 0:
+            context = multiprocessing.get_context(PIPELINE_CONFIG['start_method'])
+            executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=init_parse_worker)
+
+        fetcher = threading.Thread(target=self._fetch_stage, name=f'{self.entity}-fetch', daemon=True)
+        dispatcher = threading.Thread(target=self._dispatch_stage, args=(executor,), name=f'{self.entity}-parse', daemon=True)
+        try:
+            fetcher.start()
+            dispatcher.start()
+            while True:
+                entry = self._get(self.write_queue, self.stats['write'])
+                if entry is _DONE:
+                    break
+                self._write(*entry)
+            fetcher.join()
+            dispatcher.join()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if self._fetch_error is not None:
+            raise self._fetch_error
+        self.log_stats()
+        return {stage: stats.to_dict() for stage, stats in self.stats.items()}
+
+    def log_stats(self):
+        """输出各阶段耗时"""
+        fetch, parse, write = self.stats['fetch'], self.stats['parse'], self.stats['write']
+        workers = f"{self.workers} 个进程" if self.workers > 0 else '本进程内'
+        logger.info(
+            f"{self.entity}流水线: 获取 {fetch.items} 个 {fetch.busy:.2f}s（等待下游 {fetch.blocked:.2f}s），"
+            f"解析 {parse.items} 个（失败 {parse.failed}）累计 {parse.busy:.2f}s（{workers}，排队等待 {parse.blocked:.2f}s），"
+            f"写入 {write.items} 个 {write.busy:.2f}s（等待上游 {write.blocked:.2f}s）"
+        )
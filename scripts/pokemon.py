@@ -1,71 +1,106 @@
 
 import re
-import time
-from bs4 import BeautifulSoup
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
+import soupsieve
+
+from config import DETAIL_FIELDS, PAGE_TITLES, WIKITEXT_CONFIG
+from crawl_runner import run_detail_crawl
+from extraction_schema import SKIP, Field, Schema, contains, equals, text_strip
+from extractor_profiler import profile_extractor, profile_page
 from fixed_data import FIXED_EVOLUTION_DATA, FIXED_EVOLUTION_POKEMONS
-from utils import save_image, save_to_file
+from html_pruner import make_pruned_soup, preprocess_markup
+from learnset_extractor import extract_learnsets
+from page_source import fetch_page, get_fetch_mode
+from parse_cache import parse_cache
+from parser_utils import SectionIndex
+from utils import load_from_file, save_image
+from wikitext_parser import extract_pokemon_fields, extract_pokemon_infobox, get_missing_fields
 
 PATH = './../data'
 
-def create_session_with_retries():
-  """创建带有重试机制的session"""
-  session = requests.Session()
-  
-  # 设置重试策略
-  retry_strategy = Retry(
-    total=3,  # 总共重试3次
-    backoff_factor=1,  # 重试间隔逐渐增加
-    status_forcelist=[429, 500, 502, 503, 504],  # 对这些状态码进行重试
-    allowed_methods=["HEAD", "GET", "OPTIONS"]  # 允许重试的HTTP方法
-  )
-  
-  adapter = HTTPAdapter(max_retries=retry_strategy)
-  session.mount("http://", adapter)
-  session.mount("https://", adapter)
-  
-  return session
+# 选择器在导入时编译一次
+FULLTABLE_SELECTOR = soupsieve.compile('.fulltable')
+TYPE_SPAN_SELECTOR = soupsieve.compile('span.type-box-9-text')
+CELL_LINK_SELECTOR = soupsieve.compile('td > a')
+CELL_TABLE_SELECTOR = soupsieve.compile('td > table')
+ROUNDY_CELL_SELECTOR = soupsieve.compile('td.roundy')
+NAME_TABLE_SELECTOR = soupsieve.compile('table.wiki-nametable')
+NAME_ROW_SELECTOR = soupsieve.compile('tr.varname1')
+NAME_CELL_SELECTOR = soupsieve.compile('td')
+
+def get_pokemon_data(name, index, name_en, name_jp, page=None):
+  if page is None:
+    page = fetch_page('pokemon', PAGE_TITLES['pokemon'](name))
+  if page is None:
+    print(f"无法获取宝可梦数据: {name}")
+    return None
+  if get_fetch_mode('pokemon') == 'wikitext':
+    data = parse_pokemon_wikitext(page, name, index, name_en, name_jp)
+  else:
+    # 页面内容和提取器版本都没变时直接使用缓存的解析结果
+    data = parse_cache.get_or_parse(
+      'pokemon', page, [name, index, name_en, name_jp],
+      lambda: parse_pokemon_page(page, name, index, name_en, name_jp)
+    )
+  if data is None:
+    print(f"无法获取宝可梦数据: {name}")
+    return None
+  print(f"成功获取宝可梦数据: {name}")
+  return data
 
-def safe_request(url, headers, max_retries=3, delay=2):
-  """安全的网络请求，带有重试机制"""
-  session = create_session_with_retries()
-  
-  for attempt in range(max_retries):
-    try:
-      print(f"正在请求: {url} (尝试 {attempt + 1}/{max_retries})")
-      response = session.get(url, headers=headers, timeout=30)
-      response.raise_for_status()
-      return response
-    except requests.exceptions.RequestException as e:
-      print(f"请求失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-      if attempt < max_retries - 1:
-        print(f"等待 {delay} 秒后重试...")
-        time.sleep(delay)
-        delay *= 2  # 指数退避
-      else:
-        print(f"所有重试都失败了，跳过: {url}")
-        raise e
-  
-def get_pokemon_data(name, index, name_en, name_jp):
-  headers = {
-    'Accept-Language': 'zh-Hans',
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+def crawl_pokemon(pokemon, page):
+  # 在解析进程中运行，需要是模块顶层函数
+  return get_pokemon_data(pokemon['name'], index=pokemon['index'], name_en=pokemon['name_en'], name_jp=pokemon['name_jp'], page=page)
+
+def parse_pokemon_wikitext(page, name, index, name_en, name_jp):
+  data = {
+    'name': name,
+    'index': index,
+    'name_en': name_en,
+    'name_jp': name_jp
   }
+  fields = extract_pokemon_fields(page.wikitext)
+  required = WIKITEXT_CONFIG['fields']['pokemon']
+  # wikitext无法提供的字段从获取阶段一并取回的HTML中解析，只运行这些字段的提取函数
+  missing = get_missing_fields(fields, required)
+  if missing:
+    if page.html is None:
+      # 没有HTML时不输出缺少字段的记录，否则保存后增量抓取会一直跳过它
+      return None
+    fields.update(parse_pokemon_page(page.html, name, index, name_en, name_jp, fields=missing))
+  if 'forms' in fields and 'forms' in missing:
+    fields['forms'] = merge_infobox(fields['forms'], extract_pokemon_infobox(page.wikitext))
+  for key in required:
+    if key in fields:
+      data[key] = fields[key]
+  return data
 
-  url = f"https://wiki.52poke.com/wiki/{name}"
-  try:
-    response = safe_request(url, headers)
-  except requests.exceptions.RequestException as e:
-    print(f"无法获取宝可梦数据: {name}, 错误: {e}")
-    return None
-  soup = BeautifulSoup(response.text, "html.parser")
+def merge_infobox(forms, infobox):
+  # 信息框参数直接给出的值覆盖HTML中的对应值，性别比例、经验值等模板计算的值仍来自HTML；
+  # 多形态宝可梦的信息框与各形态无法一一对应，只用HTML
+  if len(forms) != 1 or not infobox:
+    return forms
+  form = dict(forms[0])
+  for key, value in infobox.items():
+    if isinstance(value, dict):
+      # 捕获率的几率部分由HTML提供
+      if isinstance(form.get(key), dict):
+        form[key] = dict(form[key], **value)
+    else:
+      form[key] = value
+  return [form]
+
+# 输出字段的顺序
+POKEMON_FIELDS = DETAIL_FIELDS['pokemon']
 
-  for tag in soup.find_all(True):
-    if tag.get('style') and 'display:none' in tag.get('style'):
-      tag.decompose
+# 提取顺序，部分提取函数会修改soup（如移除已读取的节点），顺序保持不变
+EXTRACTION_ORDER = ('names', 'forms', 'profile', 'flavor_texts', 'evolution_chains', 'stats', 'moves', 'home_images')
+
+@profile_page(1)
+def parse_pokemon_page(html, name, index, name_en, name_jp, fields=None):
+  # 预处理时已移除脚本、样式、注释和导航框；去除脚本等只做一次，招式表快速提取使用同一份处理后的HTML
+  markup, bytes_dropped = preprocess_markup(html)
+  soup = make_pruned_soup(markup, bytes_dropped=bytes_dropped)
 
   data = {
     'name': name,
@@ -74,32 +109,36 @@ def get_pokemon_data(name, index, name_en, name_jp):
     'name_jp': name_jp
   }
 
-  names = get_form_names(soup)
-
-  lang_names = get_names(soup, name)
-  forms = get_form_infos(soup, names, name, index)
-  profile = get_profile(soup)
-  flavor_texts = get_flavor_texts(soup)
-  # 部分宝可梦进化链手动处理
-  evolution_chains = get_evolution_chains(soup, name) if name not in FIXED_EVOLUTION_POKEMONS else FIXED_EVOLUTION_DATA[name]
-  stats = get_stats(soup)
-  moves = get_moves(soup)
-  home_images = get_home_images(soup, name, index)
-  data['profile'] = profile
-  data['forms'] = forms
-  data['stats'] = stats
-  data['flavor_texts'] = flavor_texts
-  data['evolution_chains'] = evolution_chains
-  data['names'] = lang_names
-  data['moves'] = moves
-  data['home_images'] = home_images
-
-  # 添加延迟以避免对服务器造成压力
-  time.sleep(1)
-  print(f"成功获取宝可梦数据: {name}")
-  
+  # 章节索引只建立一次，各提取函数按id直接定位章节
+  sections = SectionIndex(soup)
+
+  extractors = {
+    'names': lambda: get_names(soup, name),
+    'forms': lambda: get_form_infos(soup, get_form_names(soup), name, index),
+    'profile': lambda: get_profile(soup, sections),
+    'flavor_texts': lambda: get_flavor_texts(soup, sections),
+    # 部分宝可梦进化链手动处理
+    'evolution_chains': lambda: get_evolution_chains(soup, name, sections) if name not in FIXED_EVOLUTION_POKEMONS else FIXED_EVOLUTION_DATA[name],
+    'stats': lambda: get_stats(soup, sections),
+    'moves': lambda: get_learnsets(markup, soup, sections),
+    'home_images': lambda: get_home_images(soup, name, index, sections),
+  }
+  # fields为None时提取全部字段
+  values = {key: extractors[key]() for key in EXTRACTION_ORDER if fields is None or key in fields}
+  for key in POKEMON_FIELDS:
+    if key in values:
+      data[key] = values[key]
+
   return data
 
+def get_learnsets(markup, soup, sections):
+  # 招式表优先用lxml快速提取，不可用或页面结构不符时使用BeautifulSoup；markup已经过预处理
+  moves = extract_learnsets(markup, preprocessed=True)
+  if moves is None:
+    moves = get_moves(soup, sections)
+  return moves
+
+@profile_extractor
 def get_form_names(soup):
   names = []
   form_table = soup.find('table', id='multi-pm-form-table')
@@ -113,6 +152,100 @@ def get_form_names(soup):
 
   return names
 
+# 形态信息：每个.fulltable单元格内的字段
+def get_types(spans):
+  return [span.text.strip() for span in spans]
+
+def get_genus(genus_el):
+  genus = SKIP
+  for el in genus_el:
+    genus = el.text.strip()
+  return genus
+
+def get_abilities(ability_el):
+  abilities = []
+  for a in ability_el[0].find_all('a'):
+    abilities.append({
+      'name': a.text.strip(),
+      'is_hidden': False
+    })
+  if len(ability_el) > 1:
+    for a in ability_el[1].find_all('a'):
+      abilities.append({
+        'name': a.text.strip(),
+        'is_hidden': True
+      })
+  return abilities
+
+def get_experience(experience_el):
+  experience = SKIP
+  for el in experience_el:
+    exp = el.select('td')[0].contents[0].text.strip()
+    speed = el.select('small')[0].text.strip().replace('（', '').replace('）', '') if el.select('small') else ''
+    experience = {
+      'number': exp,
+      'speed': speed
+    }
+  return experience
+
+FORM_CELL_SCHEMA = Schema(
+  Field('types', selector='a[title="属性"]',
+        path=lambda a, td: TYPE_SPAN_SELECTOR.select(td), process=get_types),
+  Field('genus', selector='a[title="分类"]',
+        path=lambda a, td: CELL_LINK_SELECTOR.select(td)[0], process=get_genus),
+  Field('ability', selector='a[title="特性"]',
+        path=lambda a, td: a.parent.find_next('table').find_all('td'), process=get_abilities),
+  Field('experience', selector='a[title="经验值"]',
+        path=lambda a, td: CELL_TABLE_SELECTOR.select(td), process=get_experience),
+  Field('height', text=contains('身高'),
+        path=lambda text, td: ROUNDY_CELL_SELECTOR.select(td)[0], process=text_strip),
+  Field('weight', text=contains('体重'),
+        path=lambda text, td: ROUNDY_CELL_SELECTOR.select(td)[0], process=text_strip),
+)
+
+# 形态信息：整个形态表格内的字段
+def get_gender_rate(gender_table):
+  male_el = gender_table.find('span', attrs={
+    'style': 'color:#00F;'
+  })
+  male = re.findall(r'\d+\.?\d*%', male_el.text.strip())[0] if male_el else None
+  female_el = gender_table.find('span', attrs={
+    'style': 'color:#FF6060;'
+  })
+  female = re.findall(r'\d+\.?\d*%', female_el.text.strip())[0] if female_el else None
+  return {
+    'male': male,
+    'female': female
+  } if male or female else None
+
+def get_catch_rate(catch_el):
+  num = catch_el.contents[0].strip()
+  rate = catch_el.find('span').text.strip() if catch_el.find('span') else None
+  return {
+    'number': num,
+    'rate': rate
+  }
+
+def get_egg_groups(raise_td_list):
+  return [a.text.strip().replace('群', '') for a in raise_td_list[0].find_all('a')]
+
+def next_table(a, form):
+  return a.parent.find_next('table')
+
+FORM_TABLE_SCHEMA = Schema(
+  Field('gender_rate', selector='a[title="宝可梦列表（按性别比例分类）"]',
+        path=next_table, process=get_gender_rate),
+  Field('shape', selector='a[title="宝可梦列表（按体形分类）"]',
+        path=lambda a, form: next_table(a, form).find('a'), process=lambda el: el.get('title')),
+  Field('color', selector='a[title="宝可梦列表（按颜色分类）"]',
+        path=lambda a, form: next_table(a, form).find('span'), process=text_strip),
+  Field('catch_rate', selector='a[title="捕获率"]',
+        path=lambda a, form: next_table(a, form).find('td'), process=get_catch_rate),
+  Field('egg_groups', selector='a[title="宝可梦培育"]',
+        path=lambda a, form: next_table(a, form).find_all('td'), process=get_egg_groups),
+)
+
+@profile_extractor
 def get_form_infos(soup, names, pokemon_name, pokemon_index):
   infos = []
   info_table_list = soup.select('table.roundy.a-r.at-c')
@@ -134,67 +267,11 @@ def get_form_infos(soup, names, pokemon_name, pokemon_index):
 
       image_name = f'{form_info["index"]}-{name}'
       form_info['image'] = f'{image_name}.png'
-      td_list = form.select('.fulltable')
-
-      for td in td_list:
-        # types
-        type_a = td.find('a', attrs={'title': '属性'})
-        if type_a:
-          type_spans = td.select('span.type-box-9-text')
-          types = []
-          for span in type_spans:
-            types.append(span.text.strip())
-          form_info['types'] = types
-        
-        # genus
-        genus_a = td.find('a', attrs={'title': '分类'})
-        if genus_a:
-          genus_el = td.select('td > a')[0]
-          for el in genus_el:
-            form_info['genus'] = el.text.strip()
-        
-        # ability
-        ability_a = td.find('a', attrs={'title': '特性'})
-        if ability_a:
-          ability_el = ability_a.parent.find_next('table').find_all('td')
-          abilities = []
-          for a in ability_el[0].find_all('a'):
-            name = a.text.strip()
-            abilities.append({
-              'name': name,
-              'is_hidden': False
-            })
-          if len(ability_el) > 1:
-            for a in ability_el[1].find_all('a'):
-              name = a.text.strip()
-              abilities.append({
-                'name': name,
-                'is_hidden': True
-              })
-          form_info['ability'] = abilities
-        
-        # experience
-        experience_a = td.find('a', attrs={'title': '经验值'})
-        if experience_a:
-          experience_el = td.select('td > table')
-
-          for el in experience_el:
-            exp = el.select('td')[0].contents[0].text.strip()
-            speed = el.select('small')[0].text.strip().replace('（', '').replace('）', '') if el.select('small') else ''
-            form_info['experience'] = {
-              'number': exp,
-              'speed': speed
-            }
-      
-        # height weight
-        height_a = td.find_all(string=lambda text: '身高' in text if text else False)
-        if height_a:
-          height = td.select('td.roundy')[0].text.strip()
-          form_info['height'] = height
-        weight_a = td.find_all(string=lambda text: '体重' in text if text else False)
-        if weight_a:
-          weight = td.select('td.roundy')[0].text.strip()
-          form_info['weight'] = weight
+
+      # types genus ability experience height weight
+      for td in FULLTABLE_SELECTOR.select(form):
+        for key, value in FORM_CELL_SCHEMA.extract(td):
+          form_info[key] = value
 
       # image
       img_el = form.select('.roundy.bgwhite.fulltable')[0].find('img')
@@ -202,109 +279,58 @@ def get_form_infos(soup, names, pokemon_name, pokemon_index):
       image_url = img_el.get('data-url')
       image_path = f'{PATH}/images/official/{image_name}.png'
       # save_image(image_path, f'https:{image_url}')
-      
-      # gender rate
-      gender_a = form.find('a', attrs={'title': '宝可梦列表（按性别比例分类）'})
-      if gender_a:
-        gender_table = gender_a.parent.find_next('table')
-        male_el = gender_table.find('span', attrs={
-          'style': 'color:#00F;'
-        })
-        male = re.findall(r'\d+\.?\d*%', male_el.text.strip())[0] if male_el else None
-        # male = re.search(r'\d+%', male_el.text.strip()).group() if male_el else None
-        female_el = gender_table.find('span', attrs={
-          'style': 'color:#FF6060;'
-        })
-        female = re.findall(r'\d+\.?\d*%', female_el.text.strip())[0] if female_el else None
-        # female = re.search(r'\d+%', female_el.text.strip()).group() if female_el else None
-        form_info['gender_rate'] = {
-          'male': male,
-          'female': female
-        } if male or female else None
-      infos.append(form_info)
-
-      # shape
-      shape_a = form.find('a', attrs={'title': '宝可梦列表（按体形分类）'})
-      if shape_a:
-        shape_el = shape_a.parent.find_next('table').find('a')
-        form_info['shape'] = shape_el.get('title')
-      
-      # color
-      color_a = form.find('a', attrs={'title': '宝可梦列表（按颜色分类）'})
-      if color_a:
-        color_el = color_a.parent.find_next('table').find('span')
-        form_info['color'] = color_el.text.strip()
-
-      # catch rate
-      catch_a = form.find('a', attrs={'title': '捕获率'})
-      if catch_a:
-        catch_el = catch_a.parent.find_next('table').find('td')
-        num = catch_el.contents[0].strip()
-        rate = catch_el.find('span').text.strip() if catch_el.find('span') else None
-        form_info['catch_rate'] = {
-          'number': num,
-          'rate': rate
-        }
 
-      # raise
-      raise_a = form.find('a', attrs={'title': '宝可梦培育'})
-      if raise_a:
-        egg_groups = []
-        raise_td_list = raise_a.parent.find_next('table').find_all('td')
-        egg_group_a_list = raise_td_list[0].find_all('a')
-        for a in egg_group_a_list:
-          egg_group = a.text.strip().replace('群', '')
-          egg_groups.append(egg_group)
-        form_info['egg_groups'] = egg_groups
+      # gender rate, shape, color, catch rate, egg groups
+      for key, value in FORM_TABLE_SCHEMA.extract(form):
+        form_info[key] = value
+      infos.append(form_info)
 
   return infos
 
+def get_name_cell_text(tr):
+  return NAME_CELL_SELECTOR.select(tr)[2].text.strip()
+
+def get_zh_hant_name(tr):
+  # 没有单元格时返回None，由get_names使用简体名
+  tds = NAME_CELL_SELECTOR.select(tr)
+  return tds[2].contents[0].strip() if tds else None
+
+# 各语言名称行：按行内文本识别语言，取第三个单元格
+# 法文行沿用原实现，同样按“英文”匹配
+NAME_ROW_SCHEMA = Schema(
+  Field('zh_hant', text=equals('任天堂'), path=lambda text, tr: tr, process=get_zh_hant_name),
+  Field('en', text=contains('英文'), path=lambda text, tr: tr, process=get_name_cell_text),
+  Field('fr', text=contains('英文'), path=lambda text, tr: tr, process=get_name_cell_text),
+  Field('es', text=contains('西班牙文'), path=lambda text, tr: tr, process=get_name_cell_text),
+  Field('de', text=contains('德文'), path=lambda text, tr: tr, process=get_name_cell_text),
+  Field('it', text=contains('意大利文'), path=lambda text, tr: tr, process=get_name_cell_text),
+)
+
+NAME_TABLE_SCHEMA = Schema(
+  Field('ja', selector='span[lang="ja"]', process=text_strip, required=True),
+  Field('ko', selector='span[lang="ko"]', process=text_strip, default=None),
+)
+
+@profile_extractor
 def get_names(soup, name):
   names = {
     'zh_hans': name
   }
-  name_table = soup.find('table', {
-    'class': 'wiki-nametable'
-  })
+  name_table = NAME_TABLE_SELECTOR.select_one(soup)
+
+  for tr in NAME_ROW_SELECTOR.select(name_table):
+    for key, value in NAME_ROW_SCHEMA.extract(tr):
+      names[key] = name if value is None else value
 
-  name_tr_list = name_table.select('tr.varname1')
-
-  for tr in name_tr_list:
-    tr_cn = tr.find_all(string=lambda text: '任天堂' == text if text else False)
-    tr_en = tr.find_all(string=lambda text: '英文' in text if text else False)
-    tr_fr = tr.find_all(string=lambda text: '英文' in text if text else False)
-    tr_es = tr.find_all(string=lambda text: '西班牙文' in text if text else False)
-    tr_it = tr.find_all(string=lambda text: '意大利文' in text if text else False)
-    tr_de = tr.find_all(string=lambda text: '德文' in text if text else False)
-
-    if tr_cn:
-      name_zh_hant = tr.select('td')[2].contents[0].strip() if tr.select('td') else name
-      names['zh_hant'] = name_zh_hant
-    if tr_en:
-      name_en = tr.select('td')[2].text.strip()
-      names['en'] = name_en
-    if tr_fr:
-      name_fr = tr.select('td')[2].text.strip()
-      names['fr'] = name_fr
-    if tr_es:
-      name_es = tr.select('td')[2].text.strip()
-      names['es'] = name_es
-    if tr_de:
-      name_de = tr.select('td')[2].text.strip()
-      names['de'] = name_de
-    if tr_it:
-      name_it = tr.select('td')[2].text.strip()
-      names['it'] = name_it
-
-  name_ja = name_table.find('span', attrs={'lang': 'ja'}).text.strip()
-  names['ja'] = name_ja
-  name_ko = name_table.find('span', attrs={'lang': 'ko'})
-  names['ko'] = name_ko.text.strip() if name_ko else None
+  for key, value in NAME_TABLE_SCHEMA.extract(name_table):
+    names[key] = value
   return names
 
-def get_profile(soup):
+@profile_extractor
+def get_profile(soup, sections=None):
+  sections = sections or SectionIndex(soup)
   # tag_span = soup.find('span', id=lambda x: x in ['概述', '概要'])
-  profile_p = soup.find('span', id=lambda x: x in ['概述', '基本介绍']).parent.find_next_sibling('p')
+  profile_p = sections.heading('概述', '基本介绍').find_next_sibling('p')
   profile_text = ''
   while profile_p and profile_p.name == 'p':
     for sup in profile_p.find_all('sup'):
@@ -314,10 +340,12 @@ def get_profile(soup):
     profile_p = profile_p.find_next_sibling()
   return profile_text
 
-def get_flavor_texts(soup):
+@profile_extractor
+def get_flavor_texts(soup, sections=None):
+  sections = sections or SectionIndex(soup)
   texts = []
   # flavor_table = soup.find('span', id='图鉴介绍').parent.find_next_sibling()
-  flavor_table = soup.find('span', id=lambda x: x in ['图鉴介绍', '圖鑑介绍', '圖鑑介紹']).parent.find_next_sibling()
+  flavor_table = sections.heading('图鉴介绍', '圖鑑介绍', '圖鑑介紹').find_next_sibling()
   generation_th_list = flavor_table.select('th.roundytop-5')
 
   for th in generation_th_list:
@@ -367,8 +395,10 @@ def get_flavor_texts(soup):
   
   return texts
 
-def get_evolution_chains(soup, name):
-  evo_tag = soup.find('span', id=lambda x: x in ['进化', '進化'])
+@profile_extractor
+def get_evolution_chains(soup, name, sections=None):
+  sections = sections or SectionIndex(soup)
+  evo_tag = sections.find('进化', '進化')
   if not evo_tag:
     return [{'name': name, 'stage': '不进化', "text": None, "back_text": None, "from": None}]
   tag_h1 = evo_tag.parent
@@ -512,8 +542,10 @@ def has_multiple_forms(table):
       flag_count += 1
   return flag_count > 1
 
-def get_stats(soup):
-    stats_tag = soup.find('span', id='种族值').parent
+@profile_extractor
+def get_stats(soup, sections=None):
+    sections = sections or SectionIndex(soup)
+    stats_tag = sections.heading('种族值')
     table_el = stats_tag.find_next('table')
     table_list = []
     stats_form_names = []
@@ -563,7 +595,9 @@ def get_stats(soup):
     return stats
 
 
-def get_moves(soup):
+@profile_extractor
+def get_moves(soup, sections=None):
+  sections = sections or SectionIndex(soup)
   moves = []
   all_learned_moves = []
   all_machine_moves = []
@@ -572,7 +606,7 @@ def get_moves(soup):
   learned_form_names = []
   machine_form_names = []
 
-  learned_table_el = soup.find('span', id="可学会的招式").parent.find_next('table')
+  learned_table_el = sections.heading("可学会的招式").find_next('table')
   if 'fulltable' in learned_table_el.get('class'):
     form_names_els = learned_table_el.find_all('span', class_='toggle-p')
     for sp in form_names_els:
@@ -618,7 +652,7 @@ def get_moves(soup):
     all_learned_moves.append(result)
 
 
-  machine_table_el = soup.find('span', id="能使用的招式学习器").parent.find_next('table')
+  machine_table_el = sections.heading("能使用的招式学习器").find_next('table')
   if 'fulltable' in machine_table_el.get('class'):
     form_names_els = machine_table_el.find_all('span', class_='toggle-p')
     for sp in form_names_els:
@@ -667,9 +701,11 @@ def get_moves(soup):
     "machine": all_machine_moves
   }
 
-def get_home_images(soup, name, index):
+@profile_extractor
+def get_home_images(soup, name, index, sections=None):
+  sections = sections or SectionIndex(soup)
   home_images = []
-  tag_el = soup.find('span', id="形象").parent.find_next_sibling('div')
+  tag_el = sections.heading("形象").find_next_sibling('div')
 
   table = tag_el.find('a', title="Pokémon HOME").parent.parent.parent
   tr_list = table.find_all('tr', class_="bgwhite")
@@ -711,13 +747,13 @@ def get_home_images(soup, name, index):
   return home_images
 
 if __name__ == '__main__':
-  name = '尼多朗'
-  data = get_pokemon_data(name, index='111', name_en='1', name_jp='1')
-  if data:
-    save_to_file(f'{PATH}/pokemon/{name}.json', data)
-    print(f"成功保存宝可梦数据: {name}")
-  else:
-    print(f"无法获取宝可梦数据，跳过保存: {name}")
+  pokemon_list = load_from_file(f'{PATH}/pokemon_list.json') or []
+  run_detail_crawl(
+    'pokemon',
+    pokemon_list,
+    lambda pokemon: f"{PATH}/pokemon/{pokemon['index']}-{pokemon['name']}.json",
+    crawl_pokemon
+  )
 
 
 # 测试： 皮卡丘，呆呆兽，小拳石，九尾, 无畏小子，宝宝丁，阿尔宙斯，霜奶仙, 多边兽2型,太乐巴戈斯
\ No newline at end of file
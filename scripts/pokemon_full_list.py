@@ -1,20 +1,52 @@
 
 
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-import requests
 from fixed_data import NEW_NAMES
+from parser_utils import make_soup
 from utils import save_to_file
 
 
 PATH = './../data'
 
+def parse_pokemon_full_list(html, get_icon_position):
+  """get_icon_position: 图标的class -> 其background-position"""
+  soup = make_soup(html)
+
+  pokemon_full_list = []
+
+  table_list = soup.find_all('table', class_="eplist")
+
+  for table in table_list:
+    generation = table.find_previous('h2').text.strip().replace("宝可梦", "")
+    tr_list = table.find('tbody').find_all('tr')
+    for tr in tr_list:
+      if tr.get("data-type") is not None:
+        td_list = tr.find_all('td')
+        idx = td_list[0].text.strip().replace("#", "")
+        name = f'''{td_list[3].find('a').text}-{td_list[3].find('small').text}''' if td_list[3].find('small') else td_list[3].find('a').text
+        name_jp = td_list[4].text.strip()
+        name_en = td_list[5].text.strip()
+        types = tr.get('data-type').replace('惡', '恶').replace("格鬥", "格斗").strip().split(':')
+        image_class = td_list[1].find('span').get('class')[-1]
+
+        icon_position = get_icon_position(image_class)
+        pokemon = {
+          "index": idx,
+          "name": NEW_NAMES.get(name, name),
+          "name_jp": name_jp,
+          "name_en": name_en,
+          "generation": generation,
+          "types": [x for x in types if x != ""],
+          "meta": {
+            "icon_position": icon_position
+          }
+        }
+        pokemon_full_list.append(pokemon)
+  return pokemon_full_list
+
 def get_pokemon_full_list():
-  headers = {
-    'Accept-Language': 'zh-Hans'
-  }
   url = 'https://wiki.52poke.com/wiki/宝可梦列表（按全国图鉴编号）'
 
   # 配置Chrome选项以避免沙箱问题
@@ -24,48 +56,20 @@ def get_pokemon_full_list():
   chrome_options.add_argument("--disable-web-security")
   chrome_options.add_argument("--allow-running-insecure-content")
   chrome_options.add_argument("--headless")  # 无头模式运行
+  # 与其他脚本一致请求简体中文页面
+  chrome_options.add_argument("--lang=zh-CN")
+  chrome_options.add_experimental_option('prefs', {'intl.accept_languages': 'zh-Hans'})
   
   driver = webdriver.Chrome(options=chrome_options)
   
   try:
+    # 浏览器已加载该页面，直接解析其DOM，不再重复请求
     driver.get(url)
-
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    pokemon_full_list = []
-
-    table_list = soup.find_all('table', class_="eplist")
-
-    for table in table_list:
-      generation = table.find_previous('h2').text.strip().replace("宝可梦", "")
-      tr_list = table.find('tbody').find_all('tr')
-      for tr in tr_list:
-        if tr.get("data-type") is not None:
-          td_list = tr.find_all('td')
-          idx = td_list[0].text.strip().replace("#", "")
-          name = f'''{td_list[3].find('a').text}-{td_list[3].find('small').text}''' if td_list[3].find('small') else td_list[3].find('a').text
-          name_jp = td_list[4].text.strip()
-          name_en = td_list[5].text.strip()
-          types = tr.get('data-type').replace('惡', '恶').replace("格鬥", "格斗").strip().split(':')
-          image_class = td_list[1].find('span').get('class')[-1]
-
-          image_style = driver.find_elements(By.CLASS_NAME, image_class)[0]
-          icon_position = image_style.value_of_css_property("background-position")
-          pokemon = {
-            "index": idx,
-            "name": NEW_NAMES.get(name, name),
-            "name_jp": name_jp,
-            "name_en": name_en,
-            "generation": generation,
-            "types": [x for x in types if x != ""],
-            "meta": {
-              "icon_position": icon_position
-            }
-          }
-          pokemon_full_list.append(pokemon)
-
+    # 图标位置由样式表决定，需从浏览器中读取计算后的样式
+    pokemon_full_list = parse_pokemon_full_list(
+      driver.page_source,
+      lambda image_class: driver.find_elements(By.CLASS_NAME, image_class)[0].value_of_css_property("background-position"),
+    )
     save_to_file(f'{PATH}/pokemon_full_list.json', pokemon_full_list)
     return pokemon_full_list
     
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+自适应限速模块
+令牌桶限速器，按AIMD（加性增、乘性减）根据服务器反馈调整请求速率
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from config import RATE_LIMIT_CONFIG
+from logger_utils import get_logger
+
+logger = get_logger(__name__)
+
+def parse_retry_after(value):
+    """
+    解析Retry-After响应头
+
+    Args:
+        value: 响应头的值（秒数或HTTP日期）
+
+    Returns:
+        float: 需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+class AdaptiveRateLimiter:
+    """自适应令牌桶限速器（线程安全，所有请求共享）"""
+
+    def __init__(self, initial_rate=None, min_rate=None, max_rate=None, burst=None,
+                 increase_step=None, decrease_factor=None, pressure_status_codes=None):
+        self.rate = initial_rate or RATE_LIMIT_CONFIG['initial_rate']
+        self.min_rate = min_rate or RATE_LIMIT_CONFIG['min_rate']
+        self.max_rate = max_rate or RATE_LIMIT_CONFIG['max_rate']
+        self.burst = burst or RATE_LIMIT_CONFIG['burst']
+        self.increase_step = increase_step or RATE_LIMIT_CONFIG['increase_step']
+        self.decrease_factor = decrease_factor or RATE_LIMIT_CONFIG['decrease_factor']
+        self.pressure_status_codes = set(pressure_status_codes or RATE_LIMIT_CONFIG['pressure_status_codes'])
+        self.enabled = RATE_LIMIT_CONFIG['enabled']
+
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        # 服务器要求暂停（Retry-After）时，所有请求都等到此时刻之后
+        self.blocked_until = 0.0
+        self.total_sleep_time = 0.0
+        self.throttle_count = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """按当前速率补充令牌"""
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    def acquire(self):
+        """获取一个令牌，必要时阻塞等待"""
+        if not self.enabled:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def sleep(self, seconds):
+        """休眠并计入总休眠时间"""
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        with self._lock:
+            self.total_sleep_time += seconds
+
+    def on_response(self, status_code, headers=None):
+        """
+        根据响应状态调整速率
+
+        Args:
+            status_code: HTTP状态码
+            headers: 响应头
+        """
+        if status_code in self.pressure_status_codes:
+            retry_after = parse_retry_after(headers.get('Retry-After')) if headers else None
+            self._decrease(retry_after)
+            logger.info(f"服务器压力信号 {status_code}，请求速率降至 {self.rate:.2f}/秒")
+        elif status_code < 400:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_error(self):
+        """连接错误、超时等同样视为压力信号"""
+        self._decrease()
+
+    def _decrease(self, retry_after=None):
+        """乘性减速，并按Retry-After暂停所有请求"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.tokens = min(self.tokens, 0.0)
+            self.throttle_count += 1
+            if retry_after:
+                retry_after = min(retry_after, RATE_LIMIT_CONFIG['max_retry_after'])
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def get_stats(self):
+        """获取限速统计信息"""
+        with self._lock:
+            return {
+                'current_rate': round(self.rate, 3),
+                'total_sleep_time': round(self.total_sleep_time, 3),
+                'throttle_count': self.throttle_count
+            }
+
+# 全局限速器实例
+rate_limiter = AdaptiveRateLimiter()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+表格提取工具模块
+招式页面的等级/招式学习器/遗传/教授表和特性页面的宝可梦表结构相同：章节标题后的表格中，
+每个tr.bgwhite是一条记录。这里统一定位表格并逐行转换为记录，每行只遍历一次收集单元格，
+重复出现的字符串（宝可梦名、属性、特性名等）通过sys.intern共享
+"""
+import sys
+
+from bs4 import Tag
+
+def find_section_table(sections, ids, heading_names=None):
+    """
+    定位章节标题后的表格
+
+    Args:
+        sections: SectionIndex对象
+        ids: 章节span可能的id（取文档中最先出现的）
+        heading_names: 标题元素的标签名，为None时取span的父元素
+
+    Returns:
+        表格元素，章节不存在时返回None
+
+    Raises:
+        ValueError: 章节存在但后面没有表格
+    """
+    span = sections.find(*ids)
+    if span is None:
+        return None
+    heading = span.find_parent(heading_names) if heading_names else span.parent
+    table = heading.find_next_sibling('table')
+    if table is None:
+        raise ValueError(f"章节后没有表格: {span['id']}")
+    return table
+
+def get_cells(tr):
+    """
+    遍历一次行，按文档顺序收集单元格（与find_all('td')、find_all('th')结果相同）
+
+    Returns:
+        tuple: (td列表, th列表)
+    """
+    tds = []
+    ths = []
+    for node in tr.descendants:
+        if isinstance(node, Tag):
+            if node.name == 'td':
+                tds.append(node)
+            elif node.name == 'th':
+                ths.append(node)
+    return tds, ths
+
+def iter_tags(element, name):
+    """按文档顺序遍历后代中指定标签名的元素（与find_all(name)结果相同，省去匹配器的开销）"""
+    for node in element.descendants:
+        if isinstance(node, Tag) and node.name == name:
+            yield node
+
+def has_class(tag, class_name):
+    classes = tag.get('class')
+    return classes is not None and class_name in classes
+
+def cell_text(cell):
+    """单元格文本（去除首尾空白，驻留）"""
+    return sys.intern(cell.text.strip())
+
+def joined_links(cell, separator='-', remove=None):
+    """
+    单元格中所有链接文本的拼接（驻留）
+
+    Args:
+        cell: 单元格
+        separator: 分隔符
+        remove: 需要从链接文本中删除的字符
+    """
+    texts = [a.text.strip() for a in iter_tags(cell, 'a')]
+    if remove:
+        texts = [text.replace(remove, '') for text in texts]
+    return sys.intern(separator.join(texts))
+
+def extract_records(scope, build_record, row_class='bgwhite'):
+    """
+    表格逐行转换为记录
+
+    Args:
+        scope: 表格或tbody
+        build_record: (td列表, th列表) -> 记录
+        row_class: 记录行的class
+
+    Returns:
+        list: 记录列表
+    """
+    return [build_record(*get_cells(tr)) for tr in iter_tags(scope, 'tr') if has_class(tr, row_class)]
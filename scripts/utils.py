@@ -9,6 +9,7 @@ import json
 import os
 from datetime import datetime
 
+from config import INCREMENTAL_CONFIG
 from logger_utils import get_logger
 from network_utils import download_file
 
@@ -127,6 +128,68 @@ def should_skip_existing_file(file_path, max_age_hours=24):
     age_hours = (datetime.now() - mtime).total_seconds() / 3600
     return age_hours <= max_age_hours
 
+def get_revid_path(file_path):
+    """
+    获取输出文件对应的修订版本号文件路径
+    
+    Args:
+        file_path: 输出JSON文件路径
+        
+    Returns:
+        str: 修订版本号文件路径
+    """
+    return f"{file_path}{INCREMENTAL_CONFIG['revid_suffix']}"
+
+def load_revid(file_path):
+    """
+    读取输出文件对应的修订版本号
+    
+    Args:
+        file_path: 输出JSON文件路径
+        
+    Returns:
+        int: 修订版本号，不存在时返回None
+    """
+    try:
+        with open(get_revid_path(file_path), 'r', encoding="utf8") as file:
+            return int(file.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def save_revid(file_path, revid):
+    """
+    保存输出文件对应的修订版本号
+    
+    Args:
+        file_path: 输出JSON文件路径
+        revid: 修订版本号
+        
+    Returns:
+        bool: 保存是否成功
+    """
+    try:
+        with open(get_revid_path(file_path), 'w', encoding="utf8") as file:
+            file.write(str(revid))
+        return True
+    except Exception as e:
+        logger.error(f"修订版本号保存失败: {file_path} - {e}")
+        return False
+
+def should_skip_by_revid(file_path, latest_revid):
+    """
+    判断是否应该跳过现有文件（基于页面修订版本号）
+    
+    Args:
+        file_path: 输出JSON文件路径
+        latest_revid: 页面当前最新的修订版本号
+        
+    Returns:
+        bool: 文件存在且页面未修改时返回True
+    """
+    if latest_revid is None or not file_exists(file_path):
+        return False
+    return load_revid(file_path) == latest_revid
+
 def save_image(file_path, url, headers=None):
     """
     保存图片文件（使用统一的网络工具）
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+MediaWiki API工具模块
+通过api.php批量查询页面信息
+"""
+from urllib.parse import urlencode
+
+from config import NETWORK_CONFIG, WIKI_API_CONFIG
+from logger_utils import get_logger
+from network_utils import safe_request
+
+logger = get_logger(__name__)
+
+def build_api_url(params):
+    """
+    构造API请求URL
+
+    Args:
+        params: 查询参数
+
+    Returns:
+        str: 完整的API URL
+    """
+    query = {'format': 'json', 'formatversion': '2'}
+    query.update(params)
+    return f"{WIKI_API_CONFIG['api_url']}?{urlencode(query)}"
+
+def api_query(params):
+    """
+    发起API查询
+
+    Args:
+        params: 查询参数
+
+    Returns:
+        dict: 返回结果中的query部分，失败时返回None
+    """
+    headers = NETWORK_CONFIG['headers'].copy()
+    headers['Accept'] = 'application/json'
+    response = safe_request(build_api_url(params), headers)
+    if not response:
+        return None
+    try:
+        result = response.json()
+    except ValueError as e:
+        logger.error(f"API返回内容无法解析: {e}")
+        return None
+    if 'error' in result:
+        logger.error(f"API错误: {result['error']}")
+        return None
+    return result.get('query', {})
+
+def resolve_titles(query, titles):
+    """
+    将原始标题映射到API返回的最终标题（处理标准化与重定向）
+
+    Args:
+        query: API返回的query部分
+        titles: 原始标题列表
+
+    Returns:
+        dict: 原始标题 -> 最终标题
+    """
+    normalized = {item['from']: item['to'] for item in query.get('normalized', [])}
+    redirects = {item['from']: item['to'] for item in query.get('redirects', [])}
+
+    resolved = {}
+    for title in titles:
+        target = normalized.get(title, title)
+        target = redirects.get(target, target)
+        resolved[title] = target
+    return resolved
+
+def iter_batches(items, batch_size=None):
+    """按API单次上限切分标题列表"""
+    batch_size = batch_size or WIKI_API_CONFIG['batch_size']
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+def get_latest_revids(titles):
+    """
+    批量查询页面的最新修订版本号
+
+    Args:
+        titles: 页面标题列表
+
+    Returns:
+        dict: 标题 -> 最新revid，页面不存在或查询失败的标题不在结果中
+    """
+    titles = list(dict.fromkeys(titles))
+    revids = {}
+
+    for batch in iter_batches(titles):
+        query = api_query({
+            'action': 'query',
+            'prop': 'revisions',
+            'rvprop': 'ids',
+            'redirects': '1',
+            'titles': '|'.join(batch)
+        })
+        if query is None:
+            logger.warning(f"修订版本查询失败，{len(batch)} 个页面将按变更处理")
+            continue
+
+        page_revids = {}
+        for page in query.get('pages', []):
+            if page.get('missing') or not page.get('revisions'):
+                continue
+            page_revids[page['title']] = page['revisions'][0]['revid']
+
+        for title, target in resolve_titles(query, batch).items():
+            if target in page_revids:
+                revids[title] = page_revids[target]
+
+    logger.info(f"查询修订版本: {len(titles)} 个页面，成功 {len(revids)} 个")
+    return revids
+
+def get_page_wikitexts(titles):
+    """
+    批量获取页面最新修订版本的wikitext
+
+    Args:
+        titles: 页面标题列表
+
+    Returns:
+        dict: 标题 -> {'revid': 修订版本号, 'content': wikitext}，获取失败的标题不在结果中
+    """
+    titles = list(dict.fromkeys(titles))
+    pages = {}
+
+    for batch in iter_batches(titles):
+        query = api_query({
+            'action': 'query',
+            'prop': 'revisions',
+            'rvprop': 'ids|content',
+            'rvslots': 'main',
+            'redirects': '1',
+            'titles': '|'.join(batch)
+        })
+        if query is None:
+            continue
+
+        page_contents = {}
+        for page in query.get('pages', []):
+            if page.get('missing') or not page.get('revisions'):
+                continue
+            revision = page['revisions'][0]
+            slot = revision.get('slots', {}).get('main', {})
+            # 内容过大时API会省略部分页面的内容，这些页面留给调用方单独获取
+            if 'content' not in slot:
+                continue
+            page_contents[page['title']] = {
+                'revid': revision['revid'],
+                'content': slot['content']
+            }
+
+        for title, target in resolve_titles(query, batch).items():
+            if target in page_contents:
+                pages[title] = page_contents[target]
+
+    return pages
+
+def build_raw_url(title):
+    """
+    构造action=raw请求URL
+
+    Args:
+        title: 页面标题
+
+    Returns:
+        str: 获取页面原始wikitext的URL
+    """
+    return f"{WIKI_API_CONFIG['index_url']}?{urlencode({'title': title, 'action': 'raw'})}"
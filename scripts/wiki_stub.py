@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+本地MediaWiki模拟服务器
+在本机随机端口上提供api.php（修订版本、页面源码、解析API）、index.php?action=raw、/wiki/<标题> 页面
+和支持Range请求的静态文件，供增量更新、断点续传等功能的测试和页面获取方式的基准测试使用，不访问真实站点
+"""
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from config import NETWORK_CONFIG, WIKI_API_CONFIG
+
+class WikiStub:
+    """
+    模拟服务器
+
+    Args:
+        pages: 标题 -> {'revid': 修订版本号, 'html': 文章页面HTML, 'wikitext': 页面源码, 'text': 解析API返回的正文HTML}
+        redirects: 标题 -> 重定向目标
+        latency: 每个请求的模拟延迟（秒）
+        files: 路径 -> 文件内容（bytes）
+    """
+
+    def __init__(self, pages=None, redirects=None, latency=0, files=None):
+        self.pages = pages or {}
+        self.redirects = redirects or {}
+        self.files = files or {}
+        self.latency = latency
+        # 为True时api.php返回错误
+        self.api_error = False
+        # 收到的请求：(路径, 查询参数)
+        self.requests = []
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextmanager
+    def patch_config(self):
+        """把文章页面、api.php和index.php的地址临时指向模拟服务器"""
+        saved = (NETWORK_CONFIG['base_url'], WIKI_API_CONFIG['api_url'], WIKI_API_CONFIG['index_url'])
+        NETWORK_CONFIG['base_url'] = f'{self.base_url}/wiki/'
+        WIKI_API_CONFIG['api_url'] = f'{self.base_url}/api.php'
+        WIKI_API_CONFIG['index_url'] = f'{self.base_url}/index.php'
+        try:
+            yield self
+        finally:
+            NETWORK_CONFIG['base_url'], WIKI_API_CONFIG['api_url'], WIKI_API_CONFIG['index_url'] = saved
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = []
+            self.bytes_sent = 0
+
+    def count_requests(self, path=None):
+        """收到的请求数，path为None时统计所有路径"""
+        with self._lock:
+            return sum(1 for request_path, _ in self.requests if path is None or request_path == path)
+
+    def resolve(self, title):
+        """
+        Returns:
+            tuple: (最终标题, 页面数据或None)
+        """
+        title = self.redirects.get(title, title)
+        return title, self.pages.get(title)
+
+    def query_revisions(self, params):
+        titles = params.get('titles', '').split('|')
+        with_content = 'content' in params.get('rvprop', '').split('|')
+        query = {}
+        redirects = [{'from': title, 'to': self.redirects[title]} for title in titles if title in self.redirects]
+        if redirects:
+            query['redirects'] = redirects
+        pages = []
+        for title in dict.fromkeys(titles):
+            title, page = self.resolve(title)
+            if page is None:
+                pages.append({'title': title, 'missing': True})
+                continue
+            revision = {'revid': page['revid']}
+            if with_content:
+                revision['slots'] = {'main': {'content': page.get('wikitext', '')}}
+            pages.append({'title': title, 'revisions': [revision]})
+        query['pages'] = pages
+        return {'batchcomplete': True, 'query': query}
+
+    def handle(self, path, params):
+        """
+        Returns:
+            tuple: (状态码, Content-Type, 响应内容)
+        """
+        if path == '/api.php':
+            if self.api_error:
+                return 200, 'application/json', {'error': {'code': 'internal_api_error', 'info': 'stub'}}
+            if params.get('action') == 'parse':
+                title, page = self.resolve(params.get('page', ''))
+                if page is None:
+                    return 200, 'application/json', {'error': {'code': 'missingtitle'}}
+                return 200, 'application/json', {'parse': {'title': title, 'text': page.get('text', page.get('html', ''))}}
+            if params.get('prop') == 'revisions':
+                return 200, 'application/json', self.query_revisions(params)
+            return 400, 'application/json', {'error': {'code': 'badrequest'}}
+        if path == '/index.php' and params.get('action') == 'raw':
+            _, page = self.resolve(params.get('title', ''))
+            if page is None:
+                return 404, 'text/plain', ''
+            return 200, 'text/x-wiki; charset=UTF-8', page.get('wikitext', '')
+        if path.startswith('/wiki/'):
+            _, page = self.resolve(unquote(path[len('/wiki/'):]))
+            if page is None:
+                return 404, 'text/html', ''
+            return 200, 'text/html; charset=UTF-8', page.get('html', '')
+        return 404, 'text/plain', ''
+
+    def serve_file(self, path, range_header):
+        """
+        按Range请求头返回文件内容
+
+        Returns:
+            tuple: (状态码, 响应头字典, 响应内容)
+        """
+        data = self.files[path]
+        match = re.match(r'bytes=(\d+)-$', range_header or '')
+        if match is None:
+            return 200, {'Accept-Ranges': 'bytes'}, data
+        start = int(match.group(1))
+        if start >= len(data):
+            return 416, {'Content-Range': f'bytes */{len(data)}'}, b''
+        return 206, {'Content-Range': f'bytes {start}-{len(data) - 1}/{len(data)}'}, data[start:]
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                with stub._lock:
+                    stub.requests.append((parts.path, params))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if parts.path in stub.files:
+                    status, headers, data = stub.serve_file(parts.path, self.headers.get('Range'))
+                    self.send_data(status, headers, data)
+                    return
+                status, content_type, body = stub.handle(parts.path, params)
+                if not isinstance(body, str):
+                    body = json.dumps(body, ensure_ascii=False)
+                self.send_data(status, {'Content-Type': content_type}, body.encode('utf8'))
+
+            def send_data(self, status, headers, data):
+                with stub._lock:
+                    stub.bytes_sent += len(data)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
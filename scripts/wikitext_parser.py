@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+wikitext解析模块
+直接解析页面源码中的模板参数和正文段落，产出与HTML解析逐字相同的字段；
+源码无法逐字还原的字段（含模板或列表的说明、图片、进化链等）留给HTML解析。
+宝可梦信息框中的属性、特性、捕获率、蛋群等参数按形态信息的键提取，形态信息中其余经过模板计算的值
+（性别比例、经验值、体形、捕获几率）仍由HTML提供
+"""
+import re
+
+from config import WIKITEXT_CONFIG
+
+# 模板名称（简繁两种写法）
+STATS_TEMPLATES = ('種族值', '种族值')
+POKEMON_INFOBOX_TEMPLATES = ('寶可夢信息框', '宝可梦信息框')
+
+# 种族值模板参数 -> 输出字段
+STATS_PARAMS = {
+    'hp': ('HP',),
+    'attack': ('攻击', '攻擊'),
+    'defense': ('防御', '防禦'),
+    'sp_attack': ('特攻',),
+    'sp_defense': ('特防',),
+    'speed': ('速度',)
+}
+
+# 数值参数（身高、体重、捕获率）
+NUMBER_RE = re.compile(r'^\d+(?:\.\d+)?$')
+
+# 招式/特性页面中效果说明所在的章节
+MOVE_EFFECT_SECTIONS = ('招式附加效果',)
+ABILITY_EFFECT_SECTIONS = ('特性效果', '游戏中')
+
+COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+REF_RE = re.compile(r'<ref[^>/]*/>|<ref[^>]*>.*?</ref>', re.S)
+FILE_LINK_RE = re.compile(r'\[\[(?:File|Image|文件|檔案|图像):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]', re.I)
+LINK_RE = re.compile(r'\[\[(?:[^\[\]|]*\|)?([^\[\]]*)\]\]')
+EXTERNAL_LINK_RE = re.compile(r'\[https?://[^\s\]]+\s*([^\]]*)\]')
+BR_RE = re.compile(r'<br\s*/?>', re.I)
+TAG_RE = re.compile(r'</?[a-zA-Z][^>]*>')
+HEADING_RE = re.compile(r'^(={2,6})\s*(.*?)\s*\1\s*$', re.M)
+
+# 以这些符号开头的行不是普通段落（列表、缩进、表格、预格式、分隔线、标题）
+PARAGRAPH_BREAKERS = (' ', '\t', '*', '#', ':', ';', '{|', '|', '!', '----', '=')
+# 渲染文本与源码不同的语法：模板、标签、字符实体、魔术字、签名、简繁转换标记
+NON_PLAIN_TOKENS = ('{{', '}}', '<', '>', '&', '__', '~~~', '-{', '}-', "''''")
+
+class WikiTemplate:
+    """模板调用及其参数"""
+
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params
+
+    def get(self, *keys):
+        """按顺序取第一个非空参数（已去除标记）"""
+        for key in keys:
+            value = self.params.get(key)
+            if value:
+                value = strip_markup(value)
+                if value:
+                    return value
+        return None
+
+def _split_template(text, start):
+    """
+    解析从start开始的模板
+
+    Args:
+        text: wikitext
+        start: 模板起始位置（指向'{{'）
+
+    Returns:
+        tuple: (参数原文列表, 模板结束位置, 嵌套模板列表)
+    """
+    parts = []
+    nested = []
+    link_depth = 0
+    i = start + 2
+    part_start = i
+    length = len(text)
+
+    while i < length:
+        if text.startswith('{{{', i):
+            # 模板参数占位符，整体跳过
+            end = text.find('}}}', i + 3)
+            i = length if end < 0 else end + 3
+        elif text.startswith('{{', i):
+            inner_parts, i, inner_nested = _split_template(text, i)
+            nested.extend(inner_nested)
+            if inner_parts is not None:
+                nested.append(_build_template(inner_parts))
+        elif text.startswith('[[', i):
+            link_depth += 1
+            i += 2
+        elif text.startswith(']]', i) and link_depth:
+            link_depth -= 1
+            i += 2
+        elif text[i] == '|' and link_depth == 0:
+            parts.append(text[part_start:i])
+            i += 1
+            part_start = i
+        elif text.startswith('}}', i):
+            parts.append(text[part_start:i])
+            return parts, i + 2, nested
+        else:
+            i += 1
+
+    # 未闭合的模板
+    return None, length, nested
+
+def _build_template(parts):
+    """由参数原文构造模板对象"""
+    name = parts[0].strip().replace('_', ' ')
+    params = {}
+    position = 0
+    for part in parts[1:]:
+        key, sep, value = part.partition('=')
+        if sep and '{{' not in key and '[[' not in key:
+            params[key.strip()] = value.strip()
+        else:
+            position += 1
+            params[str(position)] = part.strip()
+    return WikiTemplate(name, params)
+
+def parse_templates(text):
+    """
+    找出wikitext中的所有模板（含嵌套模板）
+
+    Args:
+        text: wikitext
+
+    Returns:
+        list: WikiTemplate列表，按模板结束位置排序
+    """
+    text = COMMENT_RE.sub('', text)
+    templates = []
+    i = 0
+    while True:
+        start = text.find('{{', i)
+        if start < 0:
+            break
+        parts, i, nested = _split_template(text, start)
+        templates.extend(nested)
+        if parts is not None:
+            templates.append(_build_template(parts))
+    return templates
+
+def find_templates(templates, names):
+    """按名称筛选模板"""
+    return [template for template in templates if template.name in names]
+
+def strip_markup(value):
+    """
+    去除wikitext标记，得到纯文本
+
+    Args:
+        value: wikitext片段
+
+    Returns:
+        str: 纯文本
+    """
+    value = COMMENT_RE.sub('', value)
+    value = REF_RE.sub('', value)
+    value = FILE_LINK_RE.sub('', value)
+    value = _strip_templates(value)
+    value = LINK_RE.sub(r'\1', value)
+    value = EXTERNAL_LINK_RE.sub(r'\1', value)
+    value = BR_RE.sub('\n', value)
+    value = TAG_RE.sub('', value)
+    value = value.replace("'''", '').replace("''", '')
+    return value.strip()
+
+def _strip_templates(value):
+    """移除模板调用（保留模板外的文本）"""
+    result = []
+    i = 0
+    while True:
+        start = value.find('{{', i)
+        if start < 0:
+            result.append(value[i:])
+            break
+        result.append(value[i:start])
+        _, i, _ = _split_template(value, start)
+    return ''.join(result)
+
+def get_plain_line_text(line):
+    """
+    段落行的纯文本
+
+    Args:
+        line: wikitext中的一行
+
+    Returns:
+        str: 与HTML段落中该行文本相同的纯文本，含有模板、标签、字符实体、外部链接、
+            列表/缩进/预格式等会改变渲染文本的语法时返回None
+    """
+    if not line or line.startswith(PARAGRAPH_BREAKERS) or any(token in line for token in NON_PLAIN_TOKENS):
+        return None
+    for match in LINK_RE.finditer(line):
+        # 只接受普通内部链接，文件、分类、跨语言链接和管道技巧的渲染文本与源码不同
+        if ':' in match.group(0) or not match.group(1):
+            return None
+    text = LINK_RE.sub(r'\1', line).replace("'''", '').replace("''", '')
+    if '[' in text or ']' in text or "''" in text:
+        return None
+    return text
+
+def get_section_paragraphs(text, headings):
+    """
+    获取章节的正文段落文本
+
+    HTML解析取章节标题后连续的<p>元素文本，MediaWiki渲染段落时每行保留换行，段落末尾也有换行。
+    只有章节内容全部是普通段落时才能从源码得到逐字相同的文本，否则交给HTML解析
+
+    Args:
+        text: wikitext
+        headings: 可能的章节标题（二级标题，取最先出现的）
+
+    Returns:
+        str: 段落文本，章节不存在或含有无法逐字还原的内容时返回None
+    """
+    text = COMMENT_RE.sub('', text)
+    matches = list(HEADING_RE.finditer(text))
+    for index, match in enumerate(matches):
+        if len(match.group(1)) != 2 or match.group(2) not in headings:
+            continue
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        paragraphs = [[]]
+        for line in text[match.end():end].strip('\n').split('\n'):
+            line = line.rstrip()
+            if not line:
+                # 连续空行会渲染出空段落
+                if not paragraphs[-1]:
+                    return None
+                paragraphs.append([])
+                continue
+            line_text = get_plain_line_text(line)
+            if line_text is None:
+                return None
+            paragraphs[-1].append(line_text)
+        if not paragraphs[-1]:
+            return None
+        return ''.join('\n'.join(lines) + '\n' for lines in paragraphs)
+    return None
+
+def extract_pokemon_fields(text):
+    """
+    从宝可梦页面的wikitext中提取字段
+
+    Args:
+        text: wikitext
+
+    Returns:
+        dict: 能从源码逐字得到的字段（单一形态宝可梦的stats）
+    """
+    fields = {}
+    templates = find_templates(parse_templates(text), STATS_TEMPLATES)
+    # 多形态宝可梦的形态名称由HTML中的表格决定，源码无法一一对应
+    if len(templates) == 1:
+        data = {key: templates[0].get(*params) for key, params in STATS_PARAMS.items()}
+        if None not in data.values() and all(value.isdigit() for value in data.values()):
+            fields['stats'] = [{'form': '一般', 'data': data}]
+    return fields
+
+def extract_pokemon_infobox(text):
+    """
+    从宝可梦信息框模板中提取形态信息
+
+    Args:
+        text: wikitext
+
+    Returns:
+        dict: 形态信息中能由模板参数直接得到的键（types、genus、ability、height、weight、color、
+            catch_rate的number、egg_groups）；没有信息框或有多个信息框（多形态）时返回空字典
+    """
+    templates = find_templates(parse_templates(text), POKEMON_INFOBOX_TEMPLATES)
+    if len(templates) != 1:
+        return {}
+    infobox = templates[0]
+    values = {}
+    types = [value for value in (infobox.get('type1'), infobox.get('type2')) if value]
+    if types:
+        values['types'] = types
+    genus = infobox.get('species')
+    if genus:
+        values['genus'] = genus
+    if infobox.get('ability1'):
+        abilities = [{'name': infobox.get(key), 'is_hidden': False} for key in ('ability1', 'ability2') if infobox.get(key)]
+        if infobox.get('abilityd'):
+            abilities.append({'name': infobox.get('abilityd'), 'is_hidden': True})
+        values['ability'] = abilities
+    for key, param, unit in (('height', 'height', 'm'), ('weight', 'weight', 'kg')):
+        value = infobox.get(param)
+        if value and NUMBER_RE.match(value):
+            values[key] = f'{value}{unit}'
+    color = infobox.get('color')
+    if color:
+        values['color'] = color
+    catch_rate = infobox.get('catchrate')
+    if catch_rate and catch_rate.isdigit():
+        # 括号中的捕获几率由模板计算，只提供数值
+        values['catch_rate'] = {'number': catch_rate}
+    egg_groups = [value.replace('群', '') for value in (infobox.get('egggroup1'), infobox.get('egggroup2')) if value]
+    if egg_groups:
+        values['egg_groups'] = egg_groups
+    return values
+
+def extract_move_fields(text):
+    """
+    从招式页面的wikitext中提取字段
+
+    Args:
+        text: wikitext
+
+    Returns:
+        dict: 能从源码逐字得到的字段（effect）
+    """
+    fields = {}
+    effect = get_section_paragraphs(text, MOVE_EFFECT_SECTIONS)
+    if effect is not None:
+        fields['effect'] = effect
+    return fields
+
+def extract_ability_fields(text):
+    """
+    从特性页面的wikitext中提取字段
+
+    Args:
+        text: wikitext
+
+    Returns:
+        dict: 能从源码逐字得到的字段（effect）
+    """
+    fields = {}
+    effect = get_section_paragraphs(text, ABILITY_EFFECT_SECTIONS)
+    if effect is not None:
+        fields['effect'] = effect
+    return fields
+
+# 实体类型 -> 字段提取函数
+FIELD_EXTRACTORS = {
+    'pokemon': extract_pokemon_fields,
+    'move': extract_move_fields,
+    'ability': extract_ability_fields
+}
+
+def extract_fields(entity, text):
+    """按实体类型从wikitext中提取字段"""
+    return FIELD_EXTRACTORS[entity](text)
+
+def get_missing_fields(fields, required):
+    """
+    获取wikitext未能提供的字段
+
+    Args:
+        fields: wikitext提取结果
+        required: 需要输出的字段列表
+
+    Returns:
+        list: 缺少的字段
+    """
+    return [key for key in required if key not in fields]
+
+def needs_html(entity, text):
+    """
+    页面是否还需要获取文章页面HTML（wikitext缺少需要输出的字段且开启了HTML回退）
+
+    Args:
+        entity: 实体类型
+        text: wikitext
+    """
+    if not WIKITEXT_CONFIG['html_fallback']:
+        return False
+    return bool(get_missing_fields(extract_fields(entity, text), WIKITEXT_CONFIG['fields'][entity]))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+
+# 测试不使用磁盘缓存、不限速、不导出网络指标，所有请求都发往本地模拟服务器
+os.environ.setdefault('POKE_HTTP_CACHE', '0')
+os.environ.setdefault('POKE_PARSE_CACHE', '0')
+os.environ.setdefault('POKE_RATE_LIMIT', '0')
+os.environ.setdefault('POKE_METRICS', '0')
+
+SCRIPTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_PATH)
+
+import pytest
+
+import config
+
+# 测试日志不写入仓库中的日志文件
+config.LOG_CONFIG['log_file'] = os.path.join(tempfile.gettempdir(), 'pokemon_data_scraper_test.log')
+
+from wiki_stub import WikiStub
+
+@pytest.fixture
+def wiki_stub():
+    """本地模拟服务器，请求地址已指向它"""
+    with WikiStub() as stub, stub.patch_config():
+        yield stub
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+@pytest.fixture
+def read_fixture():
+    """读取tests/fixtures下的页面：(实体类型, 页面名称, 扩展名) -> 文本"""
+    def read(entity, name, ext):
+        with open(os.path.join(FIXTURES_PATH, entity, f'{name}.{ext}'), encoding='utf-8') as f:
+            return f.read()
+    return read
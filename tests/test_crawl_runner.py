@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import pytest
+from requests.exceptions import RequestException
+
+from config import CRAWL_FRONTIER_CONFIG, NETWORK_CONFIG, PIPELINE_CONFIG
+from crawl_frontier import CrawlFrontier
+from crawl_runner import run_detail_crawl
+
+@pytest.fixture
+def crawl_env(wiki_stub, tmp_path, monkeypatch):
+    monkeypatch.setitem(CRAWL_FRONTIER_CONFIG, 'retry_cool_down', 0)
+    monkeypatch.setitem(CRAWL_FRONTIER_CONFIG, 'inline_retries', 1)
+    monkeypatch.setitem(CRAWL_FRONTIER_CONFIG, 'max_attempts', 3)
+    monkeypatch.setitem(PIPELINE_CONFIG, 'parse_workers', 0)
+    frontier = CrawlFrontier(str(tmp_path / 'frontier.sqlite3'))
+    yield frontier, lambda item: str(tmp_path / f"{item['name']}.json")
+    frontier.close()
+
+def test_parse_errors_are_not_requeued(wiki_stub, crawl_env):
+    frontier, file_path_fn = crawl_env
+    wiki_stub.pages['撞击'] = {'revid': 1, 'html': '<p>撞击</p>'}
+    calls = []
+
+    def crawl(item, page):
+        calls.append(item['name'])
+        raise ValueError('提取失败')
+
+    counts = run_detail_crawl('move', [{'name': '撞击'}, {'name': '不存在的招式'}], file_path_fn, crawl, frontier)
+
+    assert counts['failed'] == 2
+    # 解析失败只尝试一次；获取失败（404）按轮次重试直到尝试次数用尽
+    assert calls == ['撞击']
+    attempts = {key: count for key, count, _ in frontier.failures('move')}
+    assert attempts == {'撞击': 1, '不存在的招式': 3}
+    assert not frontier.has_unfinished('move', 3)
+
+def test_transport_errors_are_requeued(wiki_stub, crawl_env):
+    frontier, file_path_fn = crawl_env
+    wiki_stub.pages['撞击'] = {'revid': 1, 'html': '<p>撞击</p>'}
+    calls = []
+
+    def crawl(item, page):
+        calls.append(item['name'])
+        if len(calls) == 1:
+            raise RequestException('连接中断')
+        return {'name': item['name']}
+
+    counts = run_detail_crawl('move', [{'name': '撞击'}], file_path_fn, crawl, frontier)
+
+    assert counts['done'] == 1
+    assert frontier.retried('move') == [('撞击', 2)]
+
+def test_read_timeouts_block_only_inline_retries(wiki_stub, crawl_env, monkeypatch):
+    # 读取超时不在传输层重试：每轮只在原地尝试inline_retries次，之后延后到下一轮
+    frontier, file_path_fn = crawl_env
+    wiki_stub.pages['撞击'] = {'revid': 1, 'html': '<p>撞击</p>'}
+    wiki_stub.latency = 0.5
+    monkeypatch.setitem(NETWORK_CONFIG, 'timeout', 0.1)
+
+    counts = run_detail_crawl('move', [{'name': '撞击'}], file_path_fn, lambda item, page: {'name': item['name']}, frontier)
+
+    assert counts['failed'] == 1
+    assert [attempts for _, attempts, _ in frontier.failures('move')] == [3]
+    assert wiki_stub.count_requests() == 3
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from config import DOWNLOAD_CONFIG
+from network_utils import download_file
+
+DATA = bytes(range(256)) * 64
+
+@pytest.fixture
+def image(wiki_stub, tmp_path):
+    wiki_stub.files['/images/001.png'] = DATA
+    path = tmp_path / '001.png'
+    return f'{wiki_stub.base_url}/images/001.png', path, tmp_path / f"001.png{DOWNLOAD_CONFIG['part_suffix']}"
+
+def test_download(wiki_stub, image):
+    url, path, part = image
+    assert download_file(url, str(path))
+    assert path.read_bytes() == DATA
+    assert not part.exists()
+
+def test_resume_partial_download(wiki_stub, image):
+    url, path, part = image
+    part.write_bytes(DATA[:1000])
+    assert download_file(url, str(path))
+    assert path.read_bytes() == DATA
+    assert wiki_stub.count_requests() == 1
+
+def test_complete_part_file_is_finalized_without_retries(wiki_stub, image):
+    # 临时文件已完整时续传请求得到416，按Content-Range中的总大小确认后直接完成
+    url, path, part = image
+    part.write_bytes(DATA)
+    assert download_file(url, str(path))
+    assert path.read_bytes() == DATA
+    assert not part.exists()
+    assert wiki_stub.count_requests() == 1
+
+def test_oversized_part_file_restarts_immediately(wiki_stub, image):
+    url, path, part = image
+    part.write_bytes(DATA + b'extra')
+    assert download_file(url, str(path))
+    assert path.read_bytes() == DATA
+    assert wiki_stub.count_requests() == 2
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+from fetch_engine import AsyncFetchEngine
+from hedge_policy import HedgePolicy
+
+class FakeResponse:
+    def __init__(self, elapsed):
+        self.elapsed = timedelta(seconds=elapsed)
+
+class FakeManager:
+    """第一次请求很慢，之后的请求很快；每个请求先在“限速器”中等待"""
+
+    def __init__(self, slow=0.3, fast=0.01, wait=0.05):
+        self.slow, self.fast, self.wait = slow, fast, wait
+        self.calls = 0
+        # (URL, 开始时间, 结束时间)
+        self.timeline = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def register_stats(self, provider):
+        pass
+
+    def safe_request(self, url, headers=None, on_send=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            duration = self.slow if self.calls == 1 else self.fast
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        started = time.monotonic()
+        time.sleep(self.wait)
+        if on_send is not None:
+            on_send()
+        time.sleep(duration)
+        with self._lock:
+            self.running -= 1
+            self.timeline.append((url, started, time.monotonic()))
+        return FakeResponse(duration)
+
+def make_engine(manager, per_host_concurrency=2):
+    policy = HedgePolicy(enabled=True, min_samples=1, min_delay=0.05, budget=1)
+    policy.record_latency(0.05)
+    return AsyncFetchEngine(manager, max_concurrency=4, per_host_concurrency=per_host_concurrency, hedge=policy), policy
+
+def test_hedge_records_http_time_only():
+    manager = FakeManager(slow=0.2, fast=0.2, wait=0.3)
+    engine, policy = make_engine(manager)
+    policy.latencies.clear()
+    asyncio.run(engine.fetch_many(['http://a/1']))
+    engine.shutdown()
+    # 限速等待（0.3秒）不计入延迟样本
+    assert list(policy.latencies) == [0.2]
+
+def test_hedge_clock_starts_when_sent():
+    # 在限速器中等待的时间（0.3秒）超过对冲等待时间，但请求发出后很快返回，不应对冲
+    manager = FakeManager(slow=0.01, wait=0.3)
+    engine, policy = make_engine(manager)
+    asyncio.run(engine.fetch_many(['http://a/1']))
+    engine.shutdown()
+    assert policy.hedge_count == 0
+    assert manager.calls == 1
+
+def test_no_hedge_when_host_is_full():
+    manager = FakeManager(wait=0)
+    engine, policy = make_engine(manager, per_host_concurrency=1)
+    asyncio.run(engine.fetch_many(['http://a/1']))
+    engine.shutdown()
+    assert policy.hedge_count == 0
+    assert manager.max_running == 1
+
+def test_straggler_holds_host_slot():
+    manager = FakeManager(wait=0)
+    engine, policy = make_engine(manager)
+
+    async def run():
+        await engine.fetch('http://a/1')
+        # 对冲请求先返回时原请求仍在线程中执行
+        assert policy.win_count == 1
+        assert manager.running == 1
+        await asyncio.gather(engine.fetch('http://a/2'), engine.fetch('http://a/3'))
+
+    asyncio.run(run())
+    engine.shutdown()
+    # 落后的原请求仍占用一个名额，同一主机同时执行的请求（含对冲和落后的请求）不超过上限
+    assert manager.max_running == 2
+    # 后两个请求不能同时执行（其中一个名额在落后的请求结束前一直被占用）
+    (_, start2, end2), (_, start3, end3) = sorted(item for item in manager.timeline if item[0] != 'http://a/1')
+    assert end2 <= start3 or end3 <= start2
+
+def test_fetch_many_waits_for_stragglers():
+    manager = FakeManager()
+    engine, _ = make_engine(manager)
+    asyncio.run(engine.fetch_many(['http://a/1']))
+    assert manager.running == 0
+    engine.shutdown()
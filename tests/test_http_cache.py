@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import requests
+
+from http_cache import HttpCache
+
+def make_response(body):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['ETag'] = f'"{body}"'
+    response._content = body.encode('utf8')
+    return response
+
+def read_index(cache):
+    if not os.path.exists(cache.index_path):
+        return {}
+    with open(cache.index_path, encoding='utf8') as file:
+        return json.load(file)
+
+def test_index_written_in_batches(tmp_path):
+    cache = HttpCache(cache_dir=str(tmp_path), enabled=True, flush_interval=3)
+    cache.store('http://a/1', make_response('1'))
+    cache.store('http://a/2', make_response('2'))
+    # 每次写入不再重写整个索引
+    assert read_index(cache) == {}
+    cache.store('http://a/3', make_response('3'))
+    assert set(read_index(cache)) == {'http://a/1', 'http://a/2', 'http://a/3'}
+
+def test_last_access_persisted(tmp_path):
+    cache = HttpCache(cache_dir=str(tmp_path), enabled=True, flush_interval=100)
+    for name in ('1', '2', '3'):
+        cache.store(f'http://a/{name}', make_response(name))
+    cache.flush()
+    assert cache.load_response('http://a/1').content == b'1'
+    cache.flush()
+
+    # 重新加载后按最近访问时间排序，命中过的条目最后被淘汰
+    reloaded = HttpCache(cache_dir=str(tmp_path), enabled=True, max_size=2)
+    with reloaded._lock:
+        reloaded._evict()
+    assert list(reloaded._entries) == ['http://a/3', 'http://a/1']
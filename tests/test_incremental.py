@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from config import INCREMENTAL_CONFIG
+from crawl_runner import get_item_key, plan_items
+from utils import load_revid, save_revid, save_to_file, should_skip_by_revid
+from wiki_api import get_latest_revids
+
+PAGES = {
+    '妙蛙种子': {'revid': 100},
+    '妙蛙草': {'revid': 201},
+    '妙蛙花': {'revid': 300},
+}
+
+def write_output(path, revid=None):
+    save_to_file(str(path), {'name': path.stem})
+    if revid is not None:
+        save_revid(str(path), revid)
+
+def test_get_latest_revids(wiki_stub):
+    wiki_stub.pages.update(PAGES)
+    wiki_stub.redirects['妙蛙種子'] = '妙蛙种子'
+
+    revids = get_latest_revids(['妙蛙种子', '妙蛙種子', '妙蛙花', '不存在的页面'])
+
+    assert revids == {'妙蛙种子': 100, '妙蛙種子': 100, '妙蛙花': 300}
+
+def test_get_latest_revids_batches(wiki_stub, monkeypatch):
+    from config import WIKI_API_CONFIG
+    monkeypatch.setitem(WIKI_API_CONFIG, 'batch_size', 2)
+    wiki_stub.pages.update(PAGES)
+
+    assert get_latest_revids(list(PAGES)) == {title: page['revid'] for title, page in PAGES.items()}
+    assert wiki_stub.count_requests('/api.php') == 2
+
+def test_should_skip_by_revid(tmp_path):
+    path = tmp_path / 'a.json'
+    assert not should_skip_by_revid(str(path), 1)
+
+    write_output(path, 1)
+    assert load_revid(str(path)) == 1
+    assert should_skip_by_revid(str(path), 1)
+    assert not should_skip_by_revid(str(path), 2)
+    assert not should_skip_by_revid(str(path), None)
+
+def test_plan_items_incremental(wiki_stub, tmp_path, monkeypatch):
+    monkeypatch.setitem(INCREMENTAL_CONFIG, 'enabled', True)
+    wiki_stub.pages.update(PAGES)
+    # 未修改：跳过；已修改：重新抓取；没有输出文件：抓取；页面不存在（查不到修订版本）：按变更处理
+    write_output(tmp_path / '妙蛙种子.json', 100)
+    write_output(tmp_path / '妙蛙草.json', 200)
+    write_output(tmp_path / '不存在的页面.json', 1)
+    items = [{'name': name} for name in ('妙蛙种子', '妙蛙草', '妙蛙花', '不存在的页面')]
+
+    entries = plan_items('pokemon', items, lambda item: str(tmp_path / f"{item['name']}.json"))
+
+    assert [(key, revid) for key, _, revid in entries] == [('妙蛙草', 201), ('妙蛙花', 300), ('不存在的页面', None)]
+    assert get_item_key(str(tmp_path / '妙蛙草.json')) == '妙蛙草'
+
+def test_plan_items_api_error(wiki_stub, tmp_path, monkeypatch):
+    monkeypatch.setitem(INCREMENTAL_CONFIG, 'enabled', True)
+    wiki_stub.pages.update(PAGES)
+    wiki_stub.api_error = True
+    write_output(tmp_path / '妙蛙种子.json', 100)
+
+    entries = plan_items('pokemon', [{'name': '妙蛙种子'}], lambda item: str(tmp_path / f"{item['name']}.json"))
+
+    # 查询失败时不能跳过任何页面
+    assert [(key, revid) for key, _, revid in entries] == [('妙蛙种子', None)]
+
+def test_plan_items_full(wiki_stub, tmp_path, monkeypatch):
+    monkeypatch.setitem(INCREMENTAL_CONFIG, 'enabled', False)
+    write_output(tmp_path / '妙蛙种子.json')
+
+    items = [{'name': '妙蛙种子'}, {'name': '妙蛙草'}]
+    entries = plan_items('pokemon', items, lambda item: str(tmp_path / f"{item['name']}.json"))
+
+    # 非增量模式按文件是否存在判断，不查询修订版本
+    assert [(key, revid) for key, _, revid in entries] == [('妙蛙草', None)]
+    assert wiki_stub.count_requests('/api.php') == 0
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import socket
+import time
+
+from network_utils import network_manager
+
+def get_closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def test_transport_does_not_retry():
+    # 连接错误不在urllib3中重试（原先每次尝试内还有5次带退避的重试，约30秒）
+    assert network_manager.session.get_adapter('http://').max_retries.total == 0
+    url = f'http://127.0.0.1:{get_closed_port()}/x'
+    started = time.perf_counter()
+    assert network_manager.safe_request(url, max_retries=1, dedupe=False) is None
+    assert time.perf_counter() - started < 5
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from config import EXTRACTOR_VERSIONS, PRUNE_CONFIG
+from html_pruner import set_pruning
+from learnset_extractor import set_fast_learnsets
+from parse_cache import ParseCache
+from parser_utils import set_parser_backend, set_partial_parse
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(cache_dir=str(tmp_path), enabled=True)
+
+@pytest.fixture
+def restore_settings():
+    saved = (set_parser_backend('html.parser'), set_partial_parse(True), set_pruning(True), set_fast_learnsets(True))
+    yield
+    set_parser_backend(saved[0])
+    set_partial_parse(saved[1])
+    set_pruning(saved[2])
+    set_fast_learnsets(saved[3])
+
+def get(cache, result):
+    return cache.get_or_parse('move', '<html></html>', {'name': '撞击'}, lambda: result)
+
+@pytest.mark.parametrize('toggle', [
+    lambda monkeypatch: set_parser_backend('lxml'),
+    lambda monkeypatch: set_partial_parse(False),
+    lambda monkeypatch: set_pruning(False),
+    lambda monkeypatch: monkeypatch.setitem(PRUNE_CONFIG, 'hidden', True),
+    lambda monkeypatch: monkeypatch.setitem(PRUNE_CONFIG, 'references', True),
+])
+def test_settings_change_misses_cache(cache, restore_settings, monkeypatch, toggle):
+    pytest.importorskip('lxml')
+    assert get(cache, {'effect': 'a'}) == {'effect': 'a'}
+    assert get(cache, {'effect': 'b'}) == {'effect': 'a'}
+
+    # 解析设置变化后不使用按原设置得到的结果
+    toggle(monkeypatch)
+    assert get(cache, {'effect': 'b'}) == {'effect': 'b'}
+    assert cache.get_stats()['parse_cache_misses'] == 2
+
+def test_fast_learnsets_change_misses_cache(cache, restore_settings):
+    pytest.importorskip('lxml')
+    set_parser_backend('lxml')
+    get(cache, {'effect': 'a'})
+    set_fast_learnsets(False)
+    assert get(cache, {'effect': 'b'}) == {'effect': 'b'}
+
+def test_evict_old_versions_and_least_recent(cache, monkeypatch):
+    for index in range(4):
+        key = cache.make_key(f'page{index}', {})
+        cache.store('move', key, {'index': index})
+        os.utime(cache._path('move', key), (index, index))
+    size = os.path.getsize(cache._path('move', cache.make_key('page0', {})))
+
+    # 提高版本号前写入的缓存在淘汰时整体删除
+    monkeypatch.setitem(EXTRACTOR_VERSIONS, 'move', EXTRACTOR_VERSIONS['move'] + 1)
+    new_keys = [cache.make_key(f'new{index}', {}) for index in range(3)]
+    for index, key in enumerate(new_keys):
+        cache.store('move', key, {'index': index})
+        os.utime(cache._path('move', key), (index, index))
+    # 读取会更新访问时间，最早写入的条目被保留
+    assert cache.load('move', new_keys[0]) == {'index': 0}
+
+    cache.max_size = size * 2
+    assert cache.evict() <= cache.max_size
+    version_dir = os.path.relpath(cache._path('move', new_keys[0]), os.path.join(cache.cache_dir, 'move')).split(os.sep)[0]
+    assert os.listdir(os.path.join(cache.cache_dir, 'move')) == [version_dir]
+    assert [cache.load('move', key) for key in new_keys] == [{'index': 0}, None, {'index': 2}]
+    assert cache.get_stats()['parse_cache_evictions'] == 1
+
+def test_key_ignores_volatile_markup(cache, read_fixture):
+    # 每次请求都不同的脚本变量和解析器注释不影响缓存键
+    html = read_fixture('move', '撞击', 'html')
+    variants = [
+        html.replace('</head>', f'<script>RLCONF={{"wgRequestId":"{request_id}","wgBackendResponseTime":{time}}};</script></head>')
+        .replace('</body>', f'<!-- NewPP limit report\nCPU time usage: {time}ms\n--><!-- Saved in parser cache with key {request_id} -->\n</body>')
+        for request_id, time in (('a1', 120), ('b2', 87))
+    ]
+    assert variants[0] != variants[1]
+    assert cache.make_key(variants[0], {}) == cache.make_key(variants[1], {})
+    assert cache.make_key(variants[0], {}) != cache.make_key(variants[0].replace('撞击', '拍击'), {})
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+
+import pytest
+
+from ability import parse_ability_page
+from ability_list import parse_ability_list
+from config import PRUNE_CONFIG
+from download_dream_image import parse_gallery
+from html_pruner import make_pruned_soup, set_pruning
+from learnset_extractor import make_pruned_tree, set_fast_learnsets
+from move import parse_move_page
+from move_list import parse_move_list
+from parser_utils import set_parser_backend, set_partial_parse
+from pokemon import parse_pokemon_page
+from pokemon_full_list import parse_pokemon_full_list
+
+# (实体类型, 页面名称, 页面HTML -> 解析结果)
+PAGES = (
+    ('pokemon', '妙蛙种子', lambda html: parse_pokemon_page(html, '妙蛙种子', '0001', 'Bulbasaur', 'フシギダネ')),
+    ('move', '撞击', lambda html: parse_move_page(html, {'index': '033', 'name': '撞击'})),
+    ('ability', '茂盛', lambda html: parse_ability_page(html, {'index': '065', 'name': '茂盛'})),
+)
+
+def parse_pokemon_list(html):
+    # 代替浏览器：从页面内联的样式表中读取图标位置
+    positions = dict(re.findall(r'\.(sprite-icon-\w+)\{background-position:([^}]+)\}', html))
+    return parse_pokemon_full_list(html, positions.get)
+
+# tests/fixtures/list下的列表页：(页面名称, 页面HTML -> 解析结果)
+LIST_PAGES = (
+    ('招式列表', parse_move_list),
+    ('特性列表', parse_ability_list),
+    ('宝可梦列表', parse_pokemon_list),
+    ('宝可梦版权绘', lambda html: [list(image) for image in parse_gallery(html)]),
+)
+
+@pytest.fixture
+def parse_settings():
+    """切换解析设置，测试结束后恢复"""
+    saved = []
+
+    def apply(backend, partial, fast_learnsets, pruning=False):
+        saved.append((
+            set_parser_backend(backend), set_partial_parse(partial),
+            set_fast_learnsets(fast_learnsets), set_pruning(pruning)
+        ))
+
+    yield apply
+    if saved:
+        backend, partial, fast_learnsets, pruning = saved[0]
+        set_parser_backend(backend)
+        set_partial_parse(partial)
+        set_fast_learnsets(fast_learnsets)
+        set_pruning(pruning)
+
+@pytest.mark.parametrize('entity, name, parse', PAGES, ids=[page[0] for page in PAGES])
+@pytest.mark.parametrize('backend', ['html.parser', 'lxml'])
+@pytest.mark.parametrize('partial', [False, True], ids=['full', 'partial'])
+@pytest.mark.parametrize('fast_learnsets', [False, True], ids=['soup-learnsets', 'fast-learnsets'])
+@pytest.mark.parametrize('pruning', [False, True], ids=['unpruned', 'pruned'])
+def test_parse_matches_expected(entity, name, parse, backend, partial, fast_learnsets, pruning, parse_settings, read_fixture):
+    # 各解析器、部分解析、快速招式表提取和（默认配置的）预处理的结果都与提交的期望输出相同
+    parse_settings(backend, partial, fast_learnsets, pruning)
+    expected = json.loads(read_fixture(entity, name, 'json'))
+    assert parse(read_fixture(entity, name, 'html')) == expected
+
+@pytest.mark.parametrize('flag, markup', [
+    ('hidden', '<p>招式<span style="display:none">1</span></p>'),
+    ('references', '<p>招式<sup class="reference">[1]</sup></p>'),
+])
+def test_fast_learnsets_follow_runtime_prune_config(flag, markup, parse_settings, monkeypatch):
+    # 运行时切换移除规则后，快速提取与make_pruned_soup移除相同的节点
+    pytest.importorskip('lxml')
+    parse_settings('lxml', False, True, True)
+    root, _ = make_pruned_tree(markup)
+    assert root.xpath('string(//p)') == make_pruned_soup(markup).p.text
+    monkeypatch.setitem(PRUNE_CONFIG, flag, True)
+    root, _ = make_pruned_tree(markup)
+    assert root.xpath('string(//p)') == make_pruned_soup(markup).p.text == '招式'
+
+@pytest.mark.parametrize('name, parse', LIST_PAGES, ids=[page[0] for page in LIST_PAGES])
+def test_list_pages_match_across_backends(name, parse, parse_settings, read_fixture):
+    # 列表页脚本默认使用lxml，其结果与html.parser及提交的期望输出相同
+    pytest.importorskip('lxml')
+    html = read_fixture('list', name, 'html')
+    results = {}
+    for backend in ('html.parser', 'lxml'):
+        parse_settings(backend, False, False)
+        results[backend] = parse(html)
+    assert results['lxml'] == results['html.parser'] == json.loads(read_fixture('list', name, 'json'))
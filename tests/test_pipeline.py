@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from config import CRAWL_FRONTIER_CONFIG, PIPELINE_CONFIG
+from crawl_frontier import CrawlFrontier
+from network_utils import safe_request
+from pipeline import CrawlPipeline
+
+def crawl_ok(item, page):
+    return {'name': item['name']}
+
+def crawl_error(item, page):
+    raise ValueError('提取失败')
+
+def crawl_with_request(item, page):
+    # 解析进程中发出请求
+    return safe_request('http://127.0.0.1:9/wiki/' + item['name'])
+
+@pytest.fixture
+def make_pipeline(wiki_stub, tmp_path, monkeypatch):
+    monkeypatch.setitem(CRAWL_FRONTIER_CONFIG, 'inline_retries', 1)
+    monkeypatch.setitem(PIPELINE_CONFIG, 'start_method', 'spawn')
+    frontier = CrawlFrontier(str(tmp_path / 'frontier.sqlite3'))
+    for name in ('撞击', '叫声'):
+        wiki_stub.pages[name] = {'revid': 1, 'html': f'<p>{name}</p>'}
+
+    def make(crawl_fn, workers):
+        frontier.reset('move', [(name, {'name': name}, None) for name in ('撞击', '叫声')])
+        return CrawlPipeline(frontier, 'move', lambda item: str(tmp_path / f"{item['name']}.json"), crawl_fn, workers)
+
+    yield make, frontier
+    frontier.close()
+
+@pytest.mark.parametrize('workers', [0, 1])
+def test_failed_parses_are_counted(make_pipeline, workers):
+    make, frontier = make_pipeline
+    stats = make(crawl_error, workers).run()
+    assert stats['parse']['items'] == 2
+    assert stats['parse']['failed'] == 2
+    assert frontier.counts('move')['failed'] == 2
+
+    stats = make(crawl_ok, workers).run()
+    assert stats['parse']['items'] == 2
+    assert stats['parse']['failed'] == 0
+    assert stats['write']['items'] == 2
+
+def test_parse_workers_cannot_send_requests(make_pipeline):
+    make, frontier = make_pipeline
+    stats = make(crawl_with_request, 1).run()
+    assert stats['parse']['failed'] == 2
+    errors = [error for _, _, error in frontier.failures('move')]
+    assert all('解析进程不发出网络请求' in error for error in errors)
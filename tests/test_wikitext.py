@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from ability import parse_ability_page, parse_ability_wikitext
+from config import PAGE_FETCH_CONFIG, PAGE_TITLES, WIKITEXT_CONFIG
+from move import parse_move_page, parse_move_wikitext
+from page_source import WikitextPage, fetch_pages
+from pokemon import parse_pokemon_page, parse_pokemon_wikitext
+from wikitext_parser import (
+    extract_ability_fields, extract_move_fields, extract_pokemon_fields, extract_pokemon_infobox, get_section_paragraphs
+)
+
+POKEMON = ('妙蛙种子', '0001', 'Bulbasaur', 'フシギダネ')
+MOVE = {'index': '033', 'name': '撞击'}
+ABILITY = {'index': '065', 'name': '茂盛'}
+
+def load_page(read_fixture, entity, name):
+    return WikitextPage(read_fixture(entity, name, 'wikitext'), read_fixture(entity, name, 'html'))
+
+def test_extracted_fields_match_html(read_fixture):
+    pokemon = load_page(read_fixture, 'pokemon', '妙蛙种子')
+    move = load_page(read_fixture, 'move', '撞击')
+    ability = load_page(read_fixture, 'ability', '茂盛')
+
+    assert extract_pokemon_fields(pokemon.wikitext) == {'stats': parse_pokemon_page(pokemon.html, *POKEMON)['stats']}
+    assert extract_move_fields(move.wikitext) == {'effect': parse_move_page(move.html, dict(MOVE))['effect']}
+    # 特性效果章节下还有子标题，源码无法逐字还原，交给HTML解析
+    assert extract_ability_fields(ability.wikitext) == {}
+
+@pytest.mark.parametrize('body', [
+    '撞击可以造成伤害。{{招式效果|撞击}}',
+    '撞击可以造成伤害。<ref>注释</ref>',
+    '* 撞击可以造成伤害。',
+    ' 撞击可以造成伤害。',
+    '撞击可以造成[[Category:一般属性招式]]伤害。',
+    '撞击可以造成[[伤害|]]。',
+    '撞击可以造成[https://example.com 伤害]。',
+    '撞击可以造成伤害。\n\n\n第二段。',
+])
+def test_section_paragraphs_reject_lossy_markup(body):
+    assert get_section_paragraphs(f'==招式附加效果==\n{body}\n', ('招式附加效果',)) is None
+
+def test_section_paragraphs_plain_text():
+    text = "==招式附加效果==\n'''撞击'''可以造成[[伤害]]。\n第二行。\n\n第二段[[攻击|招式]]。\n==范围==\n单体\n"
+    assert get_section_paragraphs(text, ('招式附加效果',)) == '撞击可以造成伤害。\n第二行。\n第二段招式。\n'
+
+def test_multiple_stats_templates_need_html():
+    stats = '{{种族值|HP=1|攻击=1|防御=1|特攻=1|特防=1|速度=1}}'
+    assert extract_pokemon_fields(stats) != {}
+    assert extract_pokemon_fields(stats + stats) == {}
+
+def test_infobox_matches_html_form(read_fixture):
+    pokemon = load_page(read_fixture, 'pokemon', '妙蛙种子')
+    form = parse_pokemon_page(pokemon.html, *POKEMON)['forms'][0]
+    infobox = extract_pokemon_infobox(pokemon.wikitext)
+
+    assert set(infobox) == {'types', 'genus', 'ability', 'height', 'weight', 'color', 'catch_rate', 'egg_groups'}
+    assert infobox['catch_rate'] == {'number': form['catch_rate']['number']}
+    assert {key: value for key, value in infobox.items() if key != 'catch_rate'} == {key: form[key] for key in infobox if key != 'catch_rate'}
+    # 多形态宝可梦的信息框与形态无法一一对应
+    assert extract_pokemon_infobox(pokemon.wikitext * 2) == {}
+
+def test_wikitext_mode_default_fields(read_fixture):
+    # 默认输出完整记录，与HTML解析逐字相同：源码提供的字段与HTML一致，其余字段只从HTML解析
+    pokemon = load_page(read_fixture, 'pokemon', '妙蛙种子')
+    move = load_page(read_fixture, 'move', '撞击')
+    ability = load_page(read_fixture, 'ability', '茂盛')
+
+    assert parse_pokemon_wikitext(pokemon, *POKEMON) == parse_pokemon_page(pokemon.html, *POKEMON)
+    assert parse_move_wikitext(move, dict(MOVE)) == parse_move_page(move.html, dict(MOVE))
+    assert parse_ability_wikitext(ability, dict(ABILITY)) == parse_ability_page(ability.html, dict(ABILITY))
+
+def test_wikitext_mode_incomplete_record_not_saved(read_fixture):
+    # 没有HTML补全字段时不返回缺少字段的记录
+    pokemon = load_page(read_fixture, 'pokemon', '妙蛙种子')._replace(html=None)
+    move = load_page(read_fixture, 'move', '撞击')._replace(html=None)
+    assert parse_pokemon_wikitext(pokemon, *POKEMON) is None
+    assert parse_move_wikitext(move, dict(MOVE)) is None
+
+def test_wikitext_mode_reduced_fields(read_fixture, monkeypatch):
+    # 只需要源码能提供的字段时不需要HTML
+    monkeypatch.setitem(WIKITEXT_CONFIG['fields'], 'pokemon', ['stats'])
+    monkeypatch.setitem(WIKITEXT_CONFIG['fields'], 'move', ['effect'])
+    pokemon = load_page(read_fixture, 'pokemon', '妙蛙种子')
+    move = load_page(read_fixture, 'move', '撞击')
+    html_pokemon = parse_pokemon_page(pokemon.html, *POKEMON)
+    html_move = parse_move_page(move.html, dict(MOVE))
+
+    data = parse_pokemon_wikitext(pokemon._replace(html=None), *POKEMON)
+    assert data == {key: html_pokemon[key] for key in ('name', 'index', 'name_en', 'name_jp', 'stats')}
+    assert parse_move_wikitext(move._replace(html=None), dict(MOVE)) == dict(MOVE, effect=html_move['effect'])
+
+def test_fetch_stage_fetches_html_only_when_needed(wiki_stub, read_fixture, monkeypatch):
+    monkeypatch.setitem(WIKITEXT_CONFIG['fields'], 'move', ['effect'])
+    monkeypatch.setitem(WIKITEXT_CONFIG['fields'], 'ability', ['effect'])
+    for entity, name in (('move', '撞击'), ('ability', '茂盛')):
+        monkeypatch.setitem(PAGE_FETCH_CONFIG['modes'], entity, 'wikitext')
+        title = PAGE_TITLES[entity](name)
+        wiki_stub.pages[title] = {'revid': 1, 'wikitext': read_fixture(entity, name, 'wikitext'), 'html': read_fixture(entity, name, 'html')}
+
+    # 招式效果能从源码得到，不请求文章页面
+    pages = fetch_pages('move', [PAGE_TITLES['move']('撞击')])
+    assert pages[PAGE_TITLES['move']('撞击')].html is None
+    assert wiki_stub.count_requests('/api.php') == 1
+    assert wiki_stub.count_requests() == 1
+
+    # 特性效果需要HTML，在获取阶段一并取回
+    wiki_stub.reset_stats()
+    pages = fetch_pages('ability', [PAGE_TITLES['ability']('茂盛')])
+    assert pages[PAGE_TITLES['ability']('茂盛')].html == read_fixture('ability', '茂盛', 'html')
+    assert wiki_stub.count_requests() == 2
+
+def test_fetch_stage_html_failure_fails_page(wiki_stub, read_fixture, monkeypatch):
+    monkeypatch.setitem(PAGE_FETCH_CONFIG['modes'], 'ability', 'wikitext')
+    title = PAGE_TITLES['ability']('茂盛')
+    # 文章页面不存在（404），整页视为获取失败，留给延后重试
+    wiki_stub.pages[title] = {'revid': 1, 'wikitext': read_fixture('ability', '茂盛', 'wikitext')}
+    monkeypatch.setattr(wiki_stub, 'handle', lambda path, params, handle=wiki_stub.handle: (
+        (404, 'text/html', '') if path.startswith('/wiki/') else handle(path, params)
+    ))
+    assert fetch_pages('ability', [title], max_retries=1) == {}